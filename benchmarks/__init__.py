@@ -0,0 +1 @@
+"""Benchmarks for PySweeper, run with asv."""
@@ -0,0 +1,150 @@
+"""Board construction, exposure, flagging and winning."""
+
+from pysweeper.bitboard import BitBoard
+from pysweeper.graph import rectangular, toroidal
+from pysweeper.pool import BoardPool
+from pysweeper.pysweeper import Board
+
+SHAPES = [(9, 9), (16, 16), (16, 30), (100, 100), (300, 300)]
+
+
+class Construction:
+    """Building boards of increasing size and mine density."""
+
+    params = (SHAPES, [0.12, 0.2])
+    param_names = ["shape", "density"]
+
+    def setup(self, shape, density):
+        """Build the graph so only the board is timed."""
+        rectangular(*shape)
+        self.pool = BoardPool()
+        self.pool.release(Board(*shape, 0))
+
+    def time_board(self, shape, density):
+        """Time building a board, with its graph cached."""
+        nrows, ncolumns = shape
+        Board(nrows, ncolumns, int(nrows * ncolumns * density), seed=0)
+
+    def time_pooled_board(self, shape, density):
+        """Time starting a game on a board released to a pool."""
+        nrows, ncolumns = shape
+        board = self.pool.acquire(
+            nrows, ncolumns, int(nrows * ncolumns * density), seed=0
+        )
+        self.pool.release(board)
+
+    def peakmem_board(self, shape, density):
+        """Measure the peak memory of building a board."""
+        nrows, ncolumns = shape
+        Board(nrows, ncolumns, int(nrows * ncolumns * density), seed=0)
+
+
+class Graph:
+    """Building and walking the adjacency graph of a board."""
+
+    params = SHAPES
+    param_names = ["shape"]
+
+    def setup(self, shape):
+        """Build the graphs to walk."""
+        self.graphs = [rectangular(*shape), toroidal(*shape)]
+
+    def time_rectangular(self, shape):
+        """Time building a graph from scratch."""
+        rectangular.__wrapped__(*shape)
+
+    def time_toroidal(self, shape):
+        """Time building a graph stored in compressed sparse row form."""
+        toroidal.__wrapped__(*shape)
+
+    def time_neighbours(self, shape):
+        """Time listing the neighbours of every tile of both graphs."""
+        for graph in self.graphs:
+            neighbours = graph.neighbours
+            for v in range(graph.ntiles):
+                neighbours(v)
+
+
+class Cascade:
+    """Exposing a whole board from one click, the worst case for flooding."""
+
+    params = [100, 300, 1000]
+    param_names = ["size"]
+    number = 1
+    warmup_time = 0
+    timeout = 300
+
+    def setup(self, size):
+        """Lay a single mine in the far corner."""
+        self.board = Board.from_mines(
+            size, size, [(size - 1, size - 1)], seed=0
+        )
+
+    def time_expose(self, size):
+        """Time exposing a board with a single mine."""
+        self.board.expose(0, 0)
+
+
+class Opening:
+    """Opening the region around one click, on a Board and a BitBoard."""
+
+    params = [(30, 0.05), (100, 0.02), (300, 0.01)]
+    param_names = ["size, density"]
+    number = 1
+    warmup_time = 0
+
+    def setup(self, params):
+        """Lay the same mines on both boards and find a tile to open."""
+        size, density = params
+        self.board = board = Board(
+            size, size, int(size * size * density), seed=0
+        )
+        self.bitboard = BitBoard.from_board(board)
+        self.tile = board.graph.coordinate(
+            next(
+                v
+                for v in range(board.ntiles)
+                if not board.mines[v] and not board.counts[v]
+            )
+        )
+
+    def time_board(self, params):
+        """Time Board.expose."""
+        self.board.expose(*self.tile)
+
+    def time_bitboard(self, params):
+        """Time BitBoard.expose, which also builds the coordinate set."""
+        self.bitboard.expose(*self.tile)
+
+    def time_bitboard_bits(self, params):
+        """Time BitBoard.expose_bits, which returns a mask."""
+        self.bitboard.expose_bits(*self.tile)
+
+
+class Flagging:
+    """Flagging every mine, checking for a win after each flag."""
+
+    params = [16, 100, 300]
+    param_names = ["size"]
+
+    def setup(self, size):
+        """Find the mines to flag."""
+        self.board = board = Board(size, size, size * size // 6, seed=0)
+        self.mines = [
+            board.graph.coordinate(v)
+            for v in range(board.ntiles)
+            if board.mines[v]
+        ]
+
+    def time_flag_and_win(self, size):
+        """Time flagging and unflagging every mine."""
+        board = self.board
+        for i, j in self.mines:
+            board.flag(i, j)
+            board.win
+        for i, j in self.mines:
+            board.flag(i, j)
+
+    def time_win(self, size):
+        """Time checking for a win."""
+        self.board.win
@@ -0,0 +1,89 @@
+"""Whole games, played one move at a time or in batches."""
+
+import random
+
+from pysweeper.batch import BatchEnv
+from pysweeper.pysweeper import Action, Board
+
+LEVELS = [(9, 9, 10), (16, 16, 40), (16, 30, 99), (100, 100, 1500)]
+
+
+class Game:
+    """Winning a game by exposing every safe tile in a random order."""
+
+    params = LEVELS
+    param_names = ["level"]
+    number = 1
+    warmup_time = 0
+
+    def setup(self, level):
+        """Shuffle the safe tiles."""
+        nrows, ncolumns, nmines = level
+        self.board = board = Board(nrows, ncolumns, nmines, seed=0)
+        coordinate = board.graph.coordinate
+        safe = [
+            coordinate(v) for v in range(board.ntiles) if not board.mines[v]
+        ]
+        random.Random(0).shuffle(safe)
+        self.safe = safe
+        self.mines = [
+            coordinate(v) for v in range(board.ntiles) if board.mines[v]
+        ]
+        self.moves = [(Action.EXPOSE, i, j) for i, j in safe] + [
+            (Action.FLAG, i, j) for i, j in self.mines
+        ]
+
+    def time_play(self, level):
+        """Time exposing every safe tile, then flagging every mine."""
+        board = self.board
+        exposed = board.exposed
+        index = board.graph.index
+        for i, j in self.safe:
+            if not exposed[index(i, j)]:
+                board.expose(i, j)
+        for i, j in self.mines:
+            board.flag(i, j)
+        assert board.win
+
+    def time_apply_moves(self, level):
+        """Time making the same moves with apply_moves."""
+        self.board.apply_moves(self.moves)
+        assert self.board.win
+
+
+class Batch:
+    """Stepping a batch of boards with random actions."""
+
+    params = ([64, 256, 1024], LEVELS[:3])
+    param_names = ["nboards", "level"]
+
+    def setup(self, nboards, level):
+        """Draw random actions."""
+        nrows, ncolumns, nmines = level
+        self.env = BatchEnv(nboards, nrows, ncolumns, nmines, seed=0)
+        self.boards = [
+            Board(nrows, ncolumns, nmines, seed=k) for k in range(nboards)
+        ]
+        rng = random.Random(0)
+        self.actions = [
+            [rng.randrange(nrows * ncolumns) for _ in range(nboards)]
+            for _ in range(10)
+        ]
+
+    def time_step(self, nboards, level):
+        """Time stepping every board 10 times."""
+        step = self.env.step
+        for actions in self.actions:
+            step(actions)
+
+    def time_loop(self, nboards, level):
+        """Time making the same steps on as many boards, one at a time."""
+        boards = self.boards
+        nrows, ncolumns, nmines = level
+        nsafe = nrows * ncolumns - nmines
+        for actions in self.actions:
+            for k, action in enumerate(actions):
+                board = boards[k]
+                board.expose(*divmod(action, ncolumns))
+                if board.mines[action] or board.nexposed == nsafe:
+                    boards[k] = Board(nrows, ncolumns, nmines)
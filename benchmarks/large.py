@@ -0,0 +1,85 @@
+"""Boards kept in files or shared memory, and the parallel backends."""
+
+import contextlib
+import os
+import shutil
+import tempfile
+
+from pysweeper import parallel
+from pysweeper.mapped import MappedBoard
+from pysweeper.shared import SharedBoard
+
+
+class Mapped:
+    """Building and playing a board whose state lives in a file."""
+
+    params = [300, 1000]
+    param_names = ["size"]
+    number = 1
+    warmup_time = 0
+    timeout = 300
+
+    def setup(self, size):
+        """Build a board with a mine per row in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.board = MappedBoard(
+            os.path.join(self.directory, "sparse"), size, size, size, seed=0
+        )
+
+    def teardown(self, size):
+        """Remove the boards."""
+        self.board.close()
+        shutil.rmtree(self.directory)
+
+    def time_construction(self, size):
+        """Time building a board with 15% of its tiles mines."""
+        path = os.path.join(self.directory, "dense")
+        MappedBoard(path, size, size, size * size * 3 // 20, seed=0).close()
+
+    def time_cascade(self, size):
+        """Time opening most of a sparse board from one click."""
+        self.board.expose(size // 2, size // 2)
+
+
+class Parallel:
+    """Laying mines and flooding openings with several processes."""
+
+    params = (["shared", "mapped"], [1, 2, 4])
+    param_names = ["kind", "processes"]
+    size = 1000
+    number = 1
+    warmup_time = 0
+    timeout = 300
+
+    def setup(self, kind, processes):
+        """Build an empty board and a board with a mine per row."""
+        self.directory = tempfile.mkdtemp()
+        self.boards = contextlib.ExitStack()
+        self.empty, self.sparse = (
+            self.boards.enter_context(self.board(kind, name))
+            for name in ("empty", "sparse")
+        )
+        parallel.lay_mines(self.sparse, self.size, processes)
+
+    def teardown(self, kind, processes):
+        """Remove the boards."""
+        self.boards.close()
+        shutil.rmtree(self.directory)
+
+    def board(self, kind, name):
+        """Return an empty board of `kind`."""
+        size = self.size
+        if kind == "shared":
+            return SharedBoard(size, size, 0, seed=0)
+        path = os.path.join(self.directory, name)
+        return MappedBoard(path, size, size, 0, seed=0)
+
+    def time_lay_mines(self, kind, processes):
+        """Time laying mines on 15% of the tiles."""
+        size = self.size
+        parallel.lay_mines(self.empty, size * size * 3 // 20, processes)
+
+    def time_expose(self, kind, processes):
+        """Time opening most of a sparse board from one click."""
+        size = self.size
+        parallel.expose(self.sparse, size // 2, size // 2, processes)
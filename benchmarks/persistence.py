@@ -0,0 +1,111 @@
+"""Saving, loading, logging, replaying and undoing games."""
+
+import os
+import random
+import tempfile
+import time
+
+from pysweeper.graph import rectangular
+from pysweeper.history import History
+from pysweeper.log import GameLog, read_games, replay
+from pysweeper.pysweeper import Action, Board
+from pysweeper.snapshot import dumps, loads
+
+
+class Snapshot:
+    """Round tripping a game in progress through its packed encoding."""
+
+    params = ([100, 1000], [False, True])
+    param_names = ["size", "compress"]
+    timeout = 300
+
+    def setup(self, size, compress):
+        """Encode a board with an opening exposed."""
+        self.board = Board(size, size, size * size * 3 // 20, seed=0)
+        self.board.expose(size // 2, size // 2)
+        self.data = dumps(self.board, compress=compress)
+
+    def time_dumps(self, size, compress):
+        """Time encoding a board."""
+        dumps(self.board, compress=compress)
+
+    def time_loads(self, size, compress):
+        """Time decoding a board."""
+        loads(self.data)
+
+    def time_cold_loads(self, size, compress):
+        """Time decoding a board whose graph was not built yet."""
+        rectangular.cache_clear()
+        loads(self.data)
+
+    def track_size(self, size, compress):
+        """Return the size of the encoded board."""
+        return len(self.data)
+
+    track_size.unit = "bytes"
+
+
+class Replay:
+    """Replaying a log of random games, reported as events per second."""
+
+    ngames = 200
+
+    def setup(self):
+        """Log random games to a temporary file."""
+        rng = random.Random(0)
+        fd, self.path = tempfile.mkstemp(suffix=".pswe")
+        os.close(fd)
+        os.remove(self.path)
+        with GameLog(self.path) as log:
+            for seed in range(self.ngames):
+                board = Board(16, 16, 40, seed=seed)
+                log.attach(board)
+                board.apply_moves(
+                    (rng.choice(list(Action)), *divmod(rng.randrange(256), 16))
+                    for _ in range(50)
+                )
+        self.nevents = sum(len(events) for _, events in read_games(self.path))
+
+    def teardown(self):
+        """Remove the log."""
+        os.remove(self.path)
+
+    def time_replay(self):
+        """Time replaying every game of the log."""
+        for _ in replay(self.path):
+            pass
+
+    def track_events_per_second(self):
+        """Return the number of events replayed per second."""
+        start = time.perf_counter()
+        self.time_replay()
+        return self.nevents / (time.perf_counter() - start)
+
+    track_events_per_second.unit = "events/s"
+
+
+class Undo:
+    """Undoing and redoing every move of a game."""
+
+    number = 1
+    warmup_time = 0
+
+    def setup(self):
+        """Play random moves with a history attached."""
+        self.board = board = Board(100, 100, 1500, seed=0)
+        self.history = History(board)
+        rng = random.Random(0)
+        for _ in range(500):
+            i, j = rng.randrange(100), rng.randrange(100)
+            if board.mines[board.graph.index(i, j)]:
+                board.flag(i, j)
+            else:
+                board.expose(i, j)
+
+    def time_undo_redo(self):
+        """Time undoing every move and redoing them again."""
+        history = self.history
+        while history.can_undo:
+            history.undo()
+        while history.can_redo:
+            history.redo()
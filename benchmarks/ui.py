@@ -0,0 +1,43 @@
+"""Building, rendering and clicking the urwid interface without a screen."""
+
+from pysweeper.ui import PySweeperUI
+
+LEVELS = [(9, 9, 10), (16, 30, 99), (50, 50, 400)]
+
+
+class Interface:
+    """Headless interface construction and rendering."""
+
+    params = LEVELS
+    param_names = ["level"]
+
+    def setup(self, level):
+        """Build an interface to render."""
+        self.ui = PySweeperUI(*level)
+
+    def time_construct(self, level):
+        """Time building the interface."""
+        PySweeperUI(*level)
+
+    def time_render(self, level):
+        """Time rendering the whole interface to a canvas."""
+        nrows, ncolumns, _ = level
+        self.ui.loop.widget.render((5 * ncolumns + 3, 3 * nrows + 1))
+
+
+class Click:
+    """Exposing the first tile of a game through its widget."""
+
+    params = LEVELS
+    param_names = ["level"]
+    number = 1
+    warmup_time = 0
+
+    def setup(self, level):
+        """Build an interface to click on."""
+        self.ui = PySweeperUI(*level)
+        self.widget = self.ui.widgets[0, 0]
+
+    def time_left_click(self, level):
+        """Time the first click of a game."""
+        self.ui.on_left_click(self.widget)
@@ -1,11 +1,20 @@
 """Game entry point."""
 
+import asyncio
+import functools
+import random
+
+from typing import Callable, Optional
+
 import click
 
+from . import instrument, profiling, server, snapshot
+from .graph import TOPOLOGIES
+from .pysweeper import Board, FirstClick
 from .ui import PySweeperUI
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     "-r",
     "--rows",
@@ -30,11 +39,231 @@ from .ui import PySweeperUI
     help="The number of mines in the grid.",
     show_default=True,
 )
-def main(rows: int, columns: int, mines: int) -> None:
+@click.option(
+    "-f",
+    "--first-click",
+    type=click.Choice([policy.value for policy in FirstClick]),
+    default=FirstClick.UNSAFE.value,
+    help="Whether the first click is guaranteed not to hit a mine.",
+    show_default=True,
+)
+@click.option(
+    "-t",
+    "--topology",
+    type=click.Choice([name for name in TOPOLOGIES if name != "cubic"]),
+    default="rectangular",
+    help="How tiles are connected to each other.",
+    show_default=True,
+)
+@click.option(
+    "--resume",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Resume the game saved in this file.",
+)
+@click.option(
+    "--save",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Save the game here when s is pressed, defaults to --resume.",
+)
+@click.option(
+    "--stats",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Time the core operations and write the measurements here on exit.",
+)
+@click.pass_context
+def main(
+    ctx: click.Context,
+    rows: int,
+    columns: int,
+    mines: int,
+    first_click: str,
+    topology: str,
+    resume: Optional[str],
+    save: Optional[str],
+    stats: Optional[str],
+) -> None:
     """Your favorite sweeping game, terminal style."""
-    ui = PySweeperUI(rows, columns, mines)
+    if ctx.invoked_subcommand is not None:
+        return
+    if stats is not None:
+        instrument.dump_at_exit(stats)
+    ui = PySweeperUI(
+        rows,
+        columns,
+        mines,
+        FirstClick(first_click),
+        topology=topology,
+        board=snapshot.load(resume) if resume is not None else None,
+        save_path=save if save is not None else resume,
+    )
     ui.main()
 
 
+@main.command()
+@click.option(
+    "-r",
+    "--rows",
+    type=int,
+    default=100,
+    help="The number of rows in the grid.",
+    show_default=True,
+)
+@click.option(
+    "-c",
+    "--columns",
+    type=int,
+    default=100,
+    help="The number of columns in the grid.",
+    show_default=True,
+)
+@click.option(
+    "-m",
+    "--mines",
+    type=int,
+    default=1500,
+    help="The number of mines in the grid.",
+    show_default=True,
+)
+@click.option(
+    "-f",
+    "--first-click",
+    type=click.Choice([policy.value for policy in FirstClick]),
+    default=FirstClick.UNSAFE.value,
+    help="Whether the first click is guaranteed not to hit a mine.",
+    show_default=True,
+)
+@click.option(
+    "-t",
+    "--topology",
+    type=click.Choice([name for name in TOPOLOGIES if name != "cubic"]),
+    default="rectangular",
+    help="How tiles are connected to each other.",
+    show_default=True,
+)
+@click.option(
+    "-s", "--seed", type=int, default=0, help="Seed of the game and clicks."
+)
+@click.option(
+    "--ui",
+    "interface",
+    is_flag=True,
+    help="Click through the UI instead of playing the board directly.",
+)
+@click.option(
+    "--replay",
+    "game_log",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Replay the games of this game log instead of playing one.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False),
+    default="pysweeper.pstats",
+    help="Where to write the profile.",
+    show_default=True,
+)
+@click.option(
+    "-n",
+    "--top",
+    type=int,
+    default=20,
+    help="How many functions to summarize.",
+    show_default=True,
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["tottime", "cumtime", "ncalls"]),
+    default="tottime",
+    help="What to sort the summary by.",
+    show_default=True,
+)
+def profile(
+    rows: int,
+    columns: int,
+    mines: int,
+    first_click: str,
+    topology: str,
+    seed: int,
+    interface: bool,
+    game_log: Optional[str],
+    output: str,
+    top: int,
+    sort: str,
+) -> None:
+    """Profile a headless game and summarize the hottest functions."""
+    rng = random.Random(seed)
+    session: Callable[[], object]
+    if game_log is not None:
+        session = functools.partial(profiling.replay, game_log)
+    else:
+        graph = TOPOLOGIES[topology](rows, columns)
+        board = Board(
+            graph.nrows,
+            graph.ncolumns,
+            mines,
+            seed=seed,
+            first_click=FirstClick(first_click),
+            graph=graph,
+        )
+        if interface:
+            session = functools.partial(
+                profiling.play_ui,
+                PySweeperUI(rows, columns, mines, board=board),
+                rng,
+            )
+        else:
+            session = functools.partial(profiling.play, board, rng)
+    stats = profiling.run(session, output)
+    click.echo(profiling.summary(stats, top=top, sort=sort), nl=False)
+    click.echo(f"Profile written to {output}")
+
+
+@main.command()
+@click.option(
+    "--host",
+    default="127.0.0.1",
+    help="The address to listen on.",
+    show_default=True,
+)
+@click.option(
+    "-p",
+    "--port",
+    type=int,
+    default=8765,
+    help="The TCP port to listen on.",
+    show_default=True,
+)
+@click.option(
+    "--unix",
+    "path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Listen on a Unix socket at this path instead of TCP.",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="Serve OpenMetrics at /metrics on this TCP port.",
+)
+def serve(
+    host: str, port: int, path: Optional[str], metrics_port: Optional[int]
+) -> None:
+    """Host games for clients speaking line-delimited JSON."""
+    try:
+        asyncio.run(
+            server.serve(
+                host=host, port=port, path=path, metrics_port=metrics_port
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
 if __name__ == "__main__":
     main()
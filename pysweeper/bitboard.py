@@ -0,0 +1,207 @@
+"""A minesweeper board stored as arbitrary precision integer bitmasks.
+
+Tile `i`, `j` is bit ``i * (ncolumns + 1) + j``. The extra column of every
+row is always zero, which lets a mask be shifted by one position in any of
+the eight directions and then masked with the valid tiles without bits
+wrapping into a neighbouring row.
+
+"""
+
+import random
+
+from typing import Iterable, Iterator, MutableSet, Optional
+
+from .bits import bits_to_int, int_to_bits, nonzero, popcount
+from .pysweeper import Board, Coordinate
+
+
+class BitBoard:
+    """A minesweeper board whose state lives in Python integers."""
+
+    def __init__(
+        self,
+        nrows: int,
+        ncolumns: int,
+        nmines: int,
+        seed: Optional[int] = None,
+    ) -> None:
+        if seed is None:
+            seed = random.randrange(2 ** 64)
+        rng = random.Random(seed)
+        mines = rng.sample(
+            [(i, j) for i in range(nrows) for j in range(ncolumns)], k=nmines
+        )
+        self._setup(nrows, ncolumns, mines, seed)
+
+    @classmethod
+    def from_mines(
+        cls,
+        nrows: int,
+        ncolumns: int,
+        mines: Iterable[Coordinate],
+        seed: Optional[int] = None,
+    ) -> "BitBoard":
+        """Construct a board with mines at the coordinates in `mines`."""
+        board = cls.__new__(cls)
+        board._setup(nrows, ncolumns, mines, seed)
+        return board
+
+    @classmethod
+    def from_board(cls, board: Board) -> "BitBoard":
+        """Construct a board with the same mine layout as `board`."""
+        if board.graph.topology != "rectangular":
+            raise ValueError(
+                f"Cannot build a bitboard from a {board.graph!r} board"
+            )
+        return cls.from_mines(
+            board.nrows,
+            board.ncolumns,
+            map(board.graph.coordinate, nonzero(board.mines)),
+            seed=board.seed,
+        )
+
+    def _setup(
+        self,
+        nrows: int,
+        ncolumns: int,
+        mines: Iterable[Coordinate],
+        seed: Optional[int],
+    ) -> None:
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        self.seed = seed
+        self.width = width = ncolumns + 1
+        self.nbits = nbits = nrows * width
+
+        flags = bytearray(nbits)
+        counts = bytearray(nbits)
+        for i, j in mines:
+            flags[i * width + j] = 1
+            for x in range(max(i - 1, 0), min(i + 2, nrows)):
+                for y in range(max(j - 1, 0), min(j + 2, ncolumns)):
+                    if x != i or y != j:
+                        counts[x * width + y] += 1
+
+        self.valid = int(("0" + "1" * ncolumns) * nrows or "0", 2)
+        self.mines = bits_to_int(flags)
+        self.counts = counts
+        self.zeros = self.valid & ~self.mines & ~self.dilate(self.mines)
+        self.exposed = 0
+        self.flagged = 0
+        self.nmines = popcount(self.mines)
+        self.nflagged = 0
+
+    def bit(self, i: int, j: int) -> int:
+        """Return the mask with only the tile at `i`, `j` set."""
+        return 1 << (i * self.width + j)
+
+    def dilate(self, mask: int) -> int:
+        """Return the tiles adjacent to any tile in `mask`."""
+        width = self.width
+        up = width + 1
+        down = width - 1
+        return self.valid & (
+            mask << 1
+            | mask >> 1
+            | mask << width
+            | mask >> width
+            | mask << up
+            | mask >> up
+            | mask << down
+            | mask >> down
+        )
+
+    def coordinates(self, mask: int) -> Iterator[Coordinate]:
+        """Generate the coordinates of the tiles set in `mask`."""
+        width = self.width
+        flags = int_to_bits(mask, self.nbits)
+        find = flags.find
+        index = find(1)
+        while index != -1:
+            yield divmod(index, width)
+            index = find(1, index + 1)
+
+    @property
+    def ntiles(self) -> int:
+        """Return the total number of tiles on the board."""
+        return self.nrows * self.ncolumns
+
+    @property
+    def available_flags(self) -> int:
+        """Return the number of available_flags."""
+        return self.nmines - self.nflagged
+
+    @property
+    def total_exposed(self) -> int:
+        """Return the total number of tiles exposed."""
+        return popcount(self.exposed)
+
+    @property
+    def win(self) -> bool:
+        """Return whether every tile is exposed or a correctly flagged mine."""
+        return self.exposed | (self.flagged & self.mines) == self.valid
+
+    def adjacent_mine_count(self, i: int, j: int) -> int:
+        """Return the number of mines adjacent to the tile at `i`, `j`."""
+        return self.counts[i * self.width + j]
+
+    def open(self, starts: int) -> int:  # noqa: D213
+        """Expose the tiles in `starts` and the openings they lead to.
+
+        Zero tiles reachable from `starts` are found by repeatedly dilating
+        the frontier and keeping only zero tiles until nothing new is added.
+        The numbered border of that region is then one more dilation. Flagged
+        tiles are not exposed unless they are mines in `starts`.
+
+        Return the mask of tiles that were exposed.
+
+        """
+        zeros = self.zeros
+        dilate = self.dilate
+        region = frontier = starts & zeros
+        while frontier:
+            frontier = dilate(frontier) & zeros & ~region
+            region |= frontier
+        mines = self.mines
+        border = dilate(region) & ~mines
+        opened = (starts | region | border) & ~self.flagged | starts & mines
+        self.exposed |= opened
+        return opened
+
+    def expose_bits(self, i: int, j: int) -> int:
+        """Expose the tile at `i`, `j` and return the exposed tiles mask."""
+        return self.open(self.bit(i, j))
+
+    def expose(self, i: int, j: int) -> MutableSet[Coordinate]:
+        """Expose the tile at `i`, `j` and return the exposed coordinates."""
+        return set(self.coordinates(self.expose_bits(i, j)))
+
+    def chord(self, i: int, j: int) -> MutableSet[Coordinate]:
+        """Expose the unflagged neighbours of the numbered tile at `i`, `j`."""
+        bit = self.bit(i, j)
+        if not self.exposed & bit or self.mines & bit:
+            return set()
+        neighbours = self.dilate(bit)
+        nflags = popcount(self.flagged & neighbours)
+        if nflags != self.adjacent_mine_count(i, j):
+            return set()
+        covered = neighbours & ~self.exposed & ~self.flagged
+        return set(self.coordinates(self.open(covered)))
+
+    def expose_all(self) -> None:
+        """Expose every tile that is not flagged."""
+        self.exposed = self.valid & ~self.flagged
+
+    def flag(self, i: int, j: int) -> bool:
+        """Flag the tile at coordinate `i`, `j`."""
+        bit = self.bit(i, j)
+        was_flagged = bool(self.flagged & bit)
+        if was_flagged:
+            if self.nflagged - 1 >= 0:
+                self.flagged &= ~bit
+                self.nflagged -= 1
+        else:
+            if self.nflagged + 1 <= self.nmines and not self.exposed & bit:
+                self.flagged |= bit
+                self.nflagged += 1
+        return not was_flagged
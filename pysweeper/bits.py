@@ -0,0 +1,82 @@
+"""Bit packing helpers for board state."""
+
+from typing import Callable, Iterator, Optional, Union
+
+#: Anything holding a byte per tile.
+Bytes = Union[bytes, bytearray, memoryview]
+
+
+_TO_ASCII = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_ASCII = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def packed_size(nbits: int) -> int:
+    """Return the number of bytes needed to pack `nbits` bits."""
+    return (nbits + 7) // 8
+
+
+def pack_bits(flags: Bytes) -> bytes:  # noqa: D213
+    """Pack a sequence of zero or one valued bytes into a bit string.
+
+    Bits are stored most significant first and the final byte is padded with
+    zeros. The conversion goes through the binary string representation of
+    a Python integer, which keeps the per-bit work in C.
+
+    """
+    nbits = len(flags)
+    if not nbits:
+        return b""
+    nbytes = packed_size(nbits)
+    value = int(bytes(flags).translate(_TO_ASCII), 2)
+    return (value << (nbytes * 8 - nbits)).to_bytes(nbytes, "big")
+
+
+def unpack_bits(data: Bytes, nbits: int) -> bytearray:
+    """Unpack the first `nbits` bits of `data` into zero or one bytes."""
+    if not nbits:
+        return bytearray()
+    nbytes = packed_size(nbits)
+    value = int.from_bytes(data[:nbytes], "big") >> (nbytes * 8 - nbits)
+    return bytearray(
+        format(value, f"0{nbits:d}b").encode().translate(_FROM_ASCII)
+    )
+
+
+def nonzero(flags: Bytes) -> Iterator[int]:
+    """Generate the positions of the nonzero bytes in `flags`."""
+    if isinstance(flags, memoryview):
+        # memoryviews have no find
+        flags = bytes(flags)
+    find = flags.find
+    index = find(1)
+    while index != -1:
+        yield index
+        index = find(1, index + 1)
+
+
+def bits_to_int(flags: Bytes) -> int:
+    """Convert zero or one valued bytes into an integer, first byte lowest."""
+    if not flags:
+        return 0
+    return int(bytes(flags)[::-1].translate(_TO_ASCII), 2)
+
+
+def int_to_bits(value: int, nbits: int) -> bytearray:
+    """Convert the lowest `nbits` bits of `value` into zero or one bytes."""
+    if not nbits:
+        return bytearray()
+    value &= (1 << nbits) - 1
+    return bytearray(
+        format(value, f"0{nbits:d}b")[::-1].encode().translate(_FROM_ASCII)
+    )
+
+
+# int.bit_count is new in Python 3.10
+_bit_count: Optional[Callable[[int], int]] = getattr(int, "bit_count", None)
+
+
+def popcount(value: int) -> int:
+    """Return the number of set bits in `value`."""
+    if _bit_count is not None:
+        return _bit_count(value)
+    return bin(value).count("1")
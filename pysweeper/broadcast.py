@@ -0,0 +1,193 @@
+"""Fanning out the frames of a game to any number of spectators.
+
+Publishing a move never waits for spectators, nor does it do more work the
+more of them there are: the delta describing the move is encoded once and
+appended to a short log shared by every subscriber, and a single wake up is
+sent to all of them. Each subscriber is drained by its own task at whatever
+pace its connection allows, and its queue is the part of the log it has not
+sent yet. A subscriber that falls behind sends everything it missed merged
+into one delta, and one that falls further behind than the log reaches, or
+whose missed changes touch more than a quarter of the board, sends a single
+keyframe instead.
+
+"""
+
+import asyncio
+import collections
+import itertools
+
+from typing import (
+    AsyncIterator,
+    Deque,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from . import delta
+from .pysweeper import Board
+
+
+class Update(NamedTuple):
+    """The vertices changed by a move and their delta."""
+
+    vertices: Sequence[int]
+
+    #: ``None`` for moves changing too much of the board for a delta.
+    body: Optional[bytes]
+
+
+class Subscriber:  # noqa: D213
+    """A spectator of a broadcast board.
+
+    The first frame is always a keyframe, the following ones are numbered
+    consecutively so a :class:`~pysweeper.delta.Decoder` can apply them.
+
+    """
+
+    def __init__(self, broadcast: "Broadcast") -> None:
+        self.broadcast = broadcast
+        self.version = -1
+        self.sequence = -1
+        self.closed = False
+        self.nframes = 0
+        self.ncoalesced = 0
+        self.nkeyframes = 0
+
+    def pop(self) -> Optional[bytes]:
+        """Return a frame of everything not sent yet, if anything."""
+        broadcast = self.broadcast
+        log = broadcast.log
+        behind = broadcast.version - self.version
+        if self.sequence >= 0 and not behind:
+            return None
+
+        body = None
+        if self.sequence >= 0 and behind <= len(log):
+            body = broadcast.merged_body(self.version)
+            if behind > 1 and body is not None:
+                self.ncoalesced += behind - 1
+        if body is None:
+            kind = delta.KEYFRAME
+            body = broadcast.keyframe_body()
+            self.nkeyframes += 1
+        else:
+            kind = delta.DELTA
+        self.version = broadcast.version
+        self.sequence += 1
+        self.nframes += 1
+        return bytes(delta.frame_header(kind, self.sequence) + body)
+
+    async def frames(self) -> AsyncIterator[bytes]:
+        """Generate frames as moves are published, until closed."""
+        broadcast = self.broadcast
+        while not self.closed:
+            frame = self.pop()
+            if frame is None:
+                await broadcast.changed()
+            else:
+                yield frame
+
+
+class Broadcast:  # noqa: D213
+    """The spectators of a board.
+
+    The last `max_pending` moves are kept for subscribers that fall behind,
+    those missing more get a keyframe.
+
+    """
+
+    def __init__(self, board: Board, max_pending: int = 256) -> None:
+        self.board = board
+        self.ntiles = board.ntiles
+        self.subscribers: Set[Subscriber] = set()
+        self.log: Deque[Update] = collections.deque(maxlen=max_pending)
+        self.version = 0
+        self._waiter: Optional["asyncio.Future[None]"] = None
+        self._keyframe_version = -1
+        self._keyframe_body = b""
+        self._merged: Tuple[int, int, Optional[bytes]] = (-1, -1, None)
+
+    def subscribe(self) -> Subscriber:
+        """Add a spectator."""
+        subscriber = Subscriber(self)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a spectator and end its frames."""
+        self.subscribers.discard(subscriber)
+        subscriber.closed = True
+        self._wake()
+
+    def close(self) -> None:
+        """Remove every spectator."""
+        for subscriber in self.subscribers:
+            subscriber.closed = True
+        self.subscribers.clear()
+        self._wake()
+
+    def _wake(self) -> None:
+        waiter = self._waiter
+        if waiter is not None:
+            self._waiter = None
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def changed(self) -> None:
+        """Wait for the next move, or for a subscriber to leave."""
+        if self._waiter is None:
+            self._waiter = asyncio.get_event_loop().create_future()
+        # a cancelled subscriber must not cancel the wait of the others
+        await asyncio.shield(self._waiter)
+
+    def keyframe_body(self) -> bytes:
+        """Return the body of a keyframe of the board as it is now."""
+        if self._keyframe_version != self.version:
+            board = self.board
+            self._keyframe_body = delta.keyframe_body(
+                board.nrows, board.ncolumns, bytes(board.visible)
+            )
+            self._keyframe_version = self.version
+        return self._keyframe_body
+
+    def merged_body(self, since: int) -> Optional[bytes]:  # noqa: D213
+        """Return a delta body of the moves published after `since`.
+
+        ``None`` is returned if those moves change too much of the board to
+        be worth a delta. Subscribers that fell behind together share the
+        merged body.
+
+        """
+        behind = self.version - since
+        log = self.log
+        if behind == 1:
+            return log[-1].body
+        start, stop, body = self._merged
+        if (start, stop) != (since, self.version):
+            updates = list(itertools.islice(log, len(log) - behind, None))
+            body = None
+            if all(update.body is not None for update in updates):
+                vertices = [v for update in updates for v in update.vertices]
+                if 4 * len(vertices) <= self.ntiles:
+                    body = delta.delta_body(vertices, self.board.visible)
+            self._merged = since, self.version, body
+        return body
+
+    def publish(self, vertices: Sequence[int]) -> None:
+        """Make the tiles changed by a move available to every spectator."""
+        if not vertices:
+            return
+        self.version += 1
+        if not self.subscribers:
+            # the log must cover consecutive versions
+            self.log.clear()
+            return
+        body = None
+        # large changes compress better as a keyframe
+        if 4 * len(vertices) <= self.ntiles:
+            body = delta.delta_body(vertices, self.board.visible)
+        self.log.append(Update(vertices, body))
+        self._wake()
@@ -0,0 +1,235 @@
+"""A compact binary stream of board updates for remote viewers.
+
+A stream is a sequence of frames. A keyframe holds everything a viewer sees
+of a board, its visible tiles compressed with zlib, while a delta holds only
+the tiles that changed since the previous frame, so most frames are as
+small as the move they describe.
+
+Every frame starts with its kind and sequence number. The tiles of a delta
+are sorted by vertex and grouped into runs of consecutive vertices, each
+encoded as the gap since the end of the previous run, its length and the
+visible codes of its tiles, with the integers encoded as varints. A flood
+exposing a region of the board costs a few bytes per row of the region plus
+a byte per tile.
+
+A viewer that misses a delta cannot apply the following ones and has to wait
+for the next keyframe, which :class:`Encoder` sends every
+`keyframe_interval` frames.
+
+"""
+
+import zlib
+
+from typing import Collection, Iterable, List, Optional, Tuple
+
+from .pysweeper import Board, Changes, StateArray
+
+KEYFRAME = 0
+DELTA = 1
+
+
+def write_varint(out: bytearray, n: int) -> None:
+    """Append the unsigned integer `n` to `out`, 7 bits per byte."""
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Return the varint at `offset` in `data` and the offset following it."""
+    n = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[offset]
+        except IndexError:
+            raise ValueError("Truncated frame")
+        offset += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, offset
+        shift += 7
+
+
+def frame_header(kind: int, sequence: int) -> bytearray:
+    """Return the start of a frame of `kind` numbered `sequence`."""
+    out = bytearray([kind])
+    write_varint(out, sequence)
+    return out
+
+
+def keyframe_body(nrows: int, ncolumns: int, visible: bytes) -> bytes:
+    """Encode the visible tiles of a board for a keyframe."""
+    out = bytearray()
+    write_varint(out, nrows)
+    write_varint(out, ncolumns)
+    out += zlib.compress(visible)
+    return bytes(out)
+
+
+def delta_body(vertices: Iterable[int], visible: StateArray) -> bytes:
+    """Encode the visible codes of `vertices` for a delta."""
+    out = bytearray()
+    ordered = sorted(set(vertices))
+    end = 0
+    i = 0
+    n = len(ordered)
+    while i < n:
+        start = ordered[i]
+        stop = start + 1
+        i += 1
+        while i < n and ordered[i] == stop:
+            stop += 1
+            i += 1
+        write_varint(out, start - end)
+        write_varint(out, stop - start)
+        out += visible[start:stop]
+        end = stop
+    return bytes(out)
+
+
+def encode_keyframe(
+    sequence: int, nrows: int, ncolumns: int, visible: bytes
+) -> bytes:
+    """Encode the visible tiles of a board."""
+    return bytes(
+        frame_header(KEYFRAME, sequence)
+        + keyframe_body(nrows, ncolumns, visible)
+    )
+
+
+def encode_delta(
+    sequence: int, vertices: Iterable[int], visible: StateArray
+) -> bytes:
+    """Encode the visible codes of `vertices`."""
+    return bytes(
+        frame_header(DELTA, sequence) + delta_body(vertices, visible)
+    )
+
+
+class Encoder:  # noqa: D213
+    """Turns the moves made on `board` into frames.
+
+    Call :meth:`delta` with the vertices changed by each move, or
+    :meth:`changes` with the result of
+    :meth:`~pysweeper.pysweeper.Board.apply_moves`. Every
+    `keyframe_interval`-th frame is a keyframe, so viewers joining late or
+    falling behind catch up after at most that many frames.
+
+    """
+
+    def __init__(self, board: Board, keyframe_interval: int = 64) -> None:
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be positive")
+        self.board = board
+        self.keyframe_interval = keyframe_interval
+        self.sequence = -1
+        self.since_keyframe = 0
+
+    def keyframe(self) -> bytes:
+        """Return a keyframe of the current state of the board."""
+        board = self.board
+        self.sequence += 1
+        self.since_keyframe = 0
+        return encode_keyframe(
+            self.sequence, board.nrows, board.ncolumns, bytes(board.visible)
+        )
+
+    def delta(self, vertices: Collection[int]) -> bytes:  # noqa: D213
+        """Return the frame following a move that changed `vertices`.
+
+        Moves changing more than a quarter of the board are sent as
+        keyframes, which compress better than a delta of that size.
+
+        """
+        self.since_keyframe += 1
+        if (
+            self.sequence < 0
+            or self.since_keyframe >= self.keyframe_interval
+            or 4 * len(vertices) > self.board.ntiles
+        ):
+            return self.keyframe()
+        self.sequence += 1
+        return encode_delta(self.sequence, vertices, self.board.visible)
+
+    def changes(self, changes: Changes) -> bytes:
+        """Return the frame following moves that made `changes`."""
+        return self.delta([*changes.exposed, *changes.flagged])
+
+
+class Decoder:  # noqa: D213
+    """Rebuilds what a viewer sees of a board from a stream of frames.
+
+    Nothing is known about the board until the first keyframe arrives.
+
+    """
+
+    def __init__(self) -> None:
+        self.sequence = -1
+        self.nrows = 0
+        self.ncolumns = 0
+        self.visible = bytearray()
+
+    @property
+    def synced(self) -> bool:
+        """Return whether a keyframe was applied."""
+        return self.sequence >= 0
+
+    @property
+    def observation(self) -> memoryview:
+        """Return an `nrows` by `ncolumns` view of the visible tiles."""
+        return memoryview(self.visible).cast("B", (self.nrows, self.ncolumns))
+
+    def apply(self, frame: bytes) -> Optional[List[int]]:  # noqa: D213
+        """Apply `frame` and return the vertices it changed.
+
+        ``None`` is returned for keyframes, which may change every tile.
+        Deltas that do not directly follow the last applied frame, or that
+        are corrupt, raise :class:`ValueError` and the stream can only be
+        resumed with a keyframe.
+
+        """
+        if not frame:
+            raise ValueError("Empty frame")
+        kind = frame[0]
+        sequence, offset = read_varint(frame, 1)
+        if kind == KEYFRAME:
+            nrows, offset = read_varint(frame, offset)
+            ncolumns, offset = read_varint(frame, offset)
+            try:
+                tiles = zlib.decompress(frame[offset:])
+            except zlib.error:
+                raise ValueError("Corrupt keyframe")
+            if len(tiles) != nrows * ncolumns:
+                raise ValueError("Keyframe does not match its shape")
+            self.nrows = nrows
+            self.ncolumns = ncolumns
+            self.visible = bytearray(tiles)
+            self.sequence = sequence
+            return None
+        if kind != DELTA:
+            raise ValueError(f"Unknown frame kind {kind}")
+        if not self.synced or sequence != self.sequence + 1:
+            raise ValueError(
+                f"Frame {sequence} does not follow frame {self.sequence}"
+            )
+
+        visible = self.visible
+        ntiles = len(visible)
+        changed: List[int] = []
+        end = 0
+        size = len(frame)
+        while offset < size:
+            gap, offset = read_varint(frame, offset)
+            length, offset = read_varint(frame, offset)
+            start = end + gap
+            end = start + length
+            if end > ntiles or offset + length > size:
+                self.sequence = -1
+                raise ValueError("Corrupt frame")
+            visible[start:end] = frame[offset : offset + length]
+            changed.extend(range(start, end))
+            offset += length
+        self.sequence = sequence
+        return changed
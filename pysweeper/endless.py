@@ -0,0 +1,400 @@
+"""An endless board, generated lazily in square chunks.
+
+The board stretches in every direction. It is cut into `chunk_size` square
+chunks, and the mines of a chunk are drawn from a random number generator
+seeded with a hash of the board's seed and the chunk's position, so they are
+the same whenever the chunk is visited and never need to be stored. Mine
+counts along the edges of a chunk take the mines of its neighbouring chunks
+into account, and the tiles around the origin never hold a mine, so a game
+can always start there.
+
+What the player sees of a chunk is kept while it is in use. At most
+`max_chunks` chunks are held, and those evicted to make room are written to
+files under `path` if they were played on, and read back when they are next
+visited. The files are named after the board's seed and density as well as
+the chunk, so boards with different mines can share a directory. Memory
+depends on how many chunks are in use, not on how much of the board was
+explored.
+
+The chunks a flood passes through are pinned until it ends, so a flood
+spreading over more than `max_chunks` chunks briefly holds all of them,
+instead of writing chunks out and reading them back every time it crosses
+between them. `max_flood` bounds how many that can be.
+
+"""
+
+import collections
+import functools
+import hashlib
+import os
+import pathlib
+import random
+import tempfile
+import zlib
+
+from typing import (
+    Iterable,
+    List,
+    MutableSet,
+    Optional,
+    OrderedDict,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .graph import Coordinate, adjacent_counts, rectangular
+from .pysweeper import COVERED, FLAGGED, MINE
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+_NEIGHBOURS = [
+    (di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj
+]
+
+
+@functools.lru_cache(maxsize=64)
+def chunk_mines(
+    seed: int, nmines: int, size: int, ci: int, cj: int
+) -> bytes:  # noqa: D213
+    """Return the mine flags of chunk `ci`, `cj`, row major.
+
+    The origin tile and its neighbours are left without mines, which takes
+    a mine or two off the chunks holding them.
+
+    """
+    key = f"{seed}:{ci}:{cj}".encode()
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    rng = random.Random(int.from_bytes(digest, "little"))
+    flags = bytearray(size * size)
+    for v in rng.sample(range(size * size), nmines):
+        flags[v] = 1
+    for i, j in [(0, 0), *_NEIGHBOURS]:
+        if (i // size, j // size) == (ci, cj):
+            flags[i % size * size + j % size] = 0
+    return bytes(flags)
+
+
+def chunk_counts(
+    seed: int, nmines: int, size: int, ci: int, cj: int
+) -> bytes:  # noqa: D213
+    """Return the adjacent mine counts of chunk `ci`, `cj`, row major.
+
+    The chunk is surrounded with the edges of its neighbours and counted as
+    a board of its own.
+
+    """
+    padded = size + 2
+    flags = bytearray(padded * padded)
+    for di in (-1, 0, 1):
+        # source rows of the neighbour and the row they land on
+        if di < 0:
+            rows = [(size - 1, 0)]
+        elif di > 0:
+            rows = [(0, size + 1)]
+        else:
+            rows = [(r, r + 1) for r in range(size)]
+        for dj in (-1, 0, 1):
+            if dj < 0:
+                start, stop, target = size - 1, size, 0
+            elif dj > 0:
+                start, stop, target = 0, 1, size + 1
+            else:
+                start, stop, target = 0, size, 1
+            mines = chunk_mines(seed, nmines, size, ci + di, cj + dj)
+            for source, row in rows:
+                offset = row * padded + target
+                flags[offset : offset + stop - start] = mines[
+                    source * size + start : source * size + stop
+                ]
+    counts = adjacent_counts(rectangular(padded, padded), bytes(flags))
+    return b"".join(
+        counts[r * padded + 1 : r * padded + 1 + size]
+        for r in range(1, size + 1)
+    )
+
+
+class Chunk:
+    """The mines, counts and visible tiles of one chunk."""
+
+    __slots__ = "mines", "counts", "visible", "dirty"
+
+    def __init__(
+        self, mines: bytes, counts: bytes, visible: bytearray
+    ) -> None:
+        self.mines = mines
+        self.counts = counts
+        self.visible = visible
+        self.dirty = False
+
+
+class EndlessBoard:  # noqa: D213
+    """A minesweeper board without edges.
+
+    Tiles are addressed by any integer coordinates and hold the codes of
+    :attr:`~pysweeper.pysweeper.Board.visible`. About `density` of the
+    tiles are mines. There is nothing to win, a game goes on until a mine
+    is exposed.
+
+    Floods stop spreading after visiting `max_flood` tiles, which matters
+    on sparse boards where openings can grow without bound; chording an
+    exposed tile without adjacent mines carries on from there.
+
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        density: float = 0.15,
+        chunk_size: int = 32,
+        max_chunks: int = 64,
+        path: Optional[PathLike] = None,
+        max_flood: int = 1 << 16,
+    ) -> None:
+        if not 0 < density < 1:
+            raise ValueError("density must be between 0 and 1")
+        if chunk_size < 2:
+            raise ValueError("chunk_size must be at least 2")
+        if max_chunks < 9:
+            raise ValueError("max_chunks must be at least 9")
+        if seed is None:
+            seed = random.randrange(2 ** 64)
+        self.seed = seed
+        self.density = density
+        self.chunk_size = chunk_size
+        self.nmines_per_chunk = round(density * chunk_size * chunk_size)
+        self.max_chunks = max_chunks
+        self.max_flood = max_flood
+        self._directory: Optional[tempfile.TemporaryDirectory[str]] = None
+        if path is None:
+            self._directory = tempfile.TemporaryDirectory(prefix="pysweeper")
+            path = self._directory.name
+        self.path = pathlib.Path(path)
+        self.chunks: OrderedDict[Tuple[int, int], Chunk] = (
+            collections.OrderedDict()
+        )
+        self.nexposed = 0
+        self.nflagged = 0
+        self.lost = False
+        self.nloads = 0
+        self.nspills = 0
+        # chunks that must not be evicted, those of the flood under way
+        self._pinned: Set[Tuple[int, int]] = set()
+
+    def __enter__(self) -> "EndlessBoard":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _chunk_path(self, ci: int, cj: int) -> pathlib.Path:
+        # boards with other mines may share the directory
+        board = f"{self.seed}-{self.chunk_size}-{self.nmines_per_chunk}"
+        return self.path / f"{board}_{ci}_{cj}.chunk"
+
+    def chunk(self, ci: int, cj: int) -> Chunk:  # noqa: D213
+        """Return chunk `ci`, `cj`, loading it if needed.
+
+        The chunk stays valid until another chunk is loaded, unless it is
+        pinned.
+
+        """
+        key = ci, cj
+        chunks = self.chunks
+        chunk = chunks.get(key)
+        if chunk is not None:
+            chunks.move_to_end(key)
+            return chunk
+
+        args = self.seed, self.nmines_per_chunk, self.chunk_size, ci, cj
+        try:
+            visible = bytearray(
+                zlib.decompress(self._chunk_path(ci, cj).read_bytes())
+            )
+        except FileNotFoundError:
+            visible = bytearray([COVERED]) * (self.chunk_size ** 2)
+        else:
+            self.nloads += 1
+        chunk = chunks[key] = Chunk(
+            chunk_mines(*args), chunk_counts(*args), visible
+        )
+        self._evict()
+        return chunk
+
+    def _evict(self) -> None:
+        """Spill the least recently used chunks that are not pinned."""
+        chunks = self.chunks
+        excess = len(chunks) - self.max_chunks
+        if excess <= 0:
+            return
+        pinned = self._pinned
+        if not pinned:
+            for _ in range(excess):
+                self._spill(*chunks.popitem(last=False))
+            return
+        keys = [key for key in chunks if key not in pinned][:excess]
+        for key in keys:
+            self._spill(key, chunks.pop(key))
+
+    def _spill(self, key: Tuple[int, int], chunk: Chunk) -> None:
+        if chunk.dirty:
+            self._chunk_path(*key).write_bytes(zlib.compress(chunk.visible))
+            chunk.dirty = False
+            self.nspills += 1
+
+    def flush(self) -> None:
+        """Write every chunk played on since it was loaded to disk."""
+        for key, chunk in self.chunks.items():
+            self._spill(key, chunk)
+
+    def close(self) -> None:
+        """Write the chunks to disk, or remove them if `path` was not set."""
+        if self._directory is not None:
+            self.chunks.clear()
+            self._directory.cleanup()
+        else:
+            self.flush()
+
+    def locate(self, i: int, j: int) -> Tuple[Chunk, int]:
+        """Return the chunk holding tile `i`, `j` and its index there."""
+        size = self.chunk_size
+        ci, r = divmod(i, size)
+        cj, c = divmod(j, size)
+        return self.chunk(ci, cj), r * size + c
+
+    def tile(self, i: int, j: int) -> int:
+        """Return what the player sees of tile `i`, `j`."""
+        chunk, v = self.locate(i, j)
+        return chunk.visible[v]
+
+    def window(
+        self, top: int, left: int, nrows: int, ncolumns: int
+    ) -> bytearray:
+        """Return the visible codes of a rectangle of tiles, row major."""
+        size = self.chunk_size
+        out = bytearray(nrows * ncolumns)
+        for i in range(top, top + nrows):
+            ci, r = divmod(i, size)
+            j = left
+            stop = left + ncolumns
+            while j < stop:
+                cj, c = divmod(j, size)
+                n = min(size - c, stop - j)
+                visible = self.chunk(ci, cj).visible
+                offset = (i - top) * ncolumns + j - left
+                out[offset : offset + n] = visible[r * size + c :][:n]
+                j += n
+        return out
+
+    def expose(self, i: int, j: int) -> MutableSet[Coordinate]:
+        """Expose tile `i`, `j` and the opening it leads to, if any."""
+        chunk, v = self.locate(i, j)
+        if chunk.mines[v]:
+            if chunk.visible[v] != MINE:
+                chunk.visible[v] = MINE
+                chunk.dirty = True
+                self.nexposed += 1
+            self.lost = True
+            return {(i, j)}
+        return self.flood([(i, j)])
+
+    def flood(
+        self, coordinates: Iterable[Coordinate]
+    ) -> MutableSet[Coordinate]:  # noqa: D213
+        """Expose every tile reachable from `coordinates`.
+
+        As on :class:`~pysweeper.pysweeper.Board`, mines stop the traversal
+        and flagged tiles let it through but stay covered.
+
+        """
+        size = self.chunk_size
+        limit = self.max_flood
+        seen: Set[Coordinate] = set()
+        frontier: List[Coordinate] = []
+        for i, j in coordinates:
+            start, v = self.locate(i, j)
+            if (i, j) not in seen and not start.mines[v]:
+                seen.add((i, j))
+                frontier.append((i, j))
+
+        result: Set[Coordinate] = set()
+        key = None
+        chunk: Chunk
+        visible: bytearray
+        counts: bytes
+        nexposed = 0
+        pinned = self._pinned
+        try:
+            while frontier:
+                following = []
+                for i, j in frontier:
+                    ci, r = divmod(i, size)
+                    cj, c = divmod(j, size)
+                    # consecutive tiles mostly share a chunk
+                    if key != (ci, cj):
+                        key = ci, cj
+                        pinned.add(key)
+                        chunk = self.chunk(ci, cj)
+                        visible = chunk.visible
+                        counts = chunk.counts
+                    v = r * size + c
+                    code = visible[v]
+                    if code != FLAGGED:
+                        if code == COVERED:
+                            visible[v] = counts[v]
+                            chunk.dirty = True
+                            nexposed += 1
+                        result.add((i, j))
+
+                    # neighbours of a tile without adjacent mines are never
+                    # mines
+                    if not counts[v] and len(seen) < limit:
+                        for di, dj in _NEIGHBOURS:
+                            u = i + di, j + dj
+                            if u not in seen:
+                                seen.add(u)
+                                following.append(u)
+                frontier = following
+        finally:
+            pinned.clear()
+            self._evict()
+        self.nexposed += nexposed
+        return result
+
+    def flag(self, i: int, j: int) -> bool:
+        """Toggle the flag on the covered tile `i`, `j`."""
+        chunk, v = self.locate(i, j)
+        code = chunk.visible[v]
+        if code == COVERED:
+            chunk.visible[v] = FLAGGED
+            self.nflagged += 1
+        elif code == FLAGGED:
+            chunk.visible[v] = COVERED
+            self.nflagged -= 1
+        else:
+            return False
+        chunk.dirty = True
+        return code == COVERED
+
+    def chord(self, i: int, j: int) -> MutableSet[Coordinate]:  # noqa: D213
+        """Expose the unflagged neighbours of the numbered tile at `i`, `j`.
+
+        Nothing happens unless the tile is exposed and the number of flags
+        around it equals its number of adjacent mines. Mines left uncovered
+        by wrong flags are exposed and included in the result.
+
+        """
+        code = self.tile(i, j)
+        if code >= MINE:
+            return set()
+        neighbours = [(i + di, j + dj) for di, dj in _NEIGHBOURS]
+        codes = [self.tile(*u) for u in neighbours]
+        if codes.count(FLAGGED) != code:
+            return set()
+        covered = [u for u, c in zip(neighbours, codes) if c == COVERED]
+        result = self.flood(covered)
+        for u in covered:
+            chunk, v = self.locate(*u)
+            if chunk.mines[v]:
+                result |= self.expose(*u)
+        return result
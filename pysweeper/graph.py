@@ -0,0 +1,407 @@
+"""Tile adjacency graphs.
+
+Most graphs are stored in compressed sparse row form, while the classic
+grid computes the neighbours of a tile from its vertex.
+
+"""
+
+import array
+import functools
+
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from .bits import Bytes, nonzero
+
+Coordinate = Tuple[int, int]
+
+
+NeighbourFunction = Callable[[int, int], Iterable[Coordinate]]
+
+
+class Graph:  # noqa: D213
+    """The adjacency structure of the tiles on a board.
+
+    Tiles are laid out row major on an `nrows` by `ncolumns` grid, so tile
+    `i`, `j` is vertex ``i * ncolumns + j``. The neighbours of vertex `v`
+    are ``indices[offsets[v]:offsets[v + 1]]``, in increasing order, and
+    :meth:`neighbours` is how the board gets them, so subclasses can compute
+    them instead.
+
+    Graphs are immutable and shared between boards of the same shape.
+
+    """
+
+    def __init__(
+        self,
+        topology: str,
+        shape: Tuple[int, ...],
+        nrows: int,
+        ncolumns: int,
+        offsets: "array.array[int]",
+        indices: "array.array[int]",
+    ) -> None:
+        assert len(offsets) == nrows * ncolumns + 1
+        self.topology = topology
+        self.shape = shape
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        self.offsets = offsets
+        self.indices = indices
+
+    def __repr__(self) -> str:
+        shape = ", ".join(map(str, self.shape))
+        return f"{self.topology}({shape})"
+
+    @property
+    def ntiles(self) -> int:
+        """Return the number of vertices in the graph."""
+        return self.nrows * self.ncolumns
+
+    def index(self, i: int, j: int) -> int:
+        """Return the vertex of the tile at `i`, `j`."""
+        if not (0 <= i < self.nrows and 0 <= j < self.ncolumns):
+            raise IndexError(f"Tile {i, j} is not on the board")
+        return i * self.ncolumns + j
+
+    def coordinate(self, v: int) -> Coordinate:
+        """Return the coordinate of vertex `v`."""
+        return divmod(v, self.ncolumns)
+
+    def neighbours(self, v: int) -> Sequence[int]:
+        """Return the vertices adjacent to vertex `v`."""
+        offsets = self.offsets
+        return self.indices[offsets[v] : offsets[v + 1]]
+
+    def degree(self, v: int) -> int:
+        """Return the number of vertices adjacent to vertex `v`."""
+        offsets = self.offsets
+        return offsets[v + 1] - offsets[v]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory taken by the adjacency arrays."""
+        return memoryview(self.offsets).nbytes + memoryview(
+            self.indices
+        ).nbytes
+
+
+def from_neighbours(
+    topology: str,
+    shape: Tuple[int, ...],
+    nrows: int,
+    ncolumns: int,
+    neighbours: NeighbourFunction,
+) -> Graph:  # noqa: D213
+    """Build a graph from a function returning the neighbours of a tile.
+
+    Coordinates returned by `neighbours` that fall off the board or repeat
+    are dropped, as is the tile itself.
+
+    """
+    offsets = array.array("q", [0])
+    indices = array.array("i")
+    extend = indices.extend
+    append = offsets.append
+    for i in range(nrows):
+        base = i * ncolumns
+        for j in range(ncolumns):
+            extend(
+                sorted(
+                    {
+                        x * ncolumns + y
+                        for x, y in neighbours(i, j)
+                        if 0 <= x < nrows
+                        if 0 <= y < ncolumns
+                    }
+                    - {base + j}
+                )
+            )
+            append(len(indices))
+    return Graph(topology, shape, nrows, ncolumns, offsets, indices)
+
+
+class GridGraph(Graph):  # noqa: D213
+    """The classic grid where a tile touches its 8 surrounding tiles.
+
+    The neighbours of a tile are a few additions away from its vertex, so
+    they are computed when asked for and the graph takes no memory whatever
+    the size of the board; there are no `offsets` and `indices`.
+
+    """
+
+    def __init__(self, nrows: int, ncolumns: int) -> None:
+        self.topology = "rectangular"
+        self.shape = nrows, ncolumns
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        # tiles inside these bounds have all 8 neighbours
+        self._last_column = ncolumns - 1
+        self._last_row = (nrows - 1) * ncolumns
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory taken by the adjacency arrays."""
+        return 0
+
+    def neighbours(self, v: int) -> List[int]:
+        """Return the vertices adjacent to vertex `v`."""
+        ncolumns = self.ncolumns
+        j = v % ncolumns
+        if ncolumns <= v < self._last_row and 0 < j < self._last_column:
+            above = v - ncolumns
+            below = v + ncolumns
+            return [
+                above - 1,
+                above,
+                above + 1,
+                v - 1,
+                v + 1,
+                below - 1,
+                below,
+                below + 1,
+            ]
+        i = v // ncolumns
+        columns = range(max(j - 1, 0), min(j + 2, ncolumns))
+        return [
+            x * ncolumns + y
+            for x in range(max(i - 1, 0), min(i + 2, self.nrows))
+            for y in columns
+            if x != i or y != j
+        ]
+
+    def degree(self, v: int) -> int:
+        """Return the number of vertices adjacent to vertex `v`."""
+        ncolumns = self.ncolumns
+        i, j = divmod(v, ncolumns)
+        rows = min(i + 2, self.nrows) - max(i - 1, 0)
+        columns = min(j + 2, ncolumns) - max(j - 1, 0)
+        return rows * columns - 1
+
+
+@functools.lru_cache(maxsize=16)
+def rectangular(nrows: int, ncolumns: int) -> Graph:
+    """Build the classic grid where a tile touches its 8 surrounding tiles."""
+    return GridGraph(nrows, ncolumns)
+
+
+@functools.lru_cache(maxsize=16)
+def toroidal(nrows: int, ncolumns: int) -> Graph:
+    """Build a grid whose edges wrap around to the opposite side."""
+    return from_neighbours(
+        "toroidal",
+        (nrows, ncolumns),
+        nrows,
+        ncolumns,
+        lambda i, j: (
+            ((i + x) % nrows, (j + y) % ncolumns)
+            for x in (-1, 0, 1)
+            for y in (-1, 0, 1)
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def hexagonal(nrows: int, ncolumns: int) -> Graph:  # noqa: D213
+    """Build a grid of hexagons where a tile touches 6 others.
+
+    Odd rows are shifted half a tile to the right, so the diagonal
+    neighbours of a tile depend on the parity of its row.
+
+    """
+    even = (0, -1), (0, 1), (-1, -1), (-1, 0), (1, -1), (1, 0)
+    odd = (0, -1), (0, 1), (-1, 0), (-1, 1), (1, 0), (1, 1)
+    return from_neighbours(
+        "hexagonal",
+        (nrows, ncolumns),
+        nrows,
+        ncolumns,
+        lambda i, j: ((i + x, j + y) for x, y in (odd if i % 2 else even)),
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def cubic(nlayers: int, nrows: int, ncolumns: int) -> Graph:  # noqa: D213
+    """Build a 3D grid where a tile touches the 26 tiles surrounding it.
+
+    Layers are stacked vertically, so tile `i`, `j` of layer `k` sits at
+    row ``k * nrows + i`` of the board.
+
+    """
+
+    def neighbours(row: int, j: int) -> Iterable[Coordinate]:
+        k, i = divmod(row, nrows)
+        return (
+            (z * nrows + x, y)
+            for z in range(max(k - 1, 0), min(k + 2, nlayers))
+            for x in range(max(i - 1, 0), min(i + 2, nrows))
+            for y in range(j - 1, j + 2)
+        )
+
+    return from_neighbours(
+        "cubic",
+        (nlayers, nrows, ncolumns),
+        nlayers * nrows,
+        ncolumns,
+        neighbours,
+    )
+
+
+class TiledGraph(Graph):  # noqa: D213
+    """The classic grid, numbered tile by tile and never built.
+
+    Vertices are numbered through `tile` by `tile` squares of the board in
+    row major order, and row major within each square; the squares along
+    the bottom and right edges are cut short. Tiles close together on the
+    board get close vertices, so arrays indexed by vertex keep the
+    surroundings of a tile within a few pages. Neighbours are computed when
+    asked for, so the graph takes no memory whatever the size of the board,
+    and there are no `offsets` and `indices`.
+
+    """
+
+    def __init__(self, nrows: int, ncolumns: int, tile: int = 64) -> None:
+        if tile < 3:
+            raise ValueError("tile must be at least 3")
+        self.topology = "tiled"
+        self.shape = nrows, ncolumns, tile
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        self.tile = tile
+        self.band = tile * ncolumns
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory taken by the adjacency arrays."""
+        return 0
+
+    def _index(self, i: int, j: int) -> int:
+        tile = self.tile
+        ti, r = divmod(i, tile)
+        tj, c = divmod(j, tile)
+        top = ti * tile
+        left = tj * tile
+        height = min(tile, self.nrows - top)
+        width = min(tile, self.ncolumns - left)
+        return top * self.ncolumns + left * height + r * width + c
+
+    def index(self, i: int, j: int) -> int:
+        """Return the vertex of the tile at `i`, `j`."""
+        if not (0 <= i < self.nrows and 0 <= j < self.ncolumns):
+            raise IndexError(f"Tile {i, j} is not on the board")
+        return self._index(i, j)
+
+    def _locate(self, v: int) -> Tuple[int, int, int, int, int, int]:
+        """Return the corner, height, width and offsets of `v` in its tile."""
+        tile = self.tile
+        ti, rest = divmod(v, self.band)
+        top = ti * tile
+        height = min(tile, self.nrows - top)
+        tj, rest = divmod(rest, tile * height)
+        left = tj * tile
+        width = min(tile, self.ncolumns - left)
+        r, c = divmod(rest, width)
+        return top, left, height, width, r, c
+
+    def coordinate(self, v: int) -> Coordinate:
+        """Return the coordinate of vertex `v`."""
+        top, left, _, _, r, c = self._locate(v)
+        return top + r, left + c
+
+    def neighbours(self, v: int) -> List[int]:
+        """Return the vertices adjacent to vertex `v`."""
+        top, left, height, width, r, c = self._locate(v)
+        if 0 < r < height - 1 and 0 < c < width - 1:
+            above = v - width
+            below = v + width
+            return [
+                above - 1,
+                above,
+                above + 1,
+                v - 1,
+                v + 1,
+                below - 1,
+                below,
+                below + 1,
+            ]
+        i = top + r
+        j = left + c
+        index = self._index
+        return sorted(
+            index(x, y)
+            for x in range(max(i - 1, 0), min(i + 2, self.nrows))
+            for y in range(max(j - 1, 0), min(j + 2, self.ncolumns))
+            if x != i or y != j
+        )
+
+    def degree(self, v: int) -> int:
+        """Return the number of vertices adjacent to vertex `v`."""
+        return len(self.neighbours(v))
+
+    def runs(
+        self, i: int, left: int, right: int
+    ) -> List[Tuple[int, int]]:  # noqa: D213
+        """Return the vertex ranges holding row `i` from `left` to `right`.
+
+        Each range covers the part of the row inside one square, as a start
+        and stop vertex.
+
+        """
+        tile = self.tile
+        ranges = []
+        j = left
+        while j < right:
+            stop = min((j // tile + 1) * tile, right)
+            start = self._index(i, j)
+            ranges.append((start, start + stop - j))
+            j = stop
+        return ranges
+
+
+def adjacent_counts(graph: Graph, flags: Bytes) -> bytearray:  # noqa: D213
+    """Return how many neighbours of every vertex are set in `flags`.
+
+    On rectangular graphs every tile holds a byte of one big integer, and
+    the neighbourhood sums are a handful of shifts and additions of it; no
+    sum exceeds 9, so nothing carries into the next tile. Other graphs walk
+    the neighbours of every set vertex.
+
+    """
+    ntiles = graph.ntiles
+    if graph.topology != "rectangular":
+        counts = bytearray(ntiles)
+        neighbours = graph.neighbours
+        for v in nonzero(flags):
+            for u in neighbours(v):
+                counts[u] += 1
+        return counts
+
+    return grid_counts(graph.nrows, graph.ncolumns, flags)
+
+
+def grid_counts(nrows: int, ncolumns: int, flags: Bytes) -> bytearray:
+    """Return the neighbour counts of `flags` on a row major grid."""
+    ntiles = nrows * ncolumns
+    step = 8 * ncolumns
+    valid = (1 << 8 * ntiles) - 1
+    not_first_column = int.from_bytes(
+        (b"\x00" + b"\xff" * (ncolumns - 1)) * nrows, "little"
+    )
+    not_last_column = not_first_column >> 8
+    not_first_row = valid & ~((1 << step) - 1)
+    value = int.from_bytes(flags, "little")
+    row = (
+        value
+        + (value << 8 & not_first_column)
+        + (value >> 8 & not_last_column)
+    )
+    total = row + (row << step & not_first_row) + (row >> step) - value
+    return bytearray(total.to_bytes(ntiles, "little"))
+
+
+#: Graph builders by topology name, called with a graph's ``shape``.
+TOPOLOGIES: Dict[str, Callable[..., Graph]] = {
+    "rectangular": rectangular,
+    "toroidal": toroidal,
+    "hexagonal": hexagonal,
+    "cubic": cubic,
+}
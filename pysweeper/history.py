@@ -0,0 +1,150 @@
+"""Undo and redo of the moves made on a board."""
+
+import array
+import collections
+
+from typing import Deque, List, NamedTuple, Tuple
+
+from .pysweeper import Board
+from .shared import writing
+
+
+class Step(NamedTuple):
+    """The state changes made by one move."""
+
+    #: Vertices whose exposure was toggled, and ``~v`` for every vertex `v`
+    #: whose flag was toggled, in order.
+    toggles: "array.array[int]"
+
+    #: Mines moved by the first click policy, as source and target vertices.
+    mine_moves: Tuple[Tuple[int, int], ...]
+
+    #: Whether the move started the game.
+    started: bool
+
+    @property
+    def size(self) -> int:
+        """Return the number of vertices recorded by the step."""
+        return len(self.toggles) + 2 * len(self.mine_moves)
+
+
+class History:  # noqa: D213
+    """The undo and redo stacks of a board.
+
+    Every move made on `board` is stored as the list of tiles it changed,
+    so undoing or redoing a move costs time proportional to its size. The
+    oldest moves are forgotten once the stored moves record more than
+    `budget` vertices in total; making a move discards everything that
+    could have been redone.
+
+    """
+
+    def __init__(self, board: Board, budget: int = 1_000_000) -> None:
+        self.board = board
+        self.budget = budget
+        self.size = 0
+        self.undo_steps: Deque[Step] = collections.deque()
+        self.redo_steps: List[Step] = []
+        self.toggles: List[int] = []
+        self.mine_moves: List[Tuple[int, int]] = []
+        self.depth = 0
+        self.was_started = False
+        board.history = self
+
+    def detach(self) -> None:
+        """Stop recording the moves of the board."""
+        self.board.history = None
+
+    @property
+    def can_undo(self) -> bool:
+        """Return whether there is a move to undo."""
+        return bool(self.undo_steps)
+
+    @property
+    def can_redo(self) -> bool:
+        """Return whether there is an undone move to redo."""
+        return bool(self.redo_steps)
+
+    def begin(self) -> None:
+        """Start recording a move, unless one is already being recorded."""
+        if not self.depth:
+            self.toggles = []
+            self.mine_moves = []
+            self.was_started = self.board.started
+        self.depth += 1
+
+    def commit(self) -> None:
+        """Finish recording a move and push it onto the undo stack."""
+        self.depth -= 1
+        if self.depth:
+            return
+        started = not self.was_started and self.board.started
+        if not (self.toggles or self.mine_moves or started):
+            return
+        step = Step(
+            array.array("i", self.toggles), tuple(self.mine_moves), started
+        )
+        self.redo_steps.clear()
+        self.undo_steps.append(step)
+        self.size += step.size
+        while self.size > self.budget and self.undo_steps:
+            self.size -= self.undo_steps.popleft().size
+
+    def undo(self) -> List[int]:
+        """Undo the last move and return the vertices it changed."""
+        if not self.undo_steps:
+            return []
+        self._check()
+        step = self.undo_steps.pop()
+        self.size -= step.size
+        self.redo_steps.append(step)
+        return self._apply(step, forward=False)
+
+    def redo(self) -> List[int]:
+        """Redo the last undone move and return the vertices it changed."""
+        if not self.redo_steps:
+            return []
+        self._check()
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        self.size += step.size
+        return self._apply(step, forward=True)
+
+    def _check(self) -> None:
+        if self.board.log is not None:
+            raise ValueError("Cannot undo or redo moves of a logged board")
+
+    def _apply(self, step: Step, forward: bool) -> List[int]:
+        board = self.board
+        exposed = board.exposed
+        flagged = board.flagged
+        changed: List[int] = []
+        toggles = step.toggles if forward else reversed(step.toggles)
+        mine_moves = step.mine_moves
+        if not forward:
+            mine_moves = tuple((t, s) for s, t in reversed(mine_moves))
+
+        board.history = None
+        try:
+            with writing(board):
+                if forward:
+                    board.started = board.started or step.started
+                    for source, target in mine_moves:
+                        board.move_mine_vertex(source, target)
+                        changed += source, target
+                for entry in toggles:
+                    if entry >= 0:
+                        board.set_exposed(entry, not exposed[entry])
+                        changed.append(entry)
+                    else:
+                        v = ~entry
+                        board.set_flagged(v, not flagged[v])
+                        changed.append(v)
+                if not forward:
+                    for source, target in mine_moves:
+                        board.move_mine_vertex(source, target)
+                        changed += source, target
+                    board.started = board.started and not step.started
+        finally:
+            board.history = self
+        return changed
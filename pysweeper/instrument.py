@@ -0,0 +1,257 @@
+"""Opt-in call counts, latency histograms and cell counts for hot paths.
+
+Instrumentation works by replacing the instrumented methods on their
+classes with timing wrappers when :func:`enable` is called and putting the
+originals back on :func:`disable`, so while it is off the code runs exactly
+as if this module did not exist.
+
+Latencies are bucketed by the bit length of their duration in nanoseconds,
+so bucket `b` counts calls that took between ``2 ** (b - 1)`` and
+``2 ** b`` nanoseconds.
+
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import time
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+#: Returns the number of cells touched by a call, given the instance the
+#: method was called on and its result.
+CellCounter = Callable[[Any, Any], int]
+
+#: Returns counters of the instance a method is called on.
+Counters = Callable[[Any], Tuple[int, ...]]
+
+NBUCKETS = 64
+
+
+class CallStats:
+    """Aggregated measurements of the calls to one method."""
+
+    __slots__ = "calls", "total_ns", "cells", "histogram"
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_ns = 0
+        self.cells = 0
+        self.histogram = [0] * NBUCKETS
+
+    def record(self, elapsed_ns: int, cells: int) -> None:
+        """Add a call that took `elapsed_ns` and touched `cells` cells."""
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.cells += cells
+        self.histogram[min(elapsed_ns.bit_length(), NBUCKETS - 1)] += 1
+
+    @property
+    def mean_ns(self) -> float:
+        """Return the mean latency of a call in nanoseconds."""
+        return self.total_ns / self.calls if self.calls else 0.0
+
+    def quantile_ns(self, q: float) -> int:
+        """Return an upper bound of the `q` quantile of the latencies."""
+        rank = q * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                return 1 << bucket
+        return 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the measurements as plain data."""
+        return {
+            "calls": self.calls,
+            "total_ns": self.total_ns,
+            "cells": self.cells,
+            "histogram": {
+                str(1 << bucket): count
+                for bucket, count in enumerate(self.histogram)
+                if count
+            },
+        }
+
+
+class Changed:  # noqa: D213
+    """Counts the cells touched by a call from `counters` of the instance.
+
+    The counters are read before and after the call, outside the time
+    measured, and the cells touched are how much they changed in total.
+    This suits methods whose result says nothing of what they did.
+
+    """
+
+    def __init__(self, counters: Counters) -> None:
+        self.counters = counters
+
+
+def _one(instance: Any, result: Any) -> int:
+    return 1
+
+
+def _none(instance: Any, result: Any) -> int:
+    return 0
+
+
+def _length(instance: Any, result: Any) -> int:
+    return len(result)
+
+
+def _board_counters(ui: Any) -> Tuple[int, int]:
+    board = ui.board
+    return board.nexposed, board.nflagged
+
+
+def _targets() -> List[Tuple[type, str, Union[CellCounter, Changed]]]:
+    """Return the instrumented classes, method names and cell counters."""
+    from .pysweeper import Board
+    from .ui import PySweeperUI, TileWidget
+
+    return [
+        (Board, "__init__", lambda board, result: board.ntiles),
+        (Board, "expose", _length),
+        (Board, "chord", _length),
+        (Board, "flag", _one),
+        (
+            Board,
+            "apply_moves",
+            lambda board, changes: len(changes.exposed) + len(changes.flagged),
+        ),
+        (Board, "win", _none),
+        (TileWidget, "redraw", _one),
+        (PySweeperUI, "on_left_click", Changed(_board_counters)),
+        (PySweeperUI, "on_middle_click", Changed(_board_counters)),
+        (PySweeperUI, "on_right_click", Changed(_board_counters)),
+    ]
+
+
+#: Measurements by qualified method name, filled while enabled.
+STATS: Dict[str, CallStats] = {}
+
+_originals: Dict[Tuple[type, str], Any] = {}
+
+
+def _wrap(
+    function: Callable[..., Any],
+    stats: CallStats,
+    cells: Union[CellCounter, Changed],
+) -> Callable[..., Any]:
+    perf_counter_ns = time.perf_counter_ns
+
+    if isinstance(cells, Changed):
+        counters = cells.counters
+
+        @functools.wraps(function)
+        def changed(self: Any, *args: Any, **kwargs: Any) -> Any:
+            before = counters(self)
+            start = perf_counter_ns()
+            result = function(self, *args, **kwargs)
+            elapsed = perf_counter_ns() - start
+            touched = sum(
+                abs(after - count)
+                for after, count in zip(counters(self), before)
+            )
+            stats.record(elapsed, touched)
+            return result
+
+        return changed
+
+    counter = cells
+
+    @functools.wraps(function)
+    def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+        start = perf_counter_ns()
+        result = function(self, *args, **kwargs)
+        stats.record(perf_counter_ns() - start, counter(self, result))
+        return result
+
+    return wrapper
+
+
+def enabled() -> bool:
+    """Return whether instrumentation is on."""
+    return bool(_originals)
+
+
+def enable() -> None:
+    """Start measuring the instrumented methods."""
+    if _originals:
+        return
+    for owner, name, cells in _targets():
+        original = owner.__dict__[name]
+        stats = STATS.setdefault(f"{owner.__name__}.{name}", CallStats())
+        if isinstance(original, property):
+            assert original.fget is not None
+            replacement: Any = property(
+                _wrap(original.fget, stats, cells),
+                original.fset,
+                original.fdel,
+                original.__doc__,
+            )
+        else:
+            replacement = _wrap(original, stats, cells)
+        _originals[owner, name] = original
+        setattr(owner, name, replacement)
+
+
+def disable() -> None:
+    """Stop measuring and restore the original methods."""
+    for (owner, name), original in _originals.items():
+        setattr(owner, name, original)
+    _originals.clear()
+
+
+def reset() -> None:
+    """Forget every measurement."""
+    for name in STATS:
+        STATS[name] = CallStats()
+    if _originals:
+        disable()
+        enable()
+
+
+def stats() -> Dict[str, CallStats]:
+    """Return the measurements of every method called at least once."""
+    return {name: stats for name, stats in STATS.items() if stats.calls}
+
+
+def report() -> str:
+    """Format the measurements as a table."""
+    lines = [
+        f"{'method':<28} {'calls':>9} {'mean us':>10} {'p99 us':>10} "
+        f"{'cells/call':>10}"
+    ]
+    for name, call_stats in sorted(stats().items()):
+        lines.append(
+            f"{name:<28} {call_stats.calls:>9d} "
+            f"{call_stats.mean_ns / 1e3:>10.1f} "
+            f"{call_stats.quantile_ns(0.99) / 1e3:>10.1f} "
+            f"{call_stats.cells / call_stats.calls:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def dump(path: PathLike) -> None:
+    """Write the measurements to `path` as JSON."""
+    with open(path, "w") as f:
+        json.dump(
+            {name: stats.as_dict() for name, stats in stats().items()},
+            f,
+            indent=2,
+        )
+
+
+def dump_at_exit(path: Optional[PathLike] = None) -> None:
+    """Enable instrumentation and dump it to `path`, or stderr, on exit."""
+    enable()
+    if path is None:
+        atexit.register(lambda: print(report(), file=sys.stderr))
+    else:
+        atexit.register(dump, path)
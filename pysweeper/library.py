@@ -0,0 +1,241 @@
+"""Compact mine layouts and on-disk libraries of pre-generated boards."""
+
+import mmap
+import os
+import pathlib
+import random
+import struct
+
+from typing import IO, Iterable, Iterator, NamedTuple, Optional, Union
+
+from .bits import Bytes, nonzero, pack_bits, packed_size, unpack_bits
+from .pool import BoardPool
+from .pysweeper import Board, Coordinate
+
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+LAYOUT_MAGIC = b"PSWB"
+LIBRARY_MAGIC = b"PSWL"
+LIBRARY_VERSION = 1
+
+# magic, rows, columns, mines, seed
+_LAYOUT_HEADER = struct.Struct("<4sIIIQ")
+
+# magic, version, rows, columns
+_LIBRARY_HEADER = struct.Struct("<4sHII")
+
+# seed, mines
+_RECORD_HEADER = struct.Struct("<QI")
+
+
+def mine_coordinates(flags: Bytes, ncolumns: int) -> Iterator[Coordinate]:
+    """Generate the coordinates of the nonzero bytes in `flags`."""
+    for index in nonzero(flags):
+        yield divmod(index, ncolumns)
+
+
+class Layout(NamedTuple):
+    """The mine layout of a board, with mines packed one bit per tile."""
+
+    nrows: int
+    ncolumns: int
+    nmines: int
+    seed: int
+    mask: bytes
+
+    @classmethod
+    def from_board(cls, board: Board) -> "Layout":
+        """Capture the mine layout of `board`."""
+        return cls(
+            board.nrows,
+            board.ncolumns,
+            board.nmines,
+            board.seed,
+            pack_bits(board.mines),
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Layout":
+        """Decode a layout produced by :meth:`Layout.to_bytes`."""
+        if len(data) < _LAYOUT_HEADER.size:
+            raise ValueError("Truncated layout header")
+        magic, nrows, ncolumns, nmines, seed = _LAYOUT_HEADER.unpack_from(data)
+        if magic != LAYOUT_MAGIC:
+            raise ValueError(f"Invalid layout magic {magic!r}")
+        start = _LAYOUT_HEADER.size
+        stop = start + packed_size(nrows * ncolumns)
+        if len(data) < stop:
+            raise ValueError("Truncated layout")
+        return cls(nrows, ncolumns, nmines, seed, bytes(data[start:stop]))
+
+    def to_bytes(self) -> bytes:
+        """Encode the layout as a fixed header followed by the mine mask."""
+        return (
+            _LAYOUT_HEADER.pack(
+                LAYOUT_MAGIC,
+                self.nrows,
+                self.ncolumns,
+                self.nmines,
+                self.seed,
+            )
+            + self.mask
+        )
+
+    def to_board(self) -> Board:
+        """Construct the board described by this layout."""
+        ncolumns = self.ncolumns
+        flags = unpack_bits(self.mask, self.nrows * ncolumns)
+        return Board.from_mines(
+            self.nrows,
+            ncolumns,
+            mine_coordinates(flags, ncolumns),
+            seed=self.seed,
+        )
+
+
+class BoardLibrary:  # noqa: D213
+    """An append-only file of board layouts sharing the same dimensions.
+
+    Records have a fixed size so the file is memory-mapped and any layout is
+    read by index without scanning. A partially written trailing record is
+    ignored.
+
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = pathlib.Path(path)
+        self._file = self.path.open("rb")
+        header = self._file.read(_LIBRARY_HEADER.size)
+        if len(header) < _LIBRARY_HEADER.size:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a board library")
+        magic, version, nrows, ncolumns = _LIBRARY_HEADER.unpack(header)
+        if magic != LIBRARY_MAGIC or version != LIBRARY_VERSION:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a board library")
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        self.mask_size = packed_size(nrows * ncolumns)
+        self.record_size = _RECORD_HEADER.size + self.mask_size
+        self._map: Optional[mmap.mmap] = None
+        self._appender: Optional[IO[bytes]] = None
+
+    @classmethod
+    def create(
+        cls, path: PathLike, nrows: int, ncolumns: int
+    ) -> "BoardLibrary":
+        """Create an empty library at `path`, replacing any existing file."""
+        with open(path, "wb") as f:
+            f.write(
+                _LIBRARY_HEADER.pack(
+                    LIBRARY_MAGIC, LIBRARY_VERSION, nrows, ncolumns
+                )
+            )
+        return cls(path)
+
+    def __enter__(self) -> "BoardLibrary":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map and file handles."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._appender is not None:
+            self._appender.close()
+            self._appender = None
+        self._file.close()
+
+    def __len__(self) -> int:
+        size = os.fstat(self._file.fileno()).st_size
+        return (size - _LIBRARY_HEADER.size) // self.record_size
+
+    def _mapping(self, stop: int) -> mmap.mmap:
+        """Return a memory map covering at least `stop` bytes of the file."""
+        mapping = self._map
+        if mapping is None or len(mapping) < stop:
+            if self._appender is not None:
+                self._appender.flush()
+            if mapping is not None:
+                mapping.close()
+            mapping = self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return mapping
+
+    def layout(self, index: int) -> Layout:
+        """Return the layout stored at `index`."""
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError(f"Library index {index} out of range")
+        start = _LIBRARY_HEADER.size + index * self.record_size
+        mapping = self._mapping(start + self.record_size)
+        seed, nmines = _RECORD_HEADER.unpack_from(mapping, start)
+        mask_start = start + _RECORD_HEADER.size
+        return Layout(
+            self.nrows,
+            self.ncolumns,
+            nmines,
+            seed,
+            mapping[mask_start : mask_start + self.mask_size],
+        )
+
+    def __getitem__(self, index: int) -> Board:
+        return self.layout(index).to_board()
+
+    def __iter__(self) -> Iterator[Board]:
+        return (self[index] for index in range(len(self)))
+
+    def append(self, board: Board) -> int:
+        """Append `board` to the library and return its index."""
+        return self.extend([board])
+
+    def extend(self, boards: Iterable[Board]) -> int:
+        """Append every board in `boards`, returning the last index."""
+        appender = self._appender
+        if appender is None:
+            appender = self._appender = self.path.open("ab")
+        shape = self.nrows, self.ncolumns
+        for board in boards:
+            if (board.nrows, board.ncolumns) != shape:
+                raise ValueError(
+                    f"Board shape {board.nrows}x{board.ncolumns} does not "
+                    f"match library shape {self.nrows}x{self.ncolumns}"
+                )
+            layout = Layout.from_board(board)
+            appender.write(_RECORD_HEADER.pack(layout.seed, layout.nmines))
+            appender.write(layout.mask)
+        appender.flush()
+        return len(self) - 1
+
+    def generate(
+        self, count: int, nmines: int, seed: Optional[int] = None
+    ) -> int:  # noqa: D213
+        """Append `count` random boards with `nmines` mines each.
+
+        Board seeds are drawn from `seed`, so the same arguments always
+        produce the same library.
+
+        """
+        rng = random.Random(seed)
+        pool = BoardPool()
+
+        def boards() -> Iterator[Board]:
+            for _ in range(count):
+                board = pool.acquire(
+                    self.nrows,
+                    self.ncolumns,
+                    nmines,
+                    seed=rng.randrange(2 ** 64),
+                )
+                yield board
+                # the board is written out before the next one reuses it
+                pool.release(board)
+
+        return self.extend(boards())
@@ -0,0 +1,251 @@
+"""Append-only binary logs of games and their replay.
+
+A log is a short header followed by records. Each game starts with a record
+holding its seed, topology, first click policy and mine layout, packed one
+bit per tile, and continues with a record per action applied to the board,
+timestamped in microseconds since the game was attached. Mines moved by a
+first click policy are logged as well, so replaying never depends on the
+random number generator.
+
+"""
+
+import mmap
+import os
+import pathlib
+import struct
+import time
+
+from typing import IO, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .bits import nonzero, pack_bits, packed_size, unpack_bits
+from .graph import TOPOLOGIES
+from .pysweeper import Action, Board, FirstClick, Move
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+LOG_MAGIC = b"PSWE"
+LOG_VERSION = 1
+
+# magic, version
+_LOG_HEADER = struct.Struct("<4sH")
+
+# tag, seed, mines, first click, topology, shape padded to three dimensions
+_GAME = struct.Struct("<BQIBB3I")
+
+# tag, microseconds, vertex
+_ACTION = struct.Struct("<BQI")
+
+# tag, microseconds, source, target
+_MINE_MOVE = struct.Struct("<BQII")
+
+_GAME_TAG = 0
+_MINE_MOVE_TAG = 4
+_ACTION_TAGS = {Action.EXPOSE: 1, Action.FLAG: 2, Action.CHORD: 3}
+_TAG_ACTIONS = {tag: action for action, tag in _ACTION_TAGS.items()}
+_FIRST_CLICKS = list(FirstClick)
+_TOPOLOGIES = list(TOPOLOGIES)
+
+
+class Event(NamedTuple):
+    """An action applied to a logged board, or a mine it moved."""
+
+    #: Seconds since the game was attached to the log.
+    time: float
+
+    #: The action, or ``None`` if a mine moved from `vertex` to `target`.
+    action: Optional[Action]
+
+    vertex: int
+    target: int = -1
+
+
+class GameLog:  # noqa: D213
+    """A writer appending the games of attached boards to a log file.
+
+    One board is recorded at a time: attaching a board ends the game of the
+    board attached before it. Records are buffered, call :meth:`flush` or
+    :meth:`close` to make sure they reach the file.
+
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = pathlib.Path(path)
+        self._file: IO[bytes] = self.path.open("ab")
+        if not self._file.tell():
+            self._file.write(_LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+        else:
+            with self.path.open("rb") as f:
+                _check_header(f.read(_LOG_HEADER.size), self.path)
+        self.board: Optional[Board] = None
+        self.start = 0.0
+
+    def __enter__(self) -> "GameLog":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def attach(self, board: Board) -> None:
+        """Start recording a new game played on `board`."""
+        if board.started or board.nflagged:
+            raise ValueError("Only boards without moves can be recorded")
+        graph = board.graph
+        if graph.topology not in TOPOLOGIES:
+            raise ValueError(f"Cannot record a {graph!r} board")
+        self.detach()
+        shape = graph.shape + (0,) * (3 - len(graph.shape))
+        self._file.write(
+            _GAME.pack(
+                _GAME_TAG,
+                board.seed,
+                board.nmines,
+                _FIRST_CLICKS.index(board.first_click),
+                _TOPOLOGIES.index(graph.topology),
+                *shape,
+            )
+        )
+        self._file.write(pack_bits(board.mines))
+        board.log = self
+        self.board = board
+        self.start = time.monotonic()
+
+    def detach(self) -> None:
+        """Stop recording the attached board, if any."""
+        if self.board is not None:
+            self.board.log = None
+            self.board = None
+
+    def _now(self) -> int:
+        return int((time.monotonic() - self.start) * 1_000_000)
+
+    def record(self, action: Action, vertex: int) -> None:
+        """Append `action` applied to `vertex` of the attached board."""
+        self._file.write(
+            _ACTION.pack(_ACTION_TAGS[action], self._now(), vertex)
+        )
+
+    def record_mine_move(self, source: int, target: int) -> None:
+        """Append the move of a mine from `source` to `target`."""
+        self._file.write(
+            _MINE_MOVE.pack(_MINE_MOVE_TAG, self._now(), source, target)
+        )
+
+    def flush(self) -> None:
+        """Write buffered records to the file."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Detach the board being recorded and close the file."""
+        self.detach()
+        self._file.close()
+
+
+def _check_header(header: bytes, path: pathlib.Path) -> None:
+    if len(header) < _LOG_HEADER.size:
+        raise ValueError(f"{path} is not a game log")
+    magic, version = _LOG_HEADER.unpack(header)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        raise ValueError(f"{path} is not a game log")
+
+
+def read_games(path: PathLike) -> Iterator[Tuple[Board, List[Event]]]:
+    """Generate the initial board and the events of every logged game.
+
+    The file is memory-mapped and decoded one game at a time. A partially
+    written trailing record is ignored.
+
+    """
+    path = pathlib.Path(path)
+    with path.open("rb") as f:
+        _check_header(f.read(_LOG_HEADER.size), path)
+        if os.fstat(f.fileno()).st_size == _LOG_HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            offset = _LOG_HEADER.size
+            board: Optional[Board] = None
+            events: List[Event] = []
+            while offset < size:
+                tag = data[offset]
+                if tag == _GAME_TAG:
+                    if offset + _GAME.size > size:
+                        break
+                    header = _GAME.unpack_from(data, offset)
+                    _, seed, nmines, first_click, topology, *shape = header
+                    graph = TOPOLOGIES[_TOPOLOGIES[topology]](
+                        *(n for n in shape if n)
+                    )
+                    offset += _GAME.size
+                    stop = offset + packed_size(graph.ntiles)
+                    if stop > size:
+                        break
+                    if board is not None:
+                        yield board, events
+                    board = Board(
+                        graph.nrows,
+                        graph.ncolumns,
+                        0,
+                        seed=seed,
+                        first_click=_FIRST_CLICKS[first_click],
+                        graph=graph,
+                    )
+                    flags = unpack_bits(data[offset:stop], graph.ntiles)
+                    board.place_mines(nonzero(flags))
+                    if board.nmines != nmines:
+                        raise ValueError(
+                            f"{path} holds a layout of {board.nmines} mines "
+                            f"for a game of {nmines}"
+                        )
+                    events = []
+                    offset = stop
+                elif tag == _MINE_MOVE_TAG:
+                    if offset + _MINE_MOVE.size > size:
+                        break
+                    _, micros, source, target = _MINE_MOVE.unpack_from(
+                        data, offset
+                    )
+                    events.append(Event(micros / 1e6, None, source, target))
+                    offset += _MINE_MOVE.size
+                else:
+                    if offset + _ACTION.size > size:
+                        break
+                    _, micros, vertex = _ACTION.unpack_from(data, offset)
+                    events.append(
+                        Event(micros / 1e6, _TAG_ACTIONS[tag], vertex)
+                    )
+                    offset += _ACTION.size
+            if board is not None:
+                yield board, events
+
+
+def apply_events(board: Board, events: List[Event]) -> None:  # noqa: D213
+    """Apply logged `events` to a board read from a log.
+
+    Actions between mine moves are applied in batches with
+    :meth:`~pysweeper.pysweeper.Board.apply_moves`, which continues after
+    moves that exposed a mine.
+
+    """
+    # mines only move as recorded, never because of the first click policy
+    board.started = True
+    coordinate = board.graph.coordinate
+    moves: List[Move] = []
+
+    def flush() -> None:
+        while moves:
+            del moves[: board.apply_moves(moves).napplied]
+
+    for event in events:
+        if event.action is None:
+            flush()
+            board.move_mine_vertex(event.vertex, event.target)
+        else:
+            moves.append((event.action, *coordinate(event.vertex)))
+    flush()
+
+
+def replay(path: PathLike) -> Iterator[Board]:
+    """Generate the final board of every game in the log at `path`."""
+    for board, events in read_games(path):
+        apply_events(board, events)
+        yield board
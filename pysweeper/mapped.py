@@ -0,0 +1,236 @@
+"""Boards whose state lives in a memory mapped file.
+
+A :class:`MappedBoard` keeps its five state arrays in a file mapped into
+memory, so only the pages being played on have to be in RAM and the
+operating system writes the others back to disk as it sees fit. This is
+meant for boards too large to hold in memory alongside everything else,
+up to billions of tiles.
+
+Tiles are numbered by a :class:`~pysweeper.graph.TiledGraph`, square by
+square, so a flood stays within a few pages of each array for as long as it
+stays within a square, instead of touching a page per row it crosses. The
+graph is computed rather than stored, which is what makes such boards
+possible at all: the adjacency arrays of a rectangular graph take 40 bytes
+per tile.
+
+The file starts with a header holding the shape of the board, its counters,
+seed and first click policy, followed by the mines, counts, exposed, flagged
+and visible arrays, one byte per tile. :meth:`MappedBoard.flush` writes the
+header and syncs the mapping, after which the file is a snapshot of the game
+that :meth:`MappedBoard.open` picks up again.
+
+"""
+
+import mmap
+import os
+import pathlib
+import random
+import struct
+
+from typing import Any, Optional, Tuple, Union, cast
+
+from .graph import TiledGraph
+from .pysweeper import COVERED, Board, FirstClick, StateArray
+
+MAPPED_MAGIC = b"PSWM"
+MAPPED_VERSION = 1
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# magic, version, rows, columns, tile, mines, exposed, flagged, correctly
+# flagged, seed, first click, started
+_HEADER = struct.Struct("<4sHIIIQQQQQBB")
+_FIRST_CLICKS = list(FirstClick)
+_NARRAYS = 5
+
+#: Where the state arrays start in the file, on a page boundary.
+ARRAYS_OFFSET = 4096
+
+# visible tiles are covered a block at a time
+_BLOCK = 1 << 24
+
+
+class MappedBoard(Board):  # noqa: D213
+    """A board whose state arrays live in the file at `path`.
+
+    The file is created, replacing any existing one, and holds the arrays
+    of an `nrows` by `ncolumns` board numbered in `tile` by `tile` squares.
+    Using the board as a context manager flushes and closes it on exit.
+
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        nrows: int,
+        ncolumns: int,
+        nmines: int,
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        tile: int = 64,
+    ) -> None:
+        if seed is not None and not 0 <= seed < 2 ** 64:
+            raise ValueError("Seeds of mapped boards must fit in 64 bits")
+        self.path = pathlib.Path(path)
+        super().__init__(
+            nrows,
+            ncolumns,
+            nmines,
+            seed=seed,
+            first_click=first_click,
+            graph=TiledGraph(nrows, ncolumns, tile),
+        )
+        self.flush()
+
+    def _map(self, ntiles: int) -> Tuple[StateArray, ...]:
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._view = view = memoryview(self._mmap)
+        return tuple(
+            view[start : start + ntiles]
+            for start in range(
+                ARRAYS_OFFSET, ARRAYS_OFFSET + _NARRAYS * ntiles, ntiles
+            )
+        )
+
+    def allocate(self, ntiles: int) -> Tuple[StateArray, ...]:  # noqa: D213
+        """Create the file and return views of its arrays.
+
+        The file is sparse until the visible tiles are covered, and the
+        other arrays are only backed by disk once they are written to.
+
+        """
+        self._file = open(self.path, "w+b")
+        self._file.truncate(ARRAYS_OFFSET + _NARRAYS * ntiles)
+        arrays = self._map(ntiles)
+        visible = arrays[-1]
+        block = bytes([COVERED]) * min(ntiles, _BLOCK)
+        for start in range(0, ntiles, _BLOCK):
+            stop = min(start + _BLOCK, ntiles)
+            visible[start:stop] = block[: stop - start]
+        return arrays
+
+    @classmethod
+    def open(cls, path: PathLike) -> "MappedBoard":
+        """Continue the game saved in the file at `path`."""
+        path = pathlib.Path(path)
+        board = cls.__new__(cls)
+        board.path = path
+        board._file = open(path, "r+b")
+        try:
+            header = board._file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f"{path} is not a mapped board")
+            (
+                magic,
+                version,
+                nrows,
+                ncolumns,
+                tile,
+                nmines,
+                nexposed,
+                nflagged,
+                ncorrectly_flagged,
+                seed,
+                first_click,
+                started,
+            ) = _HEADER.unpack(header)
+            if magic != MAPPED_MAGIC:
+                raise ValueError(f"{path} is not a mapped board")
+            if version != MAPPED_VERSION:
+                raise ValueError(f"Unsupported mapped board version {version}")
+            ntiles = nrows * ncolumns
+            if os.fstat(board._file.fileno()).st_size < (
+                ARRAYS_OFFSET + _NARRAYS * ntiles
+            ):
+                raise ValueError(f"{path} is truncated")
+        except BaseException:
+            board._file.close()
+            raise
+
+        board.graph = TiledGraph(nrows, ncolumns, tile)
+        board.nrows = nrows
+        board.ncolumns = ncolumns
+        board.first_click = _FIRST_CLICKS[first_click]
+        board.started = bool(started)
+        board.log = None
+        board.history = None
+        board.seed = seed
+        board.random = random.Random(seed)
+        (
+            board.mines,
+            board.counts,
+            board.exposed,
+            board.flagged,
+            board.visible,
+        ) = board._map(ntiles)
+        board.nmines = nmines
+        board.nexposed = nexposed
+        board.nflagged = nflagged
+        board.ncorrectly_flagged = ncorrectly_flagged
+        return board
+
+    @property
+    def observation(self) -> memoryview:  # noqa: D213
+        """Return an `nrows` by `ncolumns` copy of the visible tiles.
+
+        The tiles are not stored row major, so unlike other boards this is
+        a copy, of the whole board; see :meth:`window` for parts of it.
+
+        """
+        return memoryview(self.window(0, 0, self.nrows, self.ncolumns)).cast(
+            "B", (self.nrows, self.ncolumns)
+        )
+
+    def window(
+        self, top: int, left: int, nrows: int, ncolumns: int
+    ) -> bytearray:
+        """Return the visible codes of a rectangle of tiles, row major."""
+        runs = cast(TiledGraph, self.graph).runs
+        visible = self.visible
+        out = bytearray()
+        for i in range(top, top + nrows):
+            for start, stop in runs(i, left, left + ncolumns):
+                out += visible[start:stop]
+        return out
+
+    def flush(self) -> None:
+        """Write the counters to the header and the arrays to disk."""
+        graph = cast(TiledGraph, self.graph)
+        _HEADER.pack_into(
+            self._mmap,
+            0,
+            MAPPED_MAGIC,
+            MAPPED_VERSION,
+            self.nrows,
+            self.ncolumns,
+            graph.tile,
+            self.nmines,
+            self.nexposed,
+            self.nflagged,
+            self.ncorrectly_flagged,
+            self.seed,
+            _FIRST_CLICKS.index(self.first_click),
+            self.started,
+        )
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Flush the board and unmap its file."""
+        self.flush()
+        for array in (
+            self.mines,
+            self.counts,
+            self.exposed,
+            self.flagged,
+            self.visible,
+        ):
+            cast(memoryview, array).release()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> "MappedBoard":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,120 @@
+"""Server metrics in the OpenMetrics text format.
+
+Request latencies are kept in the power of two histograms of
+:class:`~pysweeper.instrument.CallStats`, so recording a request costs a
+couple of integer operations, and are exposed as histograms whose bucket
+bounds are those powers of two in seconds. Everything describing the state
+of the server, like the number of games, is sampled when the metrics are
+scraped.
+
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from .instrument import CallStats
+
+#: Media type of the exposition.
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# histogram buckets go from about a microsecond to about 8.6 seconds
+_FIRST_BUCKET = 10
+_LAST_BUCKET = 33
+
+#: A gauge or counter sampled at scrape time: name, help and value.
+Sample = Tuple[str, str, float]
+
+
+class Metrics:
+    """Counters and latency histograms of the requests served."""
+
+    def __init__(self, operations: Iterable[str]) -> None:
+        self.requests: Dict[str, CallStats] = {
+            op: CallStats() for op in operations
+        }
+        self.errors: Dict[str, int] = dict.fromkeys(self.requests, 0)
+
+    def record(
+        self, op: str, elapsed_ns: int, cells: int, error: bool
+    ) -> None:
+        """Count a request for `op` that took `elapsed_ns`."""
+        if op not in self.requests:
+            op = "unknown"
+            if op not in self.requests:
+                self.requests[op] = CallStats()
+                self.errors[op] = 0
+        self.requests[op].record(elapsed_ns, cells)
+        if error:
+            self.errors[op] += 1
+
+    def render(
+        self, counters: Iterable[Sample] = (), gauges: Iterable[Sample] = ()
+    ) -> str:
+        """Return the exposition of these metrics and the given samples."""
+        lines: List[str] = []
+        for name, help, value in counters:
+            lines += [
+                f"# TYPE {name} counter",
+                f"# HELP {name} {help}",
+                f"{name}_total {value}",
+            ]
+        for name, help, value in gauges:
+            lines += [
+                f"# TYPE {name} gauge",
+                f"# HELP {name} {help}",
+                f"{name} {value}",
+            ]
+
+        requests = sorted(
+            (op, stats) for op, stats in self.requests.items() if stats.calls
+        )
+        name = "pysweeper_requests"
+        lines += [
+            f"# TYPE {name} counter",
+            f"# HELP {name} Requests served, by operation.",
+        ]
+        lines += [
+            f'{name}_total{{op="{op}"}} {stats.calls}'
+            for op, stats in requests
+        ]
+        name = "pysweeper_request_errors"
+        lines += [
+            f"# TYPE {name} counter",
+            f"# HELP {name} Requests answered with an error, by operation.",
+        ]
+        lines += [
+            f'{name}_total{{op="{op}"}} {self.errors[op]}'
+            for op, _ in requests
+        ]
+        name = "pysweeper_request_cells"
+        lines += [
+            f"# TYPE {name} counter",
+            f"# HELP {name} Cells changed by requests, by operation.",
+        ]
+        lines += [
+            f'{name}_total{{op="{op}"}} {stats.cells}'
+            for op, stats in requests
+        ]
+
+        name = "pysweeper_request_duration_seconds"
+        lines += [
+            f"# TYPE {name} histogram",
+            f"# UNIT {name} seconds",
+            f"# HELP {name} Time taken to answer requests, by operation.",
+        ]
+        for op, stats in requests:
+            histogram = stats.histogram
+            # calls in bucket b took less than 2 ** b nanoseconds
+            count = sum(histogram[:_FIRST_BUCKET])
+            for bucket in range(_FIRST_BUCKET, _LAST_BUCKET + 1):
+                count += histogram[bucket]
+                bound = (1 << bucket) / 1e9
+                lines.append(
+                    f'{name}_bucket{{op="{op}",le="{bound:.9g}"}} {count}'
+                )
+            lines += [
+                f'{name}_bucket{{op="{op}",le="+Inf"}} {stats.calls}',
+                f'{name}_count{{op="{op}"}} {stats.calls}',
+                f'{name}_sum{{op="{op}"}} {stats.total_ns / 1e9:.9g}',
+            ]
+        lines.append("# EOF\n")
+        return "\n".join(lines)
@@ -0,0 +1,795 @@
+"""Building and playing huge boards with several processes.
+
+Boards whose state other processes can map, a
+:class:`~pysweeper.shared.SharedBoard` or a
+:class:`~pysweeper.mapped.MappedBoard`, can have their mines laid by a pool
+of worker processes with :func:`lay_mines`.
+
+The board is cut into bands of `band_rows` rows. Each band gets its share of
+the mines and a seed hashed from the board's seed and the band's position,
+and a worker lays the mines of a band and counts them as if the band were a
+board of its own, writing both straight into the board's memory. The counts
+of the rows on either side of a boundary between bands are then completed
+with the mines across it. Which worker handles which band does not matter,
+so the same seed gives the same board whatever the number of processes.
+
+A single click on a sparse board can open hundreds of millions of tiles,
+which :func:`expose` and :func:`flood` spread over the same kind of pool.
+The board is cut into square blocks, workers label the openings of a block
+as runs of tiles without adjacent mines, and the labels meeting along the
+edges of neighbouring blocks are merged with union find until every block
+the openings reach is labelled. Each block is then exposed by a worker,
+with the openings of its neighbours along its edges.
+
+"""
+
+import array
+import concurrent.futures
+import contextlib
+import hashlib
+import mmap
+import random
+import re
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from . import mapped, shared
+from .bits import popcount
+from .graph import Coordinate, TiledGraph, grid_counts
+from .pysweeper import Action, Board, StateArray
+
+
+class Band(NamedTuple):
+    """The rows of a board a worker lays the mines of."""
+
+    #: Either ``"shared"`` or ``"mapped"``.
+    kind: str
+
+    #: The name of the shared memory block or the path of the file.
+    location: str
+    offset: int
+    nrows: int
+    ncolumns: int
+
+    #: The side of the squares of a tiled board, ``0`` if it is row major.
+    tile: int
+    top: int
+    height: int
+    nmines: int
+    seed: int
+
+
+def _location(board: Board) -> Tuple[str, str, int]:
+    """Return where other processes find the arrays of `board`."""
+    if isinstance(board, shared.SharedBoard):
+        return "shared", board.name, shared.ARRAYS_OFFSET
+    if isinstance(board, mapped.MappedBoard):
+        return "mapped", str(board.path), mapped.ARRAYS_OFFSET
+    raise TypeError("Only shared and mapped boards can be used by workers")
+
+
+def band_seed(seed: int, band: int) -> int:
+    """Return the seed of the mines of `band` on a board seeded with `seed`."""
+    digest = hashlib.blake2b(f"{seed}:{band}".encode(), digest_size=16)
+    return int.from_bytes(digest.digest(), "little")
+
+
+@contextlib.contextmanager
+def _attach(kind: str, location: str) -> Iterator[memoryview]:
+    """Map the memory of a board in another process."""
+    if kind == "shared":
+        memory = shared.attach(location)
+        buf = memory.buf
+        assert buf is not None
+        try:
+            yield buf
+        finally:
+            memory.close()
+    else:
+        with open(location, "r+b") as f, mmap.mmap(f.fileno(), 0) as m:
+            view = memoryview(m)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def _row_runs(
+    nrows: int, ncolumns: int, tile: int, top: int, height: int
+) -> List[Tuple[int, int]]:  # noqa: D213
+    """Return where `height` rows from `top` go, as runs of vertices.
+
+    Runs are ``(vertex, length)`` pairs listing the rows of the band, left
+    to right and top to bottom, split at the edges of squares on tiled
+    boards.
+
+    """
+    if not tile:
+        return [(top * ncolumns, height * ncolumns)]
+    graph = TiledGraph(nrows, ncolumns, tile)
+    return [
+        (start, stop - start)
+        for i in range(top, top + height)
+        for start, stop in graph.runs(i, 0, ncolumns)
+    ]
+
+
+def _scatter(
+    array: StateArray,
+    data: Union[bytes, bytearray],
+    runs: List[Tuple[int, int]],
+) -> None:
+    """Write the row major `data` to the `runs` of `array`."""
+    position = 0
+    for start, length in runs:
+        array[start : start + length] = data[position : position + length]
+        position += length
+
+
+def _gather(array: StateArray, runs: List[Tuple[int, int]]) -> bytes:
+    """Return the `runs` of `array`, row major."""
+    return b"".join(array[start : start + length] for start, length in runs)
+
+
+def lay_band(band: Band) -> int:
+    """Lay the mines of `band` and count them, returning how many."""
+    size = band.height * band.ncolumns
+    flags = bytearray(size)
+    for v in random.Random(band.seed).sample(range(size), band.nmines):
+        flags[v] = 1
+    counts = grid_counts(band.height, band.ncolumns, bytes(flags))
+    runs = _row_runs(
+        band.nrows, band.ncolumns, band.tile, band.top, band.height
+    )
+    ntiles = band.nrows * band.ncolumns
+    with _attach(band.kind, band.location) as view:
+        mines = view[band.offset : band.offset + ntiles]
+        counts_array = view[band.offset + ntiles : band.offset + 2 * ntiles]
+        try:
+            _scatter(mines, flags, runs)
+            _scatter(counts_array, counts, runs)
+        finally:
+            mines.release()
+            counts_array.release()
+    return band.nmines
+
+
+def _row_sums(row: bytes) -> int:
+    """Return each tile of `row` plus its left and right neighbours."""
+    value = int.from_bytes(row, "little")
+    ncolumns = len(row)
+    not_first = int.from_bytes(b"\x00" + b"\xff" * (ncolumns - 1), "little")
+    return value + (value << 8 & not_first) + (value >> 8 & not_first >> 8)
+
+
+def bands(
+    board: Board, nmines: int, band_rows: int = 256
+) -> List[Band]:  # noqa: D213
+    """Return the bands laying `nmines` mines on `board`.
+
+    Every band holds its share of the mines, rounded down, and the mines
+    left over go to bands drawn at random.
+
+    """
+    graph = board.graph
+    tile = 0
+    if isinstance(graph, TiledGraph):
+        tile = graph.tile
+        # bands must start at the top of a row of squares
+        band_rows = -(-band_rows // tile) * tile
+    kind, location, offset = _location(board)
+
+    nrows = board.nrows
+    ncolumns = board.ncolumns
+    ntiles = board.ntiles
+    tops = range(0, nrows, band_rows)
+    heights = [min(band_rows, nrows - top) for top in tops]
+    shares = [nmines * height * ncolumns // ntiles for height in heights]
+    extra = random.Random(board.seed).sample(
+        range(len(tops)), nmines - sum(shares)
+    )
+    for k in extra:
+        shares[k] += 1
+    return [
+        Band(
+            kind,
+            location,
+            offset,
+            nrows,
+            ncolumns,
+            tile,
+            top,
+            height,
+            share,
+            band_seed(board.seed, k),
+        )
+        for k, (top, height, share) in enumerate(zip(tops, heights, shares))
+    ]
+
+
+def lay_mines(
+    board: Board,
+    nmines: int,
+    processes: Optional[int] = None,
+    band_rows: int = 256,
+) -> None:  # noqa: D213
+    """Lay `nmines` mines on an empty board with `processes` workers.
+
+    `board` is a :class:`~pysweeper.shared.SharedBoard` or a
+    :class:`~pysweeper.mapped.MappedBoard` without mines or moves, built
+    with no mines. The layout depends on the board's seed and `band_rows`
+    only.
+
+    """
+    if board.nmines or board.started or board.nexposed or board.nflagged:
+        raise ValueError("Mines can only be laid on an empty board")
+    if not 0 <= nmines <= board.ntiles:
+        raise ValueError("Invalid number of mines")
+    work = bands(board, nmines, band_rows)
+    with shared.writing(board):
+        if processes == 1:
+            placed = sum(map(lay_band, work))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(processes) as pool:
+                placed = sum(pool.map(lay_band, work))
+        assert placed == nmines
+
+        # complete the counts of the rows along the band boundaries
+        graph = board.graph
+        tile = graph.tile if isinstance(graph, TiledGraph) else 0
+        nrows = board.nrows
+        ncolumns = board.ncolumns
+        mines = board.mines
+        counts = board.counts
+        for band in work[1:]:
+            above = _row_runs(nrows, ncolumns, tile, band.top - 1, 1)
+            below = _row_runs(nrows, ncolumns, tile, band.top, 1)
+            for row, other in (above, below), (below, above):
+                total = int.from_bytes(_gather(counts, row), "little")
+                total += _row_sums(_gather(mines, other))
+                _scatter(counts, total.to_bytes(ncolumns, "little"), row)
+        board.nmines = nmines
+    if isinstance(board, mapped.MappedBoard):
+        board.flush()
+
+
+class Block(NamedTuple):
+    """A rectangle of a board a worker floods."""
+
+    #: Either ``"shared"`` or ``"mapped"``.
+    kind: str
+
+    #: The name of the shared memory block or the path of the file.
+    location: str
+    offset: int
+    nrows: int
+    ncolumns: int
+
+    #: The side of the squares of a tiled board, ``0`` if it is row major.
+    tile: int
+    top: int
+    left: int
+    height: int
+    width: int
+
+
+class Labels(NamedTuple):  # noqa: D213
+    """The components of tiles without adjacent mines in a block.
+
+    Components are numbered from ``0`` to ``nlabels - 1`` within the block.
+    The edges list the component of each tile along the top and bottom rows
+    and the left and right columns, ``-1`` for tiles in none, and `starts`
+    the components of the tiles the flood starts from.
+
+    """
+
+    nlabels: int
+    top: "array.array[int]"
+    bottom: "array.array[int]"
+    left: "array.array[int]"
+    right: "array.array[int]"
+    starts: List[int]
+
+
+# (start, stop, label) of the runs of a row
+Run = Tuple[int, int, int]
+
+_ZERO_RUN = re.compile(b"\x01+")
+_IS_ZERO = bytes([1]) + bytes(255)
+_IS_NONZERO = bytes([0]) + bytes([1]) * 255
+
+_NEIGHBOURS = [
+    (di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj
+]
+
+# the blocks next to each edge of a block
+_SIDES = {
+    "top": [(-1, -1), (-1, 0), (-1, 1)],
+    "bottom": [(1, -1), (1, 0), (1, 1)],
+    "left": [(-1, -1), (0, -1), (1, -1)],
+    "right": [(-1, 1), (0, 1), (1, 1)],
+}
+
+
+class _Components:
+    """Disjoint sets of integers, merged by union find."""
+
+    def __init__(self) -> None:
+        self.parent: List[int] = []
+
+    def add(self, n: int) -> int:
+        """Add `n` singletons, returning the first of them."""
+        first = len(self.parent)
+        self.parent.extend(range(first, first + n))
+        return first
+
+    def find(self, x: int) -> int:
+        """Return the representative of the set holding `x`."""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = x = parent[parent[x]]
+        return x
+
+    def union(self, x: int, y: int) -> None:
+        """Merge the sets holding `x` and `y`."""
+        x = self.find(x)
+        y = self.find(y)
+        if x != y:
+            self.parent[x] = y
+
+
+def _block_runs(block: Block) -> List[Tuple[int, int]]:
+    """Return where the rows of `block` go, as runs of vertices."""
+    top, left, width = block.top, block.left, block.width
+    rows = range(top, top + block.height)
+    if not block.tile:
+        ncolumns = block.ncolumns
+        return [(i * ncolumns + left, width) for i in rows]
+    graph = TiledGraph(block.nrows, block.ncolumns, block.tile)
+    return [
+        (start, stop - start)
+        for i in rows
+        for start, stop in graph.runs(i, left, left + width)
+    ]
+
+
+@contextlib.contextmanager
+def _arrays(block: Block) -> Iterator[List[memoryview]]:
+    """Map the five state arrays of the board holding `block`."""
+    ntiles = block.nrows * block.ncolumns
+    start = block.offset
+    with _attach(block.kind, block.location) as view:
+        arrays = [
+            view[offset : offset + ntiles]
+            for offset in range(start, start + 5 * ntiles, ntiles)
+        ]
+        try:
+            yield arrays
+        finally:
+            for memory in arrays:
+                memory.release()
+
+
+def _label(
+    height: int, width: int, mines: int, counts: int
+) -> Tuple[List[List[Run]], int]:  # noqa: D213
+    """Label the runs of tiles without adjacent mines, row by row.
+
+    `mines` and `counts` hold the block a byte per tile, row major. Runs
+    touching a run of the row above, diagonally included, belong to its
+    component, and components are numbered in order of their first run.
+
+    """
+    zero = (mines | counts).to_bytes(height * width, "little")
+    zero = zero.translate(_IS_ZERO)
+    components = _Components()
+    find = components.find
+    parent = components.parent
+    rows: List[List[Run]] = []
+    previous: List[Run] = []
+    for r in range(height):
+        offset = r * width
+        row = []
+        k = 0
+        for match in _ZERO_RUN.finditer(zero, offset, offset + width):
+            start = match.start() - offset
+            stop = match.end() - offset
+            label = components.add(1)
+            # the runs above from the column left of this one to the
+            # column right of it
+            while k < len(previous) and previous[k][1] < start:
+                k += 1
+            n = k
+            while n < len(previous) and previous[n][0] <= stop:
+                parent[find(previous[n][2])] = label
+                n += 1
+            row.append((start, stop, label))
+        rows.append(row)
+        previous = row
+
+    numbers: Dict[int, int] = {}
+    rows = [
+        [
+            (start, stop, numbers.setdefault(find(label), len(numbers)))
+            for start, stop, label in row
+        ]
+        for row in rows
+    ]
+    return rows, len(numbers)
+
+
+def _runs_label(row: List[Run], column: int) -> int:
+    """Return the label of the run of `row` over `column`, or ``-1``."""
+    for start, stop, label in row:
+        if start <= column < stop:
+            return label
+    return -1
+
+
+def label_block(
+    block: Block, starts: Sequence[Tuple[int, int]]
+) -> Labels:  # noqa: D213
+    """Find the components of tiles without adjacent mines in `block`.
+
+    `starts` are positions within the block whose components are wanted.
+
+    """
+    height, width = block.height, block.width
+    runs = _block_runs(block)
+    with _arrays(block) as arrays:
+        mines = int.from_bytes(_gather(arrays[0], runs), "little")
+        counts = int.from_bytes(_gather(arrays[1], runs), "little")
+    rows, nlabels = _label(height, width, mines, counts)
+
+    edges = []
+    for row in rows[0], rows[-1]:
+        edge = array.array("i", [-1]) * width
+        for start, stop, label in row:
+            edge[start:stop] = array.array("i", [label]) * (stop - start)
+        edges.append(edge)
+    left = array.array("i", [_runs_label(row, 0) for row in rows])
+    right = array.array("i", [_runs_label(row, width - 1) for row in rows])
+    return Labels(
+        nlabels,
+        edges[0],
+        edges[1],
+        left,
+        right,
+        [_runs_label(rows[r], c) for r, c in starts],
+    )
+
+
+def expose_block(
+    block: Block, opened: Set[int], halo: Tuple[bytes, bytes, bytes, bytes]
+) -> int:  # noqa: D213
+    """Expose the `opened` components of `block` and their neighbours.
+
+    `halo` flags the tiles of opened components around the block, as the
+    row above and below it, corners included, and the columns to its left
+    and right. Returns the number of tiles newly exposed.
+
+    """
+    height, width = block.height, block.width
+    size = height * width
+    runs = _block_runs(block)
+    with _arrays(block) as arrays:
+        mines = int.from_bytes(_gather(arrays[0], runs), "little")
+        counts = int.from_bytes(_gather(arrays[1], runs), "little")
+        rows, _ = _label(height, width, mines, counts)
+
+        # flag the opened tiles on the block surrounded by its halo
+        padded = width + 2
+        above, below, left, right = halo
+        flags = bytearray((height + 2) * padded)
+        flags[:padded] = above
+        flags[-padded:] = below
+        flags[padded : (height + 1) * padded : padded] = left
+        flags[2 * padded - 1 : (height + 1) * padded : padded] = right
+        ones = b"\x01" * width
+        for r, row in enumerate(rows):
+            offset = (r + 1) * padded + 1
+            for start, stop, label in row:
+                if label in opened:
+                    length = stop - start
+                    flags[offset + start : offset + stop] = ones[:length]
+
+        # tiles that are opened or next to an opened tile
+        near = int.from_bytes(flags, "little") + int.from_bytes(
+            grid_counts(height + 2, padded, bytes(flags)), "little"
+        )
+        reach = near.to_bytes(len(flags), "little").translate(_IS_NONZERO)
+        reached = int.from_bytes(
+            b"".join(
+                reach[offset : offset + width]
+                for offset in range(padded + 1, (height + 1) * padded, padded)
+            ),
+            "little",
+        )
+
+        flagged = int.from_bytes(_gather(arrays[3], runs), "little")
+        exposed = int.from_bytes(_gather(arrays[2], runs), "little")
+        fresh = reached & ~flagged & ~exposed
+        if not fresh:
+            return 0
+        exposed |= fresh
+        # a byte of 0xFF over every fresh tile picks its count
+        select = fresh * 0xFF
+        visible = int.from_bytes(_gather(arrays[4], runs), "little")
+        visible += (counts & select) - (visible & select)
+        _scatter(arrays[2], exposed.to_bytes(size, "little"), runs)
+        _scatter(arrays[4], visible.to_bytes(size, "little"), runs)
+    return popcount(fresh)
+
+
+def _stitch(
+    components: _Components,
+    first: Sequence[int],
+    first_base: int,
+    second: Sequence[int],
+    second_base: int,
+) -> None:
+    """Join the components along two facing edges of adjacent blocks."""
+    union = components.union
+    n = len(second)
+    for k, label in enumerate(first):
+        if label >= 0:
+            for m in range(max(k - 1, 0), min(k + 2, n)):
+                if second[m] >= 0:
+                    union(first_base + label, second_base + second[m])
+
+
+def flood(
+    board: Board,
+    coordinates: Iterable[Coordinate],
+    processes: Optional[int] = None,
+    block_size: int = 512,
+) -> int:  # noqa: D213
+    """Expose every tile reachable from `coordinates` with `processes` workers.
+
+    Exposes the same tiles as :meth:`~pysweeper.pysweeper.Board.flood` on
+    a :class:`~pysweeper.shared.SharedBoard` or a rectangular
+    :class:`~pysweeper.mapped.MappedBoard`, and returns how many were newly
+    exposed.
+
+    The board is cut into `block_size` squares. Workers label the openings
+    of the squares the flood reaches, a square at a time, and the labels
+    along the edges of neighbouring squares are merged here until no
+    opening reached leads to a square not yet labelled. The squares are
+    then exposed in parallel. Floods made this way cannot be undone, nor
+    logged.
+
+    """
+    if board.history is not None:
+        raise ValueError("Parallel floods cannot be undone")
+    if board.log is not None:
+        raise ValueError("Floods of a logged board cannot be replayed")
+    with shared.writing(board):
+        return _flood(board, coordinates, processes, block_size)
+
+
+def _flood(
+    board: Board,
+    coordinates: Iterable[Coordinate],
+    processes: Optional[int],
+    block_size: int,
+) -> int:
+    graph = board.graph
+    tile = 0
+    if isinstance(graph, TiledGraph):
+        tile = graph.tile
+        # blocks are made of whole squares
+        block_size = -(-block_size // tile) * tile
+    elif graph.topology != "rectangular":
+        raise TypeError("Only rectangular boards can be flooded in parallel")
+    kind, location, offset = _location(board)
+    nrows = board.nrows
+    ncolumns = board.ncolumns
+    nblock_rows = -(-nrows // block_size)
+    nblock_columns = -(-ncolumns // block_size)
+
+    def block(key: Tuple[int, int]) -> Block:
+        top = key[0] * block_size
+        left = key[1] * block_size
+        return Block(
+            kind,
+            location,
+            offset,
+            nrows,
+            ncolumns,
+            tile,
+            top,
+            left,
+            min(block_size, nrows - top),
+            min(block_size, ncolumns - left),
+        )
+
+    def around(
+        key: Tuple[int, int], offsets: Iterable[Tuple[int, int]]
+    ) -> Iterator[Tuple[int, int]]:
+        for di, dj in offsets:
+            bi = key[0] + di
+            bj = key[1] + dj
+            if 0 <= bi < nblock_rows and 0 <= bj < nblock_columns:
+                yield bi, bj
+
+    mines = board.mines
+    counts = board.counts
+    index = graph.index
+    starts: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    numbered = []
+    for i, j in coordinates:
+        v = index(i, j)
+        if mines[v]:
+            continue
+        if counts[v]:
+            numbered.append(v)
+        else:
+            key = i // block_size, j // block_size
+            starts.setdefault(key, []).append(
+                (i % block_size, j % block_size)
+            )
+
+    components = _Components()
+    find = components.find
+    labelled: Dict[Tuple[int, int], Labels] = {}
+    bases: Dict[Tuple[int, int], int] = {}
+    joined: Set[Tuple[Tuple[int, int], Tuple[int, int]]] = set()
+    seeds: List[int] = []
+    roots: Set[int] = set()
+    # the sides of each block whose neighbours are labelled already
+    spread: Dict[Tuple[int, int], Set[str]] = {}
+
+    def opened(key: Tuple[int, int], labels: Iterable[int]) -> bool:
+        base = bases[key]
+        return any(
+            label >= 0 and find(base + label) in roots
+            for label in set(labels)
+        )
+
+    with contextlib.ExitStack() as stack:
+        run: Callable[..., Iterator[Any]] = map
+        if processes != 1:
+            run = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(processes)
+            ).map
+
+        pending = sorted(starts)
+        while pending:
+            work = run(
+                label_block,
+                map(block, pending),
+                [starts.get(key, []) for key in pending],
+            )
+            for key, labels in zip(pending, work):
+                labelled[key] = labels
+                bases[key] = base = components.add(labels.nlabels)
+                seeds.extend(base + label for label in labels.starts)
+                spread[key] = set()
+
+            # merge the components of the new blocks with their neighbours
+            for key in pending:
+                for other in around(key, _NEIGHBOURS):
+                    pair = min(key, other), max(key, other)
+                    if other not in labelled or pair in joined:
+                        continue
+                    joined.add(pair)
+                    (ai, aj), (bi, bj) = pair
+                    a, b = labelled[pair[0]], labelled[pair[1]]
+                    a_base, b_base = bases[pair[0]], bases[pair[1]]
+                    if ai == bi:
+                        _stitch(components, a.right, a_base, b.left, b_base)
+                    elif aj == bj:
+                        _stitch(components, a.bottom, a_base, b.top, b_base)
+                    else:
+                        # blocks meeting at a corner
+                        first = a.bottom[-1 if aj < bj else 0]
+                        second = b.top[0 if aj < bj else -1]
+                        if first >= 0 and second >= 0:
+                            components.union(a_base + first, b_base + second)
+            roots = {find(seed) for seed in seeds}
+
+            # label the blocks next to edges the openings reach
+            following: Set[Tuple[int, int]] = set()
+            for key, labels in labelled.items():
+                for side, offsets in _SIDES.items():
+                    if side in spread[key]:
+                        continue
+                    if opened(key, getattr(labels, side)):
+                        spread[key].add(side)
+                        following.update(
+                            other
+                            for other in around(key, offsets)
+                            if other not in labelled
+                        )
+            pending = sorted(following)
+
+        def edge(
+            key: Tuple[int, int], side: str, length: int, k: slice
+        ) -> bytes:
+            labels = labelled.get(key)
+            if labels is None:
+                return bytes(length)
+            base = bases[key]
+            return bytes(
+                label >= 0 and find(base + label) in roots
+                for label in getattr(labels, side)[k]
+            )
+
+        everything = slice(None)
+        tasks = []
+        for key, labels in labelled.items():
+            bi, bj = key
+            base = bases[key]
+            chosen = {
+                label
+                for label in range(labels.nlabels)
+                if find(base + label) in roots
+            }
+            width = len(labels.top)
+            height = len(labels.left)
+            halo = (
+                edge((bi - 1, bj - 1), "bottom", 1, slice(-1, None))
+                + edge((bi - 1, bj), "bottom", width, everything)
+                + edge((bi - 1, bj + 1), "bottom", 1, slice(0, 1)),
+                edge((bi + 1, bj - 1), "top", 1, slice(-1, None))
+                + edge((bi + 1, bj), "top", width, everything)
+                + edge((bi + 1, bj + 1), "top", 1, slice(0, 1)),
+                edge((bi, bj - 1), "right", height, everything),
+                edge((bi, bj + 1), "left", height, everything),
+            )
+            if chosen or any(any(side) for side in halo):
+                tasks.append((block(key), chosen, halo))
+
+        nexposed = sum(run(expose_block, *zip(*tasks))) if tasks else 0
+
+    exposed = board.exposed
+    flagged = board.flagged
+    visible = board.visible
+    for v in numbered:
+        if not flagged[v] and not exposed[v]:
+            exposed[v] = 1
+            visible[v] = counts[v]
+            nexposed += 1
+    board.nexposed += nexposed
+    return nexposed
+
+
+def expose(
+    board: Board,
+    i: int,
+    j: int,
+    processes: Optional[int] = None,
+    block_size: int = 512,
+) -> int:  # noqa: D213
+    """Expose tile `i`, `j` of `board` with `processes` workers.
+
+    The parallel counterpart of :meth:`~pysweeper.pysweeper.Board.expose`
+    for openings too large for one process, see :func:`flood`. Returns the
+    number of tiles newly exposed.
+
+    """
+    if board.history is not None:
+        raise ValueError("Parallel floods cannot be undone")
+    v = board.graph.index(i, j)
+    with shared.writing(board):
+        board.start(i, j)
+        if board.log is not None:
+            board.log.record(Action.EXPOSE, v)
+        if board.mines[v]:
+            nexposed = board.nexposed
+            board.set_exposed(v, True)
+            return board.nexposed - nexposed
+        return _flood(board, [(i, j)], processes, block_size)
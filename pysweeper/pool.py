@@ -0,0 +1,101 @@
+"""Recycling the boards of finished games.
+
+Building a board allocates and fills five arrays of a byte per tile, and
+dropping one returns them to the allocator, which on large boards means
+mapping and unmapping memory for every game. A :class:`BoardPool` keeps the
+boards of finished games and starts new games of the same shape on them with
+:meth:`~pysweeper.pysweeper.Board.reset`, which overwrites their arrays in
+place.
+
+"""
+
+import collections
+
+from typing import Deque, Dict, Optional, Tuple
+
+from .graph import TOPOLOGIES, Graph, rectangular
+from .pysweeper import Board, FirstClick
+
+
+class BoardPool:  # noqa: D213
+    """Boards waiting to be reused, by graph.
+
+    At most `max_tiles` tiles worth of boards are kept, boards released
+    past that are left to be freed, and the boards of the shapes released
+    least recently are dropped to make room for new ones.
+
+    """
+
+    def __init__(self, max_tiles: int = 1 << 24) -> None:
+        self.max_tiles = max_tiles
+        self.ntiles = 0
+        self.free: Dict[Tuple[str, Tuple[int, ...]], Deque[Board]] = {}
+        self.nreused = 0
+
+    def __len__(self) -> int:
+        return sum(map(len, self.free.values()))
+
+    def acquire(
+        self,
+        nrows: int,
+        ncolumns: int,
+        nmines: int,
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        graph: Optional[Graph] = None,
+    ) -> Board:  # noqa: D213
+        """Return a new board, reusing a released one if possible.
+
+        The arguments are those of :class:`~pysweeper.pysweeper.Board`, and
+        the board is the same as the one they construct.
+
+        """
+        if graph is None:
+            graph = rectangular(nrows, ncolumns)
+        key = graph.topology, graph.shape
+        boards = self.free.get(key)
+        if not boards or (graph.nrows, graph.ncolumns) != (nrows, ncolumns):
+            return Board(
+                nrows,
+                ncolumns,
+                nmines,
+                seed=seed,
+                first_click=first_click,
+                graph=graph,
+            )
+        board = boards.pop()
+        if not boards:
+            del self.free[key]
+        self.ntiles -= board.ntiles
+        self.nreused += 1
+        board.reset(nmines, seed=seed, first_click=first_click)
+        return board
+
+    def release(self, board: Board) -> None:  # noqa: D213
+        """Keep `board` for a later game.
+
+        The board must not be used after it is released, its arrays will
+        belong to another game.
+
+        """
+        if type(board) is not Board or board.ntiles > self.max_tiles:
+            return
+        graph = board.graph
+        if graph.topology not in TOPOLOGIES:
+            return
+        # the hooks hold references back to the board
+        if board.log is not None:
+            board.log.detach()
+        if board.history is not None:
+            board.history.detach()
+        free = self.free
+        while self.ntiles + board.ntiles > self.max_tiles:
+            key = next(iter(free))
+            self.ntiles -= free[key].popleft().ntiles
+            if not free[key]:
+                del free[key]
+        key = graph.topology, graph.shape
+        # keep the most recently released shapes last, to be dropped last
+        free[key] = free.pop(key, collections.deque())
+        free[key].append(board)
+        self.ntiles += board.ntiles
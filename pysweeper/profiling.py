@@ -0,0 +1,132 @@
+"""Reproducible headless sessions for profiling PySweeper.
+
+Every session plays tiles in an order drawn from a seeded random number
+generator, flagging mines and exposing everything else, so a game always runs
+until it is won and the same arguments always profile the same work. Games
+can also be replayed from a game log, or played by clicking through the UI
+widgets and rendering the screen after each click, the way urwid would.
+
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+
+from typing import Callable, Iterable, List, Optional, Union
+
+from . import log, pysweeper, ui
+from .pysweeper import COVERED, Board
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+#: Modules whose functions are summarized by default.
+MODULES = pysweeper, ui
+
+
+def play_order(board: Board, rng: random.Random) -> List[int]:
+    """Return the vertices of `board` in the order a session plays them."""
+    order = list(range(board.ntiles))
+    rng.shuffle(order)
+    # start with an exposure, mines moved by the first click policy never
+    # land on tiles that were flagged before it
+    mines = board.mines
+    first = next((i for i, v in enumerate(order) if not mines[v]), 0)
+    order[0], order[first] = order[first], order[0]
+    return order
+
+
+def play(board: Board, rng: random.Random) -> Board:
+    """Play `board` to a win, flagging mines and exposing other tiles."""
+    coordinate = board.graph.coordinate
+    mines = board.mines
+    for v in play_order(board, rng):
+        if board.visible[v] == COVERED:
+            if mines[v]:
+                board.flag_vertex(v)
+            else:
+                board.expose(*coordinate(v))
+    return board
+
+
+def play_ui(session: ui.PySweeperUI, rng: random.Random) -> ui.PySweeperUI:
+    """Play the board of `session` to a win by clicking its tiles."""
+    board = session.board
+    coordinate = board.graph.coordinate
+    top = session.loop.widget
+    size = (5 * board.ncolumns + 3, 3 * board.nrows + 1)
+    top.render(size, focus=True)
+    for v in play_order(board, rng):
+        widget = session.widgets[coordinate(v)]
+        if board.visible[v] == COVERED:
+            if board.mines[v]:
+                session.on_right_click(widget)
+            else:
+                session.on_left_click(widget)
+            top.render(size, focus=True)
+    return session
+
+
+def replay(path: PathLike) -> List[Board]:
+    """Replay every game in the game log at `path`."""
+    return list(log.replay(path))
+
+
+def run(
+    session: Callable[[], object], path: Optional[PathLike] = None
+) -> pstats.Stats:
+    """Profile a call to `session`, saving the statistics to `path`."""
+    profiler = cProfile.Profile()
+    profiler.runcall(session)
+    stats = pstats.Stats(profiler)
+    if path is not None:
+        stats.dump_stats(os.fspath(path))
+    return stats
+
+
+def summary(  # noqa: D213
+    stats: pstats.Stats,
+    modules: Iterable[object] = MODULES,
+    top: int = 20,
+    sort: str = "tottime",
+) -> str:
+    """Format the `top` functions of `modules` sorted by `sort`.
+
+    `sort` is ``"tottime"``, ``"cumtime"`` or ``"ncalls"``.
+
+    """
+    files = {
+        os.path.abspath(getattr(module, "__file__")) for module in modules
+    }
+    key = {"tottime": 2, "cumtime": 3, "ncalls": 1}[sort]
+    rows = sorted(
+        (
+            (
+                f"{os.path.basename(filename)}:{line}({name})",
+                ncalls,
+                tottime,
+                cumtime,
+            )
+            for (filename, line, name), (
+                _,
+                ncalls,
+                tottime,
+                cumtime,
+                _,
+            ) in getattr(stats, "stats").items()
+            if os.path.abspath(filename) in files
+        ),
+        key=lambda row: row[key],
+        reverse=True,
+    )[:top]
+    out = io.StringIO()
+    print(
+        f"{'ncalls':>10} {'tottime':>9} {'cumtime':>9}  function", file=out
+    )
+    for function, ncalls, tottime, cumtime in rows:
+        print(
+            f"{ncalls:>10d} {tottime:>9.3f} {cumtime:>9.3f}  {function}",
+            file=out,
+        )
+    return out.getvalue()
@@ -1,67 +1,485 @@
 """Sweep some mines, terminal style."""
 
-from typing import FrozenSet, MutableSet, Tuple
-
-import collections
-import dataclasses
-import itertools
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableSet,
+    NamedTuple,
+    TYPE_CHECKING,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
+
+import array
+import enum
+import functools
 import random
 
+from .graph import Coordinate, Graph, rectangular
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .history import History
+    from .log import GameLog
 
-Coordinate = Tuple[int, int]
 
+# Observation codes of tiles that do not show their adjacent mine count
+#: A covered tile.
+COVERED = 0xFF
 
-@dataclasses.dataclass
-class Tile:
-    """A minesweeper tile."""
+#: A covered, flagged tile.
+FLAGGED = 0xFE
 
-    adjacent_tiles: FrozenSet[Coordinate]
-    mine: bool = False
-    exposed: bool = False
-    flagged: bool = False
-    adjacent_mines: FrozenSet[Coordinate] = frozenset()
+#: An exposed mine.
+MINE = 0xFD
 
+#: The type of the per tile state arrays of a board.
+StateArray = Union[bytearray, memoryview]
 
-def adjacent(
-    i: int, j: int, nrows: int, ncolumns: int
-) -> FrozenSet[Coordinate]:
-    """Compute the tiles that are adjacent to the tile at `i`, `j`.
 
-    Coordinates are bound between `nrows` and `ncolumns` on the rows and
-    columns axes, respectively.
+class Tile:  # noqa: D213
+    """A view of a single tile on a board.
+
+    Tiles hold no state of their own, reading or writing an attribute goes
+    straight to the arrays of the board.
 
     """
-    increments = 1, -1, 0
-    return frozenset(
-        (i + x, j + y)
-        for x in increments
-        for y in increments
-        if x or y
-        if 0 <= i + x < nrows
-        if 0 <= j + y < ncolumns
-    )
 
+    __slots__ = "board", "index"
+
+    def __init__(self, board: "Board", index: int) -> None:
+        self.board = board
+        self.index = index
+
+    def __repr__(self) -> str:
+        return (
+            f"Tile(position={self.position}, mine={self.mine}, "
+            f"exposed={self.exposed}, flagged={self.flagged}, "
+            f"adjacent_mine_count={self.adjacent_mine_count})"
+        )
+
+    @property
+    def position(self) -> Coordinate:
+        """Return the coordinate of the tile."""
+        return self.board.graph.coordinate(self.index)
+
+    @property
+    def adjacent_tiles(self) -> FrozenSet[Coordinate]:
+        """Return the coordinates of the adjacent tiles."""
+        graph = self.board.graph
+        return frozenset(map(graph.coordinate, graph.neighbours(self.index)))
+
+    @property
+    def adjacent_mines(self) -> FrozenSet[Coordinate]:
+        """Return the coordinates of the adjacent mines."""
+        board = self.board
+        graph = board.graph
+        mines = board.mines
+        return frozenset(
+            graph.coordinate(v)
+            for v in graph.neighbours(self.index)
+            if mines[v]
+        )
+
+    @property
+    def adjacent_mine_count(self) -> int:
+        """Return the number of adjacent mines."""
+        return self.board.counts[self.index]
+
+    @property
+    def mine(self) -> bool:
+        """Return whether the tile is a mine."""
+        return bool(self.board.mines[self.index])
+
+    @property
+    def exposed(self) -> bool:
+        """Return whether the tile is exposed."""
+        return bool(self.board.exposed[self.index])
+
+    @exposed.setter
+    def exposed(self, exposed: bool) -> None:
+        self.board.set_exposed(self.index, exposed)
+
+    @property
+    def flagged(self) -> bool:
+        """Return whether the tile is flagged."""
+        return bool(self.board.flagged[self.index])
+
+    @flagged.setter
+    def flagged(self, flagged: bool) -> None:
+        self.board.set_flagged(self.index, flagged)
+
+
+class Grid(Mapping[Coordinate, Tile]):
+    """A mapping from coordinates to tile views, in row major order."""
+
+    __slots__ = ("board",)
+
+    def __init__(self, board: "Board") -> None:
+        self.board = board
+
+    def __getitem__(self, coord: Coordinate) -> Tile:
+        try:
+            index = self.board.graph.index(*coord)
+        except IndexError:
+            raise KeyError(coord)
+        return Tile(self.board, index)
+
+    def __iter__(self) -> Iterator[Coordinate]:
+        return map(self.board.graph.coordinate, range(len(self)))
+
+    def __len__(self) -> int:
+        return self.board.ntiles
+
+
+class FirstClick(enum.Enum):
+    """Policies for the first exposure on a board."""
+
+    #: The first click may hit a mine.
+    UNSAFE = "unsafe"
+
+    #: The first click never hits a mine.
+    SAFE = "safe"
+
+    #: The first click never hits a mine or a tile adjacent to one.
+    OPENING = "opening"
+
+
+class Action(enum.Enum):
+    """Kinds of moves a player can make on a tile."""
+
+    EXPOSE = "expose"
+    FLAG = "flag"
+    CHORD = "chord"
+
+
+#: A move: an action and the coordinate of the tile it applies to.
+Move = Tuple[Action, int, int]
+
+
+class Changes(NamedTuple):
+    """The tiles changed by a sequence of moves, as vertices."""
+
+    #: Newly exposed vertices, in the order they were exposed.
+    exposed: "array.array[int]"
+
+    #: Vertices whose flag was toggled, in the order they were toggled.
+    flagged: "array.array[int]"
+
+    #: Number of moves applied, including one that exposed a mine.
+    napplied: int
+
+    #: Whether a mine was exposed.
+    lost: bool
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+# the number of bytes state arrays are reset by at a time
+_FILL_CHUNK = 1 << 16
+
+_FILL_PATTERNS = {
+    value: memoryview(bytes([value]) * _FILL_CHUNK) for value in (0, COVERED)
+}
+
+
+def _fill(array: Union[bytearray, memoryview], value: int) -> None:
+    """Set every byte of `array` to `value` in place, a chunk at a time."""
+    view = memoryview(array)
+    pattern = _FILL_PATTERNS[value]
+    size = len(view)
+    for start in range(0, size - _FILL_CHUNK + 1, _FILL_CHUNK):
+        view[start : start + _FILL_CHUNK] = pattern
+    tail = size % _FILL_CHUNK
+    if tail:
+        view[size - tail :] = pattern[:tail]
 
-class Board:
-    """A minesweeper board."""
 
-    def __init__(self, nrows: int, ncolumns: int, nmines: int) -> None:
+def undoable(method: F) -> F:
+    """Make each call of a board method one step of the board's history."""
+
+    @functools.wraps(method)
+    def wrapper(self: "Board", *args: Any, **kwargs: Any) -> Any:
+        history = self.history
+        if history is None:
+            return method(self, *args, **kwargs)
+        history.begin()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            history.commit()
+
+    return cast(F, wrapper)
+
+
+class Board:  # noqa: D213
+    """A minesweeper board.
+
+    Tiles are the vertices of `graph` and their state is kept in one byte
+    array per attribute, indexed by vertex. What a player sees of each tile
+    is kept up to date in `visible`, as :data:`COVERED`, :data:`FLAGGED`,
+    :data:`MINE` or the adjacent mine count of an exposed tile.
+
+    """
+
+    def __init__(
+        self,
+        nrows: int,
+        ncolumns: int,
+        nmines: int,
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        graph: Optional[Graph] = None,
+    ) -> None:
+        if graph is None:
+            graph = rectangular(nrows, ncolumns)
+        elif (graph.nrows, graph.ncolumns) != (nrows, ncolumns):
+            raise ValueError(
+                f"Graph {graph!r} does not have {nrows} rows and "
+                f"{ncolumns} columns"
+            )
+        self.graph = graph
         self.nrows = nrows
         self.ncolumns = ncolumns
-        self.grid = {
-            (x, y): Tile(adjacent_tiles=adjacent(x, y, nrows, ncolumns))
-            for i, (x, y) in enumerate(
-                itertools.product(range(nrows), range(ncolumns))
-            )
-        }
-        for tile in random.choices(list(self.grid.values()), k=nmines):
-            tile.mine = True
-        for tile in self.grid.values():
-            tile.adjacent_mines = frozenset(
-                coord for coord in tile.adjacent_tiles if self.grid[coord].mine
-            )
-        self.nmines = nmines
+        self.first_click = first_click
+        self.started = False
+        self.log: Optional["GameLog"] = None
+        self.history: Optional["History"] = None
+        if seed is None:
+            seed = random.randrange(2 ** 64)
+        self.seed = seed
+        self.random = random.Random(seed)
+
+        ntiles = graph.ntiles
+        (
+            self.mines,
+            self.counts,
+            self.exposed,
+            self.flagged,
+            self.visible,
+        ) = self.allocate(ntiles)
+        self.nmines = 0
         self.nflagged = 0
+        self.nexposed = 0
+        self.ncorrectly_flagged = 0
+        self.place_mines(self.random.sample(range(ntiles), k=nmines))
+
+    @classmethod
+    def from_mines(
+        cls,
+        nrows: int,
+        ncolumns: int,
+        mines: Iterable[Coordinate],
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        graph: Optional[Graph] = None,
+    ) -> "Board":
+        """Construct a board with mines at the coordinates in `mines`."""
+        board = cls(
+            nrows, ncolumns, 0, seed=seed, first_click=first_click, graph=graph
+        )
+        board.lay_mines(mines)
+        return board
+
+    def allocate(self, ntiles: int) -> Tuple[StateArray, ...]:  # noqa: D213
+        """Return the state arrays of a board with `ntiles` tiles.
+
+        These are the `mines`, `counts`, `exposed`, `flagged` and `visible`
+        arrays, in that order. Subclasses override this to keep the state
+        somewhere other than private bytearrays.
+
+        """
+        return (
+            bytearray(ntiles),
+            bytearray(ntiles),
+            bytearray(ntiles),
+            bytearray(ntiles),
+            bytearray([COVERED]) * ntiles,
+        )
+
+    def reset(
+        self,
+        nmines: int,
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+    ) -> None:  # noqa: D213
+        """Start a new game on the board, reusing its state arrays.
+
+        The arrays are overwritten in place and the mines placed as a board
+        constructed with the same arguments would place them, so nothing
+        per tile is allocated. A game log or history attached to the board
+        is detached, as the new game is not the one they recorded.
+
+        """
+        if self.log is not None:
+            self.log.detach()
+        if self.history is not None:
+            self.history.detach()
+        if seed is None:
+            seed = random.randrange(2 ** 64)
+        self.seed = seed
+        self.random.seed(seed)
+        self.first_click = first_click
+        self.started = False
+
+        _fill(self.mines, 0)
+        _fill(self.counts, 0)
+        # nothing else changes until a tile is exposed or flagged
+        if self.nexposed or self.nflagged:
+            _fill(self.exposed, 0)
+            _fill(self.flagged, 0)
+            _fill(self.visible, COVERED)
+        self.nmines = 0
+        self.nflagged = 0
+        self.nexposed = 0
+        self.ncorrectly_flagged = 0
+        self.place_mines(self.random.sample(range(self.ntiles), k=nmines))
+
+    @property
+    def grid(self) -> Grid:
+        """Return a mapping from coordinates to tiles."""
+        return Grid(self)
+
+    @property
+    def observation(self) -> memoryview:  # noqa: D213
+        """Return an `nrows` by `ncolumns` view of the visible tiles.
+
+        The view shares memory with `visible`, so it reflects every later
+        move without being fetched again.
+
+        """
+        return memoryview(self.visible).cast("B", (self.nrows, self.ncolumns))
+
+    def coordinates(self, vertices: Iterable[int]) -> MutableSet[Coordinate]:
+        """Return the coordinates of `vertices`."""
+        return set(map(self.graph.coordinate, vertices))
+
+    def lay_mines(self, mines: Iterable[Coordinate]) -> None:
+        """Place mines at every coordinate in `mines`."""
+        index = self.graph.index
+        self.place_mines(index(i, j) for i, j in mines)
+
+    def place_mines(self, vertices: Iterable[int]) -> None:
+        """Place mines on every vertex in `vertices`."""
+        mines = self.mines
+        counts = self.counts
+        exposed = self.exposed
+        neighbours = self.graph.neighbours
+        for v in vertices:
+            if not mines[v]:
+                mines[v] = 1
+                self.nmines += 1
+                for u in neighbours(v):
+                    counts[u] += 1
+                    if exposed[u]:
+                        self.show(u)
+                if exposed[v]:
+                    self.show(v)
+
+    def move_mine(
+        self, source: Coordinate, target: Coordinate
+    ) -> None:  # noqa: D213
+        """Move the mine at `source` to the empty tile at `target`.
+
+        Only the mine counts of the tiles around `source` and `target` are
+        updated.
+
+        """
+        index = self.graph.index
+        self.move_mine_vertex(index(*source), index(*target))
+
+    def move_mine_vertex(self, source: int, target: int) -> None:
+        """Move the mine on vertex `source` to the empty vertex `target`."""
+        mines = self.mines
+        counts = self.counts
+        flagged = self.flagged
+        neighbours = self.graph.neighbours
+        assert mines[source], f"No mine on vertex {source}"
+        assert not mines[target], f"Vertex {target} is already a mine"
+        if self.log is not None:
+            self.log.record_mine_move(source, target)
+        if self.history is not None:
+            self.history.mine_moves.append((source, target))
+        mines[source] = 0
+        for u in neighbours(source):
+            counts[u] -= 1
+            self.show(u)
+        mines[target] = 1
+        for u in neighbours(target):
+            counts[u] += 1
+            self.show(u)
+        self.show(source)
+        self.show(target)
+        self.ncorrectly_flagged += flagged[target] - flagged[source]
+
+    def clear_first_click(self, i: int, j: int) -> None:  # noqa: D213
+        """Relocate the mines that `first_click` forbids around `i`, `j`.
+
+        Each mine is moved to a uniformly chosen tile outside the protected
+        area by rejection sampling, so the cost depends on the mine density
+        and not on the size of the board. An opening that does not fit among
+        the free tiles falls back to clearing the clicked tile alone, as
+        :attr:`FirstClick.SAFE` does, and mines stay put if there is nowhere
+        left to move even that one.
+
+        """
+        mines = self.mines
+        v = self.graph.index(i, j)
+        protected = {v}
+        if self.first_click is FirstClick.OPENING:
+            protected.update(self.graph.neighbours(v))
+        displaced = [u for u in protected if mines[u]]
+        free = self.ntiles - self.nmines - (len(protected) - len(displaced))
+        if free < len(displaced):
+            protected = {v}
+            displaced = [v] if mines[v] else []
+            free = self.ntiles - self.nmines - 1 + len(displaced)
+            if free < len(displaced):
+                return
+
+        randrange = self.random.randrange
+        ntiles = self.ntiles
+        for source in displaced:
+            target = randrange(ntiles)
+            while target in protected or mines[target]:
+                target = randrange(ntiles)
+            self.move_mine_vertex(source, target)
+
+    def show(self, v: int) -> None:
+        """Update what is visible of vertex `v` from its state."""
+        if self.exposed[v]:
+            self.visible[v] = MINE if self.mines[v] else self.counts[v]
+        else:
+            self.visible[v] = FLAGGED if self.flagged[v] else COVERED
+
+    def set_exposed(self, v: int, exposed: bool) -> None:
+        """Set whether vertex `v` is exposed."""
+        if self.exposed[v] != exposed:
+            self.exposed[v] = exposed
+            self.nexposed += 1 if exposed else -1
+            self.show(v)
+            if self.history is not None:
+                self.history.toggles.append(v)
+
+    def set_flagged(self, v: int, flagged: bool) -> None:
+        """Set whether vertex `v` is flagged."""
+        if self.flagged[v] != flagged:
+            self.flagged[v] = flagged
+            self.show(v)
+            if self.history is not None:
+                self.history.toggles.append(~v)
+            change = 1 if flagged else -1
+            self.nflagged += change
+            if self.mines[v]:
+                self.ncorrectly_flagged += change
 
     @property
     def unexposed_tiles(self) -> int:
@@ -81,7 +499,7 @@ class Board:
     @property
     def total_exposed(self) -> int:
         """Return the total number of tiles exposed."""
-        return sum(tile.exposed for tile in self.grid.values())
+        return self.nexposed
 
     @property
     def win(self) -> bool:  # noqa: D213
@@ -91,15 +509,20 @@ class Board:
         are exposed.
 
         """
-        correctly_flagged_mines = sum(
-            tile.flagged and tile.mine for tile in self.grid.values()
-        )
         exposed_or_correctly_flagged = (
-            self.total_exposed + correctly_flagged_mines
+            self.nexposed + self.ncorrectly_flagged
         )
         assert exposed_or_correctly_flagged <= self.ntiles
         return self.ntiles == exposed_or_correctly_flagged
 
+    def start(self, i: int, j: int) -> None:
+        """Apply the first click policy if `i`, `j` is the first exposure."""
+        if not self.started:
+            self.started = True
+            if self.first_click is not FirstClick.UNSAFE:
+                self.clear_first_click(i, j)
+
+    @undoable
     def expose(self, i: int, j: int) -> MutableSet[Coordinate]:  # noqa: D213
         """Tile exposure algorithm.
 
@@ -115,52 +538,222 @@ class Board:
         3. Else expose the tile
 
         """
-        grid = self.grid
+        v = self.graph.index(i, j)
+
+        self.start(i, j)
+        if self.log is not None:
+            self.log.record(Action.EXPOSE, v)
 
         # return early if we exposed a mine
-        if grid[i, j].mine:
-            grid[i, j].exposed = True
+        if self.mines[v]:
+            self.set_exposed(v, True)
             return {(i, j)}
 
-        seen: MutableSet[Coordinate] = set()
-        coordinates = collections.deque([(i, j)])
-        exposed = set()
-
-        while coordinates:
-            coord = coordinates.popleft()
-            x, y = coord
-            tile = grid[x, y]
-            if coord not in seen:
-                seen.add(coord)
-                grid[coord].exposed = tile_exposed = not (
-                    tile.mine or tile.flagged
-                )
-                if tile_exposed:
-                    exposed.add(coord)
-
-                if not tile.adjacent_mines:
-                    coordinates.extend(
-                        coord
-                        for coord in tile.adjacent_tiles
-                        if coord not in seen
-                    )
-        return exposed
+        return self.coordinates(self.flood_vertices([v]))
+
+    @undoable
+    def flood(
+        self, coordinates: Iterable[Coordinate]
+    ) -> MutableSet[Coordinate]:  # noqa: D213
+        """Expose every tile reachable from `coordinates`.
+
+        All starting tiles share a single breadth-first traversal, so
+        overlapping openings are only walked once. Floods are not moves a
+        :class:`~pysweeper.log.GameLog` can record, so boards being logged
+        refuse them.
+
+        """
+        if self.log is not None:
+            raise ValueError("Floods of a logged board cannot be replayed")
+        index = self.graph.index
+        return self.coordinates(
+            self.flood_vertices(index(i, j) for i, j in coordinates)
+        )
+
+    def flood_vertices(
+        self,
+        vertices: Iterable[int],
+        seen: Optional[MutableSet[int]] = None,
+        changes: Optional[List[int]] = None,
+    ) -> List[int]:  # noqa: D213
+        """Expose every vertex reachable from `vertices`.
+
+        The traversal spreads through tiles without adjacent mines. Mines
+        stop it and are never exposed, flagged tiles let it through but stay
+        covered.
+
+        Vertices in `seen` are skipped and every visited vertex is added to
+        it, which lets several floods share one traversal. Newly exposed
+        vertices are appended to `changes` if given.
+
+        """
+        mines = self.mines
+        counts = self.counts
+        exposed = self.exposed
+        flagged = self.flagged
+        visible = self.visible
+        neighbours = self.graph.neighbours
+
+        if seen is None:
+            seen = set()
+        frontier = []
+        for v in vertices:
+            if v not in seen and not mines[v]:
+                seen.add(v)
+                frontier.append(v)
+
+        # vertices are marked as seen when they are queued, so each one is
+        # visited at most once
+        result = []
+        fresh = []
+        while frontier:
+            following = []
+            for v in frontier:
+                if not flagged[v]:
+                    if not exposed[v]:
+                        exposed[v] = 1
+                        visible[v] = counts[v]
+                        fresh.append(v)
+                    result.append(v)
+
+                # neighbours of a tile without adjacent mines are never mines
+                if not counts[v]:
+                    for u in neighbours(v):
+                        if u not in seen:
+                            seen.add(u)
+                            following.append(u)
+            frontier = following
+
+        self.nexposed += len(fresh)
+        if changes is not None:
+            changes.extend(fresh)
+        if self.history is not None:
+            self.history.toggles.extend(fresh)
+        return result
+
+    @undoable
+    def chord(self, i: int, j: int) -> MutableSet[Coordinate]:  # noqa: D213
+        """Expose the unflagged neighbours of the numbered tile at `i`, `j`.
+
+        Nothing happens unless the tile is exposed and the number of flags
+        around it equals its number of adjacent mines. If any of the flags
+        are wrong, the mines they leave uncovered are exposed and included in
+        the result.
+
+        """
+        v = self.graph.index(i, j)
+        if self.log is not None:
+            self.log.record(Action.CHORD, v)
+        covered = self.chord_targets(v)
+        result = self.flood_vertices(covered)
+        mines = self.mines
+        for u in covered:
+            if mines[u]:
+                self.set_exposed(u, True)
+                result.append(u)
+        return self.coordinates(result)
+
+    def chord_targets(self, v: int) -> List[int]:
+        """Return the vertices a chord on vertex `v` would expose."""
+        exposed = self.exposed
+        flagged = self.flagged
+        if not exposed[v] or self.mines[v]:
+            return []
+
+        neighbours = self.graph.neighbours(v)
+        nflags = sum(flagged[u] for u in neighbours)
+        if nflags != self.counts[v]:
+            return []
+        return [u for u in neighbours if not exposed[u] and not flagged[u]]
+
+    @undoable
+    def apply_moves(self, moves: Iterable[Move]) -> Changes:  # noqa: D213
+        """Apply a sequence of moves, stopping at the first mine exposed.
+
+        The result is the same as making the moves one at a time, but runs
+        of exposures are gathered and flooded together, and all floods share
+        one set of visited vertices, so tiles opened by an earlier move are
+        not walked again.
+
+        """
+        index = self.graph.index
+        mines = self.mines
+        flagged = self.flagged
+        log = self.log
+        seen: MutableSet[int] = set()
+        exposed: List[int] = []
+        toggled: List[int] = []
+        pending: List[int] = []
+        napplied = 0
+        lost = False
+
+        def flush() -> None:
+            if pending:
+                self.flood_vertices(pending, seen=seen, changes=exposed)
+                pending.clear()
+
+        for action, i, j in moves:
+            v = index(i, j)
+            napplied += 1
+            if action is Action.EXPOSE:
+                self.start(i, j)
+                if log is not None:
+                    log.record(action, v)
+                targets = [v]
+            elif action is Action.CHORD:
+                flush()
+                if log is not None:
+                    log.record(action, v)
+                targets = self.chord_targets(v)
+            else:
+                flush()
+                was_flagged = flagged[v]
+                self.flag_vertex(v)
+                if flagged[v] != was_flagged:
+                    toggled.append(v)
+                    # a flood through v would now expose it, so walks
+                    # that skipped it have to be repeated
+                    if v in seen:
+                        seen.clear()
+                continue
+
+            hit = [u for u in targets if mines[u]]
+            pending.extend(targets)
+            if hit:
+                flush()
+                for u in hit:
+                    if not self.exposed[u]:
+                        self.set_exposed(u, True)
+                        exposed.append(u)
+                lost = True
+                break
+
+        flush()
+        return Changes(
+            array.array("i", exposed),
+            array.array("i", toggled),
+            napplied,
+            lost,
+        )
 
     def flag(self, i: int, j: int) -> bool:
         """Flag the tile at coordinate `i`, `j`."""
-        grid = self.grid
+        return self.flag_vertex(self.graph.index(i, j))
+
+    @undoable
+    def flag_vertex(self, v: int) -> bool:
+        """Toggle the flag on vertex `v`."""
+        if self.log is not None:
+            self.log.record(Action.FLAG, v)
         nflagged = self.nflagged
-        tile = grid[i, j]
-        was_flagged = tile.flagged
+        was_flagged = self.flagged[v]
         flagged = not was_flagged
         nmines = self.nmines
 
         if was_flagged:
             if nflagged - 1 >= 0:
-                grid[i, j].flagged = flagged
-                self.nflagged -= 1
+                self.set_flagged(v, flagged)
         else:
-            if nflagged + 1 <= nmines and not tile.exposed:
-                grid[i, j].flagged = flagged
-                self.nflagged += 1
+            if nflagged + 1 <= nmines and not self.exposed[v]:
+                self.set_flagged(v, flagged)
         return flagged
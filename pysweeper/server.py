@@ -0,0 +1,751 @@
+"""Hosting many games over TCP or Unix sockets with asyncio.
+
+Clients send one JSON object per line and get one back per line, in order.
+Every request has an ``op`` and may carry an ``id`` that is echoed in the
+reply:
+
+* ``{"op": "new", "rows": 16, "columns": 30, "mines": 99}`` starts a game,
+  optionally with a ``seed``, ``first_click`` policy and ``topology``, and
+  replies with its ``game`` id. Any connection can play any game, set
+  ``coop`` for games played by several players at once.
+* ``{"op": "expose", "game": 0, "row": 3, "column": 4}``, and likewise
+  ``flag`` and ``chord``, apply a move.
+* ``{"op": "moves", "game": 0, "moves": [["expose", 3, 4], ...]}`` applies
+  several moves at once, stopping at the first mine.
+* ``{"op": "close", "game": 0}`` ends a game.
+* ``{"op": "observe", "game": 0}`` replies with the ``version`` of a game,
+  the number of moves that changed it, and a base64 encoded
+  :mod:`~pysweeper.delta` ``keyframe`` of it.
+* ``{"op": "watch", "game": 0}`` and ``{"op": "unwatch", "game": 0}``
+  start and stop spectating a game.
+
+Moves reply with the ``cells`` they changed as ``[row, column, code]``
+triples, where the code is what :attr:`~pysweeper.pysweeper.Board.visible`
+holds for the tile, along with the ``state`` of the game, ``"playing"``,
+``"won"`` or ``"lost"``, and the number of ``flags`` left. Failed requests
+reply with an ``error``.
+
+Spectators receive ``{"game": 0, "frame": "..."}`` lines between replies,
+each holding a base64 encoded :mod:`~pysweeper.delta` frame, starting with a
+keyframe. Spectators that read slowly get merged deltas or a fresh keyframe,
+see :mod:`~pysweeper.broadcast`, and never hold up the players.
+
+The moves of a cooperative game are queued and applied in arrival order by
+a task of its own, whichever connection they come from, while observations
+are served from a copy of the board taken once per version and compressed
+in a thread.
+
+Given a metrics port, the server also answers ``GET /metrics`` there with
+the counts and latencies of the requests it served and the state of its
+games, in the OpenMetrics text format, see :mod:`~pysweeper.metrics`.
+
+"""
+
+import asyncio
+import base64
+import collections
+import contextlib
+import functools
+import itertools
+import json
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from . import delta
+from .broadcast import Broadcast, Subscriber
+from .graph import TOPOLOGIES
+from .metrics import CONTENT_TYPE, Metrics, Sample
+from .pool import BoardPool
+from .pysweeper import Action, Board, Changes, FirstClick, Move
+
+Message = Dict[str, Any]
+
+_ACTIONS = {action.name.lower(): action for action in Action}
+
+#: The operations metrics are kept for, others are counted as ``unknown``.
+OPERATIONS = (
+    *_ACTIONS,
+    "moves",
+    "new",
+    "close",
+    "observe",
+    "watch",
+    "unwatch",
+)
+
+#: The longest request line accepted, longer ones are answered with an error.
+LIMIT = 1 << 20
+
+#: The longest reply a client accepts, a flood can change every tile.
+REPLY_LIMIT = 1 << 30
+
+
+class ProtocolError(ValueError):
+    """A request that cannot be carried out."""
+
+
+def _action(name: str) -> Action:
+    try:
+        return _ACTIONS[name]
+    except (KeyError, TypeError):
+        raise ProtocolError(f"Unknown move {name!r}")
+
+
+class Game:  # noqa: D213
+    """A hosted board and what the server tracks about it.
+
+    :attr:`version` counts the moves that changed the board, and snapshots
+    of what it looks like are shared by every reader until it changes.
+
+    """
+
+    def __init__(self, board: Board) -> None:
+        self.board = board
+        self.lost = False
+        self.version = 0
+        self.broadcast: Optional[Broadcast] = None
+        self.writer: Optional["Writer"] = None
+        self._snapshot: Optional[Tuple[int, "asyncio.Future[bytes]"]] = None
+
+    def snapshot(self) -> "asyncio.Future[bytes]":  # noqa: D213
+        """Return a keyframe of the current version of the board.
+
+        The visible tiles are copied once per version and compressed in a
+        thread, so reads never hold up the moves being applied meanwhile.
+
+        """
+        snapshot = self._snapshot
+        if snapshot is None or snapshot[0] != self.version:
+            board = self.board
+            keyframe = asyncio.get_event_loop().run_in_executor(
+                None,
+                delta.encode_keyframe,
+                self.version,
+                board.nrows,
+                board.ncolumns,
+                bytes(board.visible),
+            )
+            snapshot = self._snapshot = self.version, keyframe
+        return snapshot[1]
+
+
+class Writer:  # noqa: D213
+    """The task applying every move of a cooperative game, in order.
+
+    Moves submitted by any number of players are queued and applied by
+    `apply` one request at a time, all of the requests that arrived since
+    the task last ran being handled in one go.
+
+    """
+
+    def __init__(self, apply: Callable[[Message], Message]) -> None:
+        self.apply = apply
+        self.queue: Deque[Tuple[Message, "asyncio.Future[Message]"]] = (
+            collections.deque()
+        )
+        self.ready = asyncio.Event()
+        self.task = asyncio.ensure_future(self.run())
+
+    def submit(self, request: Message) -> "asyncio.Future[Message]":
+        """Queue a move request and return its future reply."""
+        reply = asyncio.get_event_loop().create_future()
+        self.queue.append((request, reply))
+        self.ready.set()
+        return reply
+
+    async def run(self) -> None:
+        """Apply queued moves until cancelled."""
+        queue = self.queue
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+            while queue:
+                request, reply = queue.popleft()
+                if reply.done():
+                    continue
+                # a request failing must not stop the moves of the others
+                try:
+                    reply.set_result(self.apply(request))
+                except Exception as e:
+                    reply.set_exception(e)
+
+    def close(self) -> None:
+        """Stop the task, failing the moves still queued."""
+        self.task.cancel()
+        for request, reply in self.queue:
+            # the requester may have given up on the reply already
+            if not reply.done():
+                reply.set_result(_respond(request, _closed))
+        self.queue.clear()
+
+
+def _respond(
+    request: Message, compute: Callable[[Message], Message]
+) -> Message:
+    """Return the reply `compute` makes to `request`, or the error raised."""
+    try:
+        reply = compute(request)
+    except KeyError as e:
+        reply = {"error": f"Missing field {e}"}
+    except (ArithmeticError, TypeError, ValueError) as e:
+        reply = {"error": str(e)}
+    if "id" in request:
+        reply["id"] = request["id"]
+    return reply
+
+
+def _closed(request: Message) -> Message:
+    raise ProtocolError("The game was closed")
+
+
+class GameServer:  # noqa: D213
+    """The games hosted by a server, shared by all of its connections.
+
+    :meth:`handle` applies a decoded request and returns the reply, the
+    socket plumbing lives in :meth:`start`.
+
+    """
+
+    def __init__(self) -> None:
+        self.games: Dict[int, Game] = {}
+        self.ids = itertools.count()
+        self.nmoves = 0
+        self.nconnections = 0
+        self.metrics = Metrics(OPERATIONS)
+        self.pool = BoardPool()
+
+    def record(self, op: Any, start: int, reply: Message) -> None:
+        """Count the `reply` to an `op` request handled since `start`."""
+        self.metrics.record(
+            op if isinstance(op, str) else "unknown",
+            time.perf_counter_ns() - start,
+            len(reply.get("cells", ())),
+            "error" in reply,
+        )
+
+    def _record_future(
+        self, op: Any, start: int, reply: "asyncio.Future[Message]"
+    ) -> None:
+        if not reply.cancelled() and reply.exception() is None:
+            self.record(op, start, reply.result())
+
+    def gauges(self) -> List[Sample]:
+        """Return the state of the server, for its metrics."""
+        games = self.games.values()
+        state_bytes = [
+            sum(
+                memoryview(array).nbytes
+                for array in (
+                    board.mines,
+                    board.counts,
+                    board.exposed,
+                    board.flagged,
+                    board.visible,
+                )
+            )
+            for board in (game.board for game in games)
+        ]
+        # graphs are shared between boards of the same shape
+        graphs = {id(game.board.graph): game.board.graph for game in games}
+        queues = [len(game.writer.queue) for game in games if game.writer]
+        broadcasts = [game.broadcast for game in games if game.broadcast]
+        lags = [
+            broadcast.version - max(subscriber.version, 0)
+            for broadcast in broadcasts
+            for subscriber in broadcast.subscribers
+        ]
+        return [
+            ("pysweeper_games", "Games being played.", len(games)),
+            (
+                "pysweeper_coop_games",
+                "Cooperative games being played.",
+                len(queues),
+            ),
+            (
+                "pysweeper_connections",
+                "Open client connections.",
+                self.nconnections,
+            ),
+            (
+                "pysweeper_board_bytes",
+                "Bytes of board state held by the games.",
+                sum(state_bytes),
+            ),
+            (
+                "pysweeper_board_bytes_max",
+                "Bytes of board state held by the largest game.",
+                max(state_bytes, default=0),
+            ),
+            (
+                "pysweeper_graph_bytes",
+                "Bytes of the tile graphs shared by the games.",
+                sum(graph.nbytes for graph in graphs.values()),
+            ),
+            (
+                "pysweeper_writer_queue_depth",
+                "Moves queued for cooperative games.",
+                sum(queues),
+            ),
+            (
+                "pysweeper_writer_queue_depth_max",
+                "Moves queued for the busiest cooperative game.",
+                max(queues, default=0),
+            ),
+            (
+                "pysweeper_pool_bytes",
+                "Bytes of board state kept for new games.",
+                5 * self.pool.ntiles,
+            ),
+            ("pysweeper_spectators", "Spectators watching games.", len(lags)),
+            (
+                "pysweeper_spectator_lag_max",
+                "Moves the furthest behind spectator has not been sent.",
+                max(lags, default=0),
+            ),
+        ]
+
+    def exposition(self) -> str:
+        """Return the metrics of the server in the OpenMetrics format."""
+        return self.metrics.render(
+            counters=[
+                ("pysweeper_moves", "Moves applied to games.", self.nmoves)
+            ],
+            gauges=self.gauges(),
+        )
+
+    def new(self, request: Message) -> Message:
+        """Start a game, played cooperatively if `coop` is set."""
+        rows = int(request["rows"])
+        columns = int(request["columns"])
+        mines = int(request["mines"])
+        topology = request.get("topology", "rectangular")
+        if topology not in TOPOLOGIES or topology == "cubic":
+            raise ProtocolError(f"Unknown topology {topology!r}")
+        if not (0 < rows and 0 < columns and rows * columns <= 1 << 24):
+            raise ProtocolError("Invalid board size")
+        if not 0 <= mines <= rows * columns:
+            raise ProtocolError("Invalid number of mines")
+        board = self.pool.acquire(
+            rows,
+            columns,
+            mines,
+            seed=request.get("seed"),
+            first_click=FirstClick(request.get("first_click", "unsafe")),
+            graph=TOPOLOGIES[topology](rows, columns),
+        )
+        game = Game(board)
+        if request.get("coop"):
+            game.writer = Writer(
+                functools.partial(_respond, compute=self.apply)
+            )
+        id = next(self.ids)
+        self.games[id] = game
+        return {"game": id, "seed": board.seed}
+
+    def game(self, request: Message) -> Game:
+        """Return the game named in `request`."""
+        id = request["game"]
+        try:
+            return self.games[id]
+        except (KeyError, TypeError):
+            raise ProtocolError(f"No game {id!r}")
+
+    def board(self, request: Message) -> Board:
+        """Return the board of the game named in `request`."""
+        return self.game(request).board
+
+    def moves(self, request: Message) -> List[Move]:
+        """Return the moves requested by `request`."""
+        op = request["op"]
+        if op == "moves":
+            return [
+                (_action(action), int(i), int(j))
+                for action, i, j in request["moves"]
+            ]
+        return [(_ACTIONS[op], int(request["row"]), int(request["column"]))]
+
+    def apply(self, request: Message) -> Message:
+        """Apply the moves of `request` to the game it names."""
+        game = self.game(request)
+        if game.lost:
+            raise ProtocolError("The game is over")
+        moves = self.moves(request)
+        board = game.board
+        nrows = board.nrows
+        ncolumns = board.ncolumns
+        for _, i, j in moves:
+            if not (0 <= i < nrows and 0 <= j < ncolumns):
+                raise ProtocolError(f"No tile at {i}, {j}")
+        changes: Changes = board.apply_moves(moves)
+        self.nmoves += changes.napplied
+        coordinate = board.graph.coordinate
+        visible = board.visible
+        changed = [*changes.exposed, *changes.flagged]
+        cells = [[*coordinate(v), visible[v]] for v in changed]
+        if changed:
+            game.version += 1
+            if game.broadcast is not None:
+                game.broadcast.publish(changed)
+        if changes.lost:
+            game.lost = True
+            state = "lost"
+        elif board.win:
+            state = "won"
+        else:
+            state = "playing"
+        return {
+            "cells": cells,
+            "state": state,
+            "flags": board.available_flags,
+        }
+
+    async def observe(self, request: Message) -> Message:
+        """Reply with a keyframe of the game named in `request`."""
+        reply = _respond(
+            request, lambda request: {"version": self.game(request).version}
+        )
+        if "error" not in reply:
+            keyframe = await self.game(request).snapshot()
+            reply["keyframe"] = base64.b64encode(keyframe).decode()
+        return reply
+
+    def close(self, request: Message) -> Message:
+        """End a game."""
+        game = self.game(request)
+        del self.games[request["game"]]
+        if game.broadcast is not None:
+            game.broadcast.close()
+        if game.writer is not None:
+            game.writer.close()
+        self.pool.release(game.board)
+        return {}
+
+    def subscribe(self, request: Message) -> Subscriber:
+        """Add a spectator to the game named in `request`."""
+        game = self.game(request)
+        if game.broadcast is None:
+            game.broadcast = Broadcast(game.board)
+        return game.broadcast.subscribe()
+
+    def unsubscribe(self, id: int, subscriber: Subscriber) -> None:
+        """Remove a spectator of game `id`."""
+        game = self.games.get(id)
+        if game is not None and game.broadcast is not None:
+            game.broadcast.unsubscribe(subscriber)
+            if not game.broadcast.subscribers:
+                game.broadcast = None
+
+    def handle(
+        self,
+        request: Message,
+        watch: Optional[Callable[[Message], Message]] = None,
+    ) -> Union[Message, "asyncio.Future[Message]"]:  # noqa: D213
+        """Carry out `request` and return the reply.
+
+        Moves on cooperative games and observations reply with a future, as
+        they are carried out by other tasks. Spectating depends on the
+        connection, so ``watch`` and ``unwatch`` requests are passed on to
+        `watch` and refused without it.
+
+        """
+        op = request.get("op")
+        if op in _ACTIONS or op == "moves":
+            try:
+                writer = self.game(request).writer
+            except (KeyError, ProtocolError):
+                writer = None
+            if writer is not None:
+                return writer.submit(request)
+            # replies with the error if there is no such game
+            return _respond(request, self.apply)
+        if op == "observe":
+            return asyncio.ensure_future(self.observe(request))
+        if op == "new":
+            return _respond(request, self.new)
+        if op == "close":
+            return _respond(request, self.close)
+        if (op == "watch" or op == "unwatch") and watch is not None:
+            return _respond(request, watch)
+        reply: Message = {"error": f"Unknown op {op!r}"}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:  # noqa: D213
+        """Answer the requests of one client until it disconnects.
+
+        Whatever the client has sent is read at once and all of its complete
+        lines are answered with a single write, so pipelined requests cost
+        one round through the event loop per read rather than per request.
+
+        """
+        handle = self.handle
+        record = self.record
+        perf_counter_ns = time.perf_counter_ns
+        loads = json.loads
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        partial = b""
+        overlong = False
+        watching: Dict[int, Subscriber] = {}
+        forwarders: List["asyncio.Future[None]"] = []
+        # drains from spectator tasks and the request loop must not overlap
+        draining = asyncio.Lock()
+
+        async def forward(game: int, subscriber: Subscriber) -> None:
+            try:
+                async for frame in subscriber.frames():
+                    writer.write(
+                        b'{"game":%d,"frame":"%s"}\n'
+                        % (game, base64.b64encode(frame))
+                    )
+                    async with draining:
+                        await writer.drain()
+            except ConnectionError:
+                pass
+
+        def watch(request: Message) -> Message:
+            game = request["game"]
+            if request["op"] == "watch":
+                if game in watching:
+                    raise ProtocolError(f"Already watching game {game!r}")
+                subscriber = self.subscribe(request)
+                watching[game] = subscriber
+                forwarders.append(
+                    asyncio.ensure_future(forward(game, subscriber))
+                )
+            elif game in watching:
+                self.unsubscribe(game, watching.pop(game))
+            else:
+                raise ProtocolError(f"Not watching game {game!r}")
+            return {"game": game}
+
+        self.nconnections += 1
+        try:
+            while True:
+                data = await reader.read(LIMIT)
+                if not data:
+                    break
+                if overlong:
+                    # drop the rest of a request that was too long
+                    end = data.find(b"\n")
+                    if end < 0:
+                        continue
+                    data = data[end + 1 :]
+                    overlong = False
+                *lines, partial = (partial + data).split(b"\n")
+                replies: List[Union[Message, "asyncio.Future[Message]"]] = []
+                for line in lines:
+                    try:
+                        request = loads(line)
+                    except ValueError as e:
+                        replies.append({"error": f"Invalid JSON: {e}"})
+                    else:
+                        if isinstance(request, dict):
+                            op = request.get("op")
+                            start = perf_counter_ns()
+                            reply = handle(request, watch)
+                            if isinstance(reply, dict):
+                                record(op, start, reply)
+                            else:
+                                reply.add_done_callback(
+                                    functools.partial(
+                                        self._record_future, op, start
+                                    )
+                                )
+                            replies.append(reply)
+                        else:
+                            replies.append(
+                                {"error": "Requests must be objects"}
+                            )
+                encoded = [
+                    dumps(
+                        reply if isinstance(reply, dict) else await reply
+                    )
+                    for reply in replies
+                ]
+                if len(partial) > LIMIT:
+                    encoded.append('{"error":"Request too long"}')
+                    partial = b""
+                    overlong = True
+                if encoded:
+                    encoded.append("")
+                    writer.write("\n".join(encoded).encode())
+                    async with draining:
+                        await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for game, subscriber in watching.items():
+                self.unsubscribe(game, subscriber)
+            for forwarder in forwarders:
+                forwarder.cancel()
+            self.nconnections -= 1
+            writer.close()
+
+    async def serve_metrics(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer one HTTP request for the metrics of the server."""
+        try:
+            request = await reader.readline()
+            # the headers are not needed
+            while (await reader.readline()).strip():
+                pass
+            method, target, *_ = request.decode("latin-1").split() + ["", ""]
+            if method != "GET":
+                status, body = "405 Method Not Allowed", ""
+            elif target.split("?")[0] != "/metrics":
+                status, body = "404 Not Found", ""
+            else:
+                status, body = "200 OK", self.exposition()
+            content = body.encode()
+            writer.write(
+                (
+                    f"HTTP/1.0 {status}\r\n"
+                    f"Content-Type: {CONTENT_TYPE}\r\n"
+                    f"Content-Length: {len(content)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + content
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        path: Optional[str] = None,
+    ) -> asyncio.AbstractServer:
+        """Listen on the Unix socket at `path`, or on `host` and `port`."""
+        if path is not None:
+            return await asyncio.start_unix_server(
+                self.serve_connection, path, limit=LIMIT
+            )
+        return await asyncio.start_server(
+            self.serve_connection, host, port, limit=LIMIT
+        )
+
+    async def start_metrics(
+        self, host: Optional[str], port: int
+    ) -> asyncio.AbstractServer:
+        """Serve the metrics of the server over HTTP on `host` and `port`."""
+        return await asyncio.start_server(self.serve_metrics, host, port)
+
+
+async def serve(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    path: Optional[str] = None,
+    metrics_port: Optional[int] = None,
+) -> None:
+    """Host games until cancelled, with metrics on `metrics_port` if given."""
+    games = GameServer()
+    server = await games.start(host=host, port=port, path=path)
+    async with contextlib.AsyncExitStack() as stack:
+        await stack.enter_async_context(server)
+        if metrics_port is not None:
+            metrics = await games.start_metrics(
+                host if path is None else "127.0.0.1", metrics_port
+            )
+            await stack.enter_async_context(metrics)
+        await server.serve_forever()
+
+
+class Client:  # noqa: D213
+    """A connection to a game server.
+
+    Requests can be pipelined by calling :meth:`send` several times before
+    collecting the replies, in order, with :meth:`receive`. Frames of the
+    games being watched are decoded into :attr:`frames` as game and frame
+    pairs while waiting for replies, or by :meth:`receive_frame`.
+
+    """
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.frames: Deque[Tuple[int, bytes]] = collections.deque()
+        self.replies: Deque[Message] = collections.deque()
+
+    async def _read(self) -> None:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        message = json.loads(line)
+        if "frame" in message:
+            self.frames.append(
+                (message["game"], base64.b64decode(message["frame"]))
+            )
+        else:
+            self.replies.append(message)
+
+    @classmethod
+    async def connect(
+        cls,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        path: Optional[str] = None,
+    ) -> "Client":
+        """Connect to the server at `path`, or at `host` and `port`."""
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(
+                path, limit=REPLY_LIMIT
+            )
+        else:
+            reader, writer = await asyncio.open_connection(
+                host, port, limit=REPLY_LIMIT
+            )
+        return cls(reader, writer)
+
+    def send(self, op: str, **fields: Any) -> None:
+        """Queue a request."""
+        fields["op"] = op
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+
+    async def receive(self) -> Message:
+        """Return the reply to the oldest unanswered request."""
+        await self.writer.drain()
+        while not self.replies:
+            await self._read()
+        return self.replies.popleft()
+
+    async def receive_frame(self) -> Tuple[int, bytes]:
+        """Return the oldest frame received and the game it belongs to."""
+        await self.writer.drain()
+        while not self.frames:
+            await self._read()
+        return self.frames.popleft()
+
+    async def request(self, op: str, **fields: Any) -> Message:
+        """Send a request and return its reply."""
+        self.send(op, **fields)
+        return await self.receive()
+
+    async def close(self) -> None:
+        """Close the connection."""
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def __aenter__(self) -> "Client":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
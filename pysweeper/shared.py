@@ -0,0 +1,322 @@
+"""Boards whose state lives in shared memory, readable from other processes.
+
+A :class:`SharedBoard` is played like any other board by the process that
+created it, the only writer. Other processes attach to it by name with a
+:class:`SharedBoardView` and read the visible tiles in place, without
+anything being pickled.
+
+The block starts with a header holding a version counter followed by the
+mines, counts, exposed, flagged and visible arrays, one byte per tile. The
+version is odd while a move is being applied and even once it is done, so a
+reader that sees the same even version before and after copying the tiles
+got a consistent observation. Every method writing to the arrays bumps it,
+down to the primitives that undo and redo go through; writes nested in a
+move are part of the move and leave it odd.
+
+"""
+
+import contextlib
+import functools
+import struct
+import threading
+import time
+
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    Optional,
+    Sized,
+    Tuple,
+    TypeVar,
+    cast,
+)
+
+from .graph import Graph
+from .pysweeper import COVERED, Board, FirstClick, StateArray
+
+SHARED_MAGIC = b"PSWS"
+
+# magic, version, rows, columns, mines, exposed, flagged
+_HEADER = struct.Struct("<4sQIIIII")
+_VERSION = struct.Struct("<Q")
+_VERSION_OFFSET = 4
+_NARRAYS = 5
+
+#: Where the state arrays start in the block.
+ARRAYS_OFFSET = _HEADER.size
+
+# serializes attaching without the resource tracker
+_ATTACHING = threading.Lock()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _writes(method: F) -> F:
+    """Wrap a board method so that it bumps the version around its writes."""
+
+    @functools.wraps(method)
+    def wrapper(self: "SharedBoard", *args: Any, **kwargs: Any) -> Any:
+        self.begin_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.end_write()
+
+    return cast(F, wrapper)
+
+
+def _untracked(name: Sized, rtype: str) -> None:
+    """Stand in for :func:`multiprocessing.resource_tracker.register`."""
+
+
+def attach(name: str) -> shared_memory.SharedMemory:  # noqa: D213
+    """Map the shared memory block `name` created by another process.
+
+    The block stays its creator's to unlink. Before Python 3.13 the
+    resource tracker adopts every block a process maps and unlinks it when
+    the process exits, so registering it is skipped. Unregistering it
+    afterwards would not do: processes started by the creator share its
+    tracker, which would then forget the creator's own registration.
+
+    """
+    try:
+        return shared_memory.SharedMemory(
+            name=name, track=False  # type: ignore[call-arg]
+        )
+    except TypeError:  # pragma: no cover, Python < 3.13
+        pass
+    with _ATTACHING:
+        register = resource_tracker.register
+        resource_tracker.register = _untracked
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedBoard(Board):  # noqa: D213
+    """A board whose state arrays live in a shared memory block.
+
+    The block is named `name`, or given a unique name if that is ``None``,
+    and stays alive until :meth:`unlink` is called. Using the board as a
+    context manager closes and unlinks it on exit.
+
+    """
+
+    def __init__(
+        self,
+        nrows: int,
+        ncolumns: int,
+        nmines: int,
+        seed: Optional[int] = None,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        graph: Optional[Graph] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        self._requested_name = name
+        # construction is a write, the header starts with an odd version
+        self._depth = 1
+        super().__init__(
+            nrows,
+            ncolumns,
+            nmines,
+            seed=seed,
+            first_click=first_click,
+            graph=graph,
+        )
+        self.end_write()
+
+    def allocate(self, ntiles: int) -> Tuple[StateArray, ...]:
+        """Create the shared memory block and return views of its arrays."""
+        self.memory = memory = shared_memory.SharedMemory(
+            name=self._requested_name,
+            create=True,
+            size=ARRAYS_OFFSET + _NARRAYS * ntiles,
+        )
+        buf = memory.buf
+        assert buf is not None
+        self._buf = buf
+        # odd until construction is done, the mines are laid after this
+        _HEADER.pack_into(
+            buf, 0, SHARED_MAGIC, 1, self.nrows, self.ncolumns, 0, 0, 0
+        )
+        arrays = tuple(
+            buf[start : start + ntiles]
+            for start in range(
+                ARRAYS_OFFSET, ARRAYS_OFFSET + _NARRAYS * ntiles, ntiles
+            )
+        )
+        arrays[-1][:] = bytes([COVERED]) * ntiles
+        return arrays
+
+    @property
+    def name(self) -> str:
+        """Return the name other processes attach to."""
+        return self.memory.name
+
+    @property
+    def version(self) -> int:
+        """Return the write counter, odd while a move is being applied."""
+        return _VERSION.unpack_from(self._buf, _VERSION_OFFSET)[0]
+
+    def begin_write(self) -> None:
+        """Mark the state as being modified, unless it already is."""
+        self._depth += 1
+        if self._depth == 1:
+            _VERSION.pack_into(self._buf, _VERSION_OFFSET, self.version + 1)
+
+    def end_write(self) -> None:  # noqa: D213
+        """Publish the counters and mark the state as consistent again.
+
+        Only the call matching the outermost :meth:`begin_write` does.
+
+        """
+        self._depth -= 1
+        if self._depth:
+            return
+        _HEADER.pack_into(
+            self._buf,
+            0,
+            SHARED_MAGIC,
+            self.version + 1,
+            self.nrows,
+            self.ncolumns,
+            self.nmines,
+            self.nexposed,
+            self.nflagged,
+        )
+
+    expose = _writes(Board.expose)
+    flood = _writes(Board.flood)
+    chord = _writes(Board.chord)
+    flag = _writes(Board.flag)
+    flag_vertex = _writes(Board.flag_vertex)
+    lay_mines = _writes(Board.lay_mines)
+    move_mine = _writes(Board.move_mine)
+    apply_moves = _writes(Board.apply_moves)
+    reset = _writes(Board.reset)
+    place_mines = _writes(Board.place_mines)
+    move_mine_vertex = _writes(Board.move_mine_vertex)
+    set_exposed = _writes(Board.set_exposed)
+    set_flagged = _writes(Board.set_flagged)
+    flood_vertices = _writes(Board.flood_vertices)
+
+    def close(self) -> None:  # noqa: D213
+        """Release this process's mapping of the block.
+
+        Views returned by :attr:`observation` must be released first.
+
+        """
+        for array in (
+            self.mines,
+            self.counts,
+            self.exposed,
+            self.flagged,
+            self.visible,
+        ):
+            cast(memoryview, array).release()
+        self.memory.close()
+
+    def unlink(self) -> None:
+        """Free the block once every process has closed it."""
+        self.memory.unlink()
+
+    def __enter__(self) -> "SharedBoard":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+        self.unlink()
+
+
+@contextlib.contextmanager
+def writing(board: Board) -> Iterator[None]:  # noqa: D213
+    """Make the writes to `board` in the block one move, if it is shared.
+
+    Readers of a :class:`SharedBoard` see none of them until the block
+    exits.
+
+    """
+    if isinstance(board, SharedBoard):
+        board.begin_write()
+        try:
+            yield
+        finally:
+            board.end_write()
+    else:
+        yield
+
+
+class SharedBoardView:  # noqa: D213
+    """A read only handle on a :class:`SharedBoard` in another process.
+
+    Attaching maps the block and parses its header, nothing is copied until
+    :meth:`snapshot` is called.
+
+    """
+
+    def __init__(self, name: str) -> None:
+        self.memory = attach(name)
+        buf = self.memory.buf
+        assert buf is not None
+        self._buf = buf
+        magic, _, nrows, ncolumns, *_ = _HEADER.unpack_from(buf)
+        if magic != SHARED_MAGIC:
+            self.memory.close()
+            raise ValueError(f"{name!r} is not a shared board")
+        self.nrows = nrows
+        self.ncolumns = ncolumns
+        ntiles = nrows * ncolumns
+        start = ARRAYS_OFFSET + (_NARRAYS - 1) * ntiles
+        self.visible = buf[start : start + ntiles]
+
+    @property
+    def name(self) -> str:
+        """Return the name of the shared memory block."""
+        return self.memory.name
+
+    @property
+    def version(self) -> int:
+        """Return the version of the board, odd while a move is applied."""
+        return _VERSION.unpack_from(self._buf, _VERSION_OFFSET)[0]
+
+    @property
+    def counters(self) -> Tuple[int, int, int]:
+        """Return the number of mines, exposed tiles and flags."""
+        _, _, _, _, nmines, nexposed, nflagged = _HEADER.unpack_from(
+            self._buf
+        )
+        return nmines, nexposed, nflagged
+
+    @property
+    def observation(self) -> memoryview:  # noqa: D213
+        """Return an `nrows` by `ncolumns` view of the visible tiles.
+
+        Reading the view directly never blocks the writer, but may observe a
+        move half applied; use :meth:`snapshot` for a consistent copy.
+
+        """
+        return self.visible.cast("B", (self.nrows, self.ncolumns))
+
+    def snapshot(self) -> Tuple[int, bytes]:
+        """Return a consistent copy of the visible tiles and its version."""
+        while True:
+            version = self.version
+            if not version & 1:
+                visible = self.visible.tobytes()
+                if self.version == version:
+                    return version, visible
+            time.sleep(0)
+
+    def close(self) -> None:
+        """Detach from the block, after releasing any observation views."""
+        self.visible.release()
+        self.memory.close()
+
+    def __enter__(self) -> "SharedBoardView":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
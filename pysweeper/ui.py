@@ -2,12 +2,14 @@
 
 import enum
 
-from typing import Any, Callable, Tuple
+from typing import Any, Callable, Optional, Tuple
 
 import toolz
 import urwid
 
-from .pysweeper import Board, Coordinate, Tile
+from . import snapshot
+from .graph import TOPOLOGIES
+from .pysweeper import MINE, Board, Coordinate, FirstClick, Tile
 
 
 MINE_TILE = """\
@@ -52,13 +54,14 @@ class MouseButton(enum.Enum):
 class TileWidget(urwid.WidgetWrap):
     """A PySweeper tile widget."""
 
-    signals = ["left_click", "right_click"]
+    signals = ["left_click", "middle_click", "right_click"]
 
     def __init__(
         self,
         position: Coordinate,
         tile: Tile,
         on_left_click: TileWidgetCallback,
+        on_middle_click: TileWidgetCallback,
         on_right_click: TileWidgetCallback,
         *args: Any,
         **kwargs: Any,
@@ -67,14 +70,17 @@ class TileWidget(urwid.WidgetWrap):
         self.tile = tile
         self.text = urwid.Text(str(self), align=urwid.CENTER)
         self.on_left_click = on_left_click
+        self.on_middle_click = on_middle_click
         self.on_right_click = on_right_click
         super().__init__(self.text, *args, **kwargs)
         urwid.connect_signal(self, "left_click", self.on_left_click)
+        urwid.connect_signal(self, "middle_click", self.on_middle_click)
         urwid.connect_signal(self, "right_click", self.on_right_click)
 
     def disable(self) -> None:
         """Disable the tile."""
         urwid.disconnect_signal(self, "left_click", self.on_left_click)
+        urwid.disconnect_signal(self, "middle_click", self.on_middle_click)
         urwid.disconnect_signal(self, "right_click", self.on_right_click)
 
     @property
@@ -113,11 +119,17 @@ class TileWidget(urwid.WidgetWrap):
         focus: bool,
     ) -> bool:
         """Click on a tile."""
-        if not self.selectable():
-            return False
         if event != "mouse press":
             return False
-        if button == MouseButton.LEFT.value:
+        # chording only makes sense on exposed tiles, everything else only
+        # makes sense on covered ones
+        if button == MouseButton.MIDDLE.value:
+            if not self.exposed:
+                return False
+            signal_name = "middle_click"
+        elif not self.selectable():
+            return False
+        elif button == MouseButton.LEFT.value:
             signal_name = "left_click"
         elif button == MouseButton.RIGHT.value:
             signal_name = "right_click"
@@ -142,27 +154,55 @@ class TileWidget(urwid.WidgetWrap):
 
         # numbered tile, indicating adjacent mine count or empty tile
         # indicating zero adjacent mines
-        adjacent_mines = tile.adjacent_mines
-        if not adjacent_mines:
+        adjacent_mine_count = tile.adjacent_mine_count
+        if not adjacent_mine_count:
             return EMPTY_TILE
-        return NUMBERED_TILE.format(len(adjacent_mines))
+        return NUMBERED_TILE.format(adjacent_mine_count)
 
     def redraw(self) -> None:
         """Redraw the widget."""
         self.text.set_text(str(self))
 
 
-class PySweeperUI:
-    """The urwid based UI class for PySweeper."""
+class PySweeperUI:  # noqa: D213
+    """The urwid based UI class for PySweeper.
+
+    A game in progress is resumed by passing its `board`, which takes
+    precedence over the dimensions and options. Pressing ``s`` saves the
+    game to `save_path`, if one is given.
+
+    """
 
-    def __init__(self, rows: int, columns: int, mines: int) -> None:
-        self.board = Board(rows, columns, mines)
+    def __init__(
+        self,
+        rows: int,
+        columns: int,
+        mines: int,
+        first_click: FirstClick = FirstClick.UNSAFE,
+        topology: str = "rectangular",
+        board: Optional[Board] = None,
+        save_path: Optional[str] = None,
+    ) -> None:
+        if board is None:
+            board = Board(
+                rows,
+                columns,
+                mines,
+                first_click=first_click,
+                graph=TOPOLOGIES[topology](rows, columns),
+            )
+        else:
+            columns = board.ncolumns
+            topology = board.graph.topology
+        self.board = board
+        self.save_path = save_path
         self.columns = [
             urwid.Columns(
                 TileWidget(
                     tile=tile,
                     position=position,
                     on_left_click=self.on_left_click,
+                    on_middle_click=self.on_middle_click,
                     on_right_click=self.on_right_click,
                 )
                 for position, tile in chunk
@@ -178,8 +218,29 @@ class PySweeperUI:
         self.header = urwid.Text(
             f"Flags: {self.board.available_flags:d}", align=urwid.CENTER
         )
-        top = urwid.Filler(urwid.Pile([self.header] + self.columns))
-        self.loop = urwid.MainLoop(top)
+        lines = [
+            # shift odd rows by half a tile so hexagons line up
+            urwid.Padding(row, left=3)
+            if topology == "hexagonal" and i % 2
+            else row
+            for i, row in enumerate(self.columns)
+        ]
+        top = urwid.Filler(urwid.Pile([self.header] + lines))
+        self.loop = urwid.MainLoop(top, unhandled_input=self.on_input)
+        if MINE in board.visible:
+            self.lose()
+        elif board.win:
+            self.disable_all()
+            self.header.set_text("You win!")
+
+    def on_input(self, key: Any) -> None:
+        """Save the game when ``s`` is pressed."""
+        if key == "s" and self.save_path is not None:
+            snapshot.save(self.board, self.save_path)
+            self.header.set_text(
+                f"Flags: {self.board.available_flags:d}, "
+                f"saved to {self.save_path}"
+            )
 
     def on_left_click(self, widget: TileWidget) -> None:
         """Expose `widget`."""
@@ -190,9 +251,21 @@ class PySweeperUI:
 
         widget.redraw()
         if widget.tile.mine and widget.exposed:
-            self.expose_all()
+            self.lose()
+
+    def on_middle_click(self, widget: TileWidget) -> None:
+        """Chord around `widget`."""
+        assert widget.exposed, "Widget is not exposed"
+        grid = self.board.grid
+        exposed = self.board.chord(*widget.position)
+        for pos in exposed:
+            self.widgets[pos].redraw()
+
+        if any(grid[pos].mine for pos in exposed):
+            self.lose()
+        elif exposed and self.board.win:
             self.disable_all()
-            self.header.set_text("You lose!")
+            self.header.set_text("You win!")
 
     def on_right_click(self, widget: TileWidget) -> None:
         """Flag `widget`."""
@@ -214,6 +287,12 @@ class PySweeperUI:
             self.disable_all()
             self.header.set_text("You win!")
 
+    def lose(self) -> None:
+        """End the game after a mine was exposed."""
+        self.expose_all()
+        self.disable_all()
+        self.header.set_text("You lose!")
+
     def expose_all(self) -> None:
         """Expose every tile."""
         for position, tile in self.widgets.items():
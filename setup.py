@@ -23,7 +23,7 @@ setup(
     install_requires=(
         directory.joinpath("requirements.txt").read_text().splitlines()
     ),
-    python_requires=">=3.7",
+    python_requires=">=3.8",
     license="MIT",
     entry_points={"console_scripts": ["pysweeper = pysweeper.__main__:main"]},
 )
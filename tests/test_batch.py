@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from pysweeper.batch import BatchEnv
+from pysweeper.pysweeper import COVERED, MINE, Board
+
+
+def boards_of(env):
+    boards = []
+    for k in range(env.nboards):
+        start = k * env.stride
+        mines = [
+            divmod(v, env.ncolumns)
+            for v in range(env.ntiles)
+            if env.cells[start + v] & 0x10
+        ]
+        assert len(mines) == env.nmines
+        boards.append(Board.from_mines(env.nrows, env.ncolumns, mines))
+    return boards
+
+
+def test_step_shapes():
+    env = BatchEnv(4, 5, 6, 3, seed=0)
+    observation, rewards, done = env.step([0, 7, 29, 12])
+    assert observation.shape == (4, 5, 6)
+    assert len(rewards) == len(done) == 4
+    ntiles = 5 * 6
+    codes = observation.tobytes()
+    for k, (reward, board_done) in enumerate(zip(rewards, done)):
+        if reward < 0:
+            assert board_done
+        elif not board_done:
+            board = codes[k * ntiles : (k + 1) * ntiles]
+            assert MINE not in board
+            assert ntiles - board.count(COVERED) == env.nexposed[k]
+            assert env.nexposed[k] == reward
+
+
+def test_step_rejects_bad_actions():
+    env = BatchEnv(3, 4, 4, 2, seed=0)
+    before = env.exposed
+    for actions in [0, 0, 16], [0, 0, -1], [0, 0]:
+        with pytest.raises(ValueError):
+            env.step(actions)
+    assert env.exposed == before
+
+
+@pytest.mark.parametrize(
+    "nrows, ncolumns, nmines",
+    [(1, 1, 0), (1, 5, 1), (5, 6, 3), (3, 7, 20), (16, 30, 99), (8, 8, 0)],
+)
+def test_step_like_boards(nrows, ncolumns, nmines):
+    nboards = 13
+    ntiles = nrows * ncolumns
+    env = BatchEnv(nboards, nrows, ncolumns, nmines, seed=3)
+    rng = random.Random(1)
+    boards = boards_of(env)
+    for _ in range(40):
+        actions = [rng.randrange(ntiles) for _ in range(nboards)]
+        expected = []
+        for board, action in zip(boards, actions):
+            before = board.nexposed
+            board.expose(*divmod(action, ncolumns))
+            if board.mines[action]:
+                expected.append((-1.0, True))
+            else:
+                expected.append(
+                    (
+                        float(board.nexposed - before),
+                        board.nexposed == ntiles - nmines,
+                    )
+                )
+        observation, rewards, done = env.step(actions)
+        assert rewards == [reward for reward, _ in expected]
+        assert list(map(bool, done)) == [finished for _, finished in expected]
+        codes = observation.tobytes()
+        fresh = boards_of(env)
+        for k, board in enumerate(boards):
+            if done[k]:
+                boards[k] = fresh[k]
+            assert codes[k * ntiles : (k + 1) * ntiles] == bytes(
+                boards[k].visible
+            )
+    env.observe()
+    assert observation.tobytes() == codes
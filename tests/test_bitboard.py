@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from pysweeper.bitboard import BitBoard
+from pysweeper.graph import TOPOLOGIES
+from pysweeper.pysweeper import Board
+
+
+def exposed(board):
+    return {
+        board.graph.coordinate(v)
+        for v in range(board.ntiles)
+        if board.exposed[v]
+    }
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_moves_like_a_board(seed):
+    rng = random.Random(seed)
+    nrows, ncolumns = rng.randint(1, 20), rng.randint(1, 20)
+    nmines = rng.randint(0, nrows * ncolumns // rng.choice([3, 8, 40]))
+    board = Board(nrows, ncolumns, nmines, seed=seed)
+    bitboard = BitBoard.from_board(board)
+    assert bitboard.nmines == nmines
+    for i in range(nrows):
+        for j in range(ncolumns):
+            assert bitboard.adjacent_mine_count(i, j) == board.counts[
+                board.graph.index(i, j)
+            ]
+    for _ in range(60):
+        name = rng.choice(["expose", "flag", "flag", "chord"])
+        i, j = rng.randrange(nrows), rng.randrange(ncolumns)
+        expected = getattr(board, name)(i, j)
+        assert getattr(bitboard, name)(i, j) == expected
+        assert set(bitboard.coordinates(bitboard.exposed)) == exposed(board)
+        assert bitboard.total_exposed == board.nexposed
+        assert bitboard.available_flags == board.available_flags
+        assert bitboard.win == board.win
+    bitboard.expose_all()
+    assert bitboard.total_exposed == board.ntiles - board.nflagged
+
+
+def test_openings_like_a_board():
+    board = Board.from_mines(30, 30, [(29, 29), (10, 3), (3, 10)])
+    bitboard = BitBoard.from_board(board)
+    assert bitboard.expose(0, 0) == board.expose(0, 0)
+    assert bitboard.total_exposed == board.nexposed == 30 * 30 - 3
+
+
+def test_from_board_refuses_other_topologies():
+    graph = TOPOLOGIES["hexagonal"](4, 4)
+    with pytest.raises(ValueError):
+        BitBoard.from_board(Board(4, 4, 2, seed=1, graph=graph))
@@ -0,0 +1,145 @@
+import asyncio
+import random
+
+from pysweeper import delta
+from pysweeper.broadcast import Broadcast
+from pysweeper.pysweeper import Action, Board
+
+
+def play(board, broadcast, move):
+    changes = board.apply_moves([move])
+    broadcast.publish([*changes.exposed, *changes.flagged])
+
+
+def flags(board, broadcast, n):
+    for v in range(n):
+        play(board, broadcast, (Action.FLAG, *divmod(v, board.ncolumns)))
+
+
+def kind(frame):
+    return frame[0]
+
+
+def test_behind_subscribers_get_one_delta():
+    board = Board(10, 10, 10, seed=1)
+    broadcast = Broadcast(board)
+    subscriber = broadcast.subscribe()
+    decoder = delta.Decoder()
+    decoder.apply(subscriber.pop())
+    assert subscriber.pop() is None
+    flags(board, broadcast, 3)
+    frame = subscriber.pop()
+    assert kind(frame) == delta.DELTA
+    assert decoder.apply(frame) == [0, 1, 2]
+    assert decoder.visible == board.visible
+    assert subscriber.pop() is None
+    assert (subscriber.nframes, subscriber.ncoalesced) == (2, 2)
+    assert subscriber.nkeyframes == 1
+
+
+def test_merged_bodies_are_shared():
+    board = Board(10, 10, 10, seed=1)
+    broadcast = Broadcast(board)
+    first, second = broadcast.subscribe(), broadcast.subscribe()
+    first.pop()
+    second.pop()
+    flags(board, broadcast, 4)
+    body = broadcast.merged_body(first.version)
+    assert broadcast.merged_body(second.version) is body
+    assert first.pop() == second.pop()
+    # a single move is sent as it was published
+    flags(board, broadcast, 1)
+    assert broadcast.merged_body(first.version) is broadcast.log[-1].body
+
+
+def test_subscribers_past_the_log_get_a_keyframe():
+    board = Board(10, 10, 10, seed=1)
+    broadcast = Broadcast(board, max_pending=3)
+    subscriber = broadcast.subscribe()
+    decoder = delta.Decoder()
+    decoder.apply(subscriber.pop())
+    flags(board, broadcast, 3)
+    frame = subscriber.pop()
+    assert kind(frame) == delta.DELTA
+    decoder.apply(frame)
+    flags(board, broadcast, 4)
+    assert len(broadcast.log) == 3
+    frame = subscriber.pop()
+    assert kind(frame) == delta.KEYFRAME
+    assert decoder.apply(frame) is None
+    assert decoder.visible == board.visible
+    assert subscriber.nkeyframes == 2
+
+
+def test_large_changes_are_keyframes():
+    board = Board(4, 4, 8, seed=1)
+    broadcast = Broadcast(board)
+    subscriber = broadcast.subscribe()
+    subscriber.pop()
+    # a quarter of the board is still a delta
+    broadcast.publish([0, 1])
+    broadcast.publish([2, 3])
+    assert kind(subscriber.pop()) == delta.DELTA
+    broadcast.publish([0, 1, 2])
+    broadcast.publish([3, 4])
+    assert all(update.body is not None for update in broadcast.log)
+    assert kind(subscriber.pop()) == delta.KEYFRAME
+    broadcast.publish(range(5))
+    assert broadcast.log[-1].body is None
+    assert kind(subscriber.pop()) == delta.KEYFRAME
+    assert subscriber.nkeyframes == 3
+
+
+def test_the_log_is_bounded():
+    board = Board(20, 20, 200, seed=1)
+    broadcast = Broadcast(board, max_pending=8)
+    flags(board, broadcast, 5)
+    # nobody would read the moves
+    assert not broadcast.log
+    broadcast.subscribe()
+    flags(board, broadcast, 100)
+    assert len(broadcast.log) == 8
+    assert broadcast.version == 105
+
+
+def test_slow_and_fast_subscribers():
+    board = Board(16, 30, 99, seed=2)
+    broadcast = Broadcast(board, max_pending=4)
+    rng = random.Random(3)
+    decoders = {}
+
+    async def watch(subscriber, delay):
+        decoder = decoders[delay] = delta.Decoder()
+        async for frame in subscriber.frames():
+            decoder.apply(frame)
+            await asyncio.sleep(delay)
+
+    async def main():
+        subscribers = {
+            delay: broadcast.subscribe() for delay in (0, 0.002)
+        }
+        tasks = [
+            asyncio.ensure_future(watch(subscriber, delay))
+            for delay, subscriber in subscribers.items()
+        ]
+        actions = [Action.EXPOSE, Action.FLAG, Action.FLAG]
+        for _ in range(300):
+            move = rng.choice(actions), rng.randrange(16), rng.randrange(30)
+            play(board, broadcast, move)
+            await asyncio.sleep(0)
+        while any(
+            subscriber.version != broadcast.version
+            for subscriber in subscribers.values()
+        ):
+            await asyncio.sleep(0.01)
+        broadcast.close()
+        await asyncio.gather(*tasks)
+        return subscribers
+
+    subscribers = asyncio.run(main())
+    slow, fast = subscribers[0.002], subscribers[0]
+    assert slow.nframes < fast.nframes
+    # the slow one fell further behind than the log reaches
+    assert slow.nkeyframes > 1
+    for decoder in decoders.values():
+        assert decoder.visible == board.visible
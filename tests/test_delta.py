@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from pysweeper import delta
+from pysweeper.pysweeper import Action, Board
+
+
+@pytest.mark.parametrize(
+    "n, size", [(0, 1), (1, 1), (127, 1), (128, 2), (16383, 2), (16384, 3)]
+)
+def test_varints(n, size):
+    out = bytearray(b"x")
+    delta.write_varint(out, n)
+    assert len(out) == 1 + size
+    assert delta.read_varint(bytes(out), 1) == (n, 1 + size)
+    assert delta.read_varint(bytes(out) + b"\x05", 1) == (n, 1 + size)
+
+
+def test_large_varint():
+    n = 1 << 70
+    out = bytearray()
+    delta.write_varint(out, n)
+    assert all(byte & 0x80 for byte in out[:-1])
+    assert delta.read_varint(bytes(out), 0) == (n, len(out))
+
+
+def test_header():
+    for kind in delta.KEYFRAME, delta.DELTA:
+        for sequence in 0, 5, 300, 1 << 40:
+            header = bytes(delta.frame_header(kind, sequence))
+            assert header[0] == kind
+            assert delta.read_varint(header, 1) == (sequence, len(header))
+
+
+def test_keyframe_of_a_board():
+    board = Board(7, 11, 10, seed=3)
+    board.flag(0, 0)
+    board.expose(3, 4)
+    encoder = delta.Encoder(board)
+    decoder = delta.Decoder()
+    assert not decoder.synced
+    assert decoder.apply(encoder.keyframe()) is None
+    assert decoder.synced
+    assert decoder.sequence == 0
+    assert (decoder.nrows, decoder.ncolumns) == (7, 11)
+    assert decoder.visible == board.visible
+    assert decoder.observation.tolist() == board.observation.tolist()
+
+
+def test_delta_body():
+    visible = bytes(range(50))
+    body = delta.delta_body([3, 4, 5, 9, 4, 30], visible)
+    assert body == bytes([3, 3, 3, 4, 5, 3, 1, 9, 20, 1, 30])
+
+
+def test_empty_delta():
+    board = Board(4, 4, 2, seed=1)
+    encoder = delta.Encoder(board)
+    decoder = delta.Decoder()
+    decoder.apply(encoder.keyframe())
+    frame = encoder.delta([])
+    assert frame == bytes(delta.frame_header(delta.DELTA, 1))
+    assert decoder.apply(frame) == []
+    assert decoder.sequence == 1
+    assert decoder.visible == board.visible
+
+
+def test_large_gaps():
+    nrows, ncolumns = 300, 400
+    visible = bytearray(nrows * ncolumns)
+    vertices = [0, 1, 200, 70000, 70001, 70002, nrows * ncolumns - 1]
+    for v in vertices:
+        visible[v] = v % 251 + 1
+    decoder = delta.Decoder()
+    decoder.apply(
+        delta.encode_keyframe(0, nrows, ncolumns, bytes(nrows * ncolumns))
+    )
+    frame = delta.encode_delta(1, reversed(vertices), visible)
+    # four runs, with gaps of 0, 198, 69799 and 49996 tiles
+    assert len(frame) == 2 + (1 + 2 + 3 + 3) + 4 + len(vertices)
+    assert decoder.apply(frame) == vertices
+    assert decoder.visible == visible
+
+
+def test_stream_follows_a_board():
+    rng = random.Random(2)
+    board = Board(12, 15, 25, seed=4)
+    encoder = delta.Encoder(board, keyframe_interval=5)
+    decoder = delta.Decoder()
+    decoder.apply(encoder.keyframe())
+    actions = [Action.EXPOSE, Action.FLAG, Action.FLAG, Action.CHORD]
+    for _ in range(40):
+        move = rng.choice(actions), rng.randrange(12), rng.randrange(15)
+        decoder.apply(encoder.changes(board.apply_moves([move])))
+        assert decoder.visible == board.visible
+        assert decoder.sequence == encoder.sequence
+
+
+def test_out_of_order_deltas():
+    board = Board(4, 4, 2, seed=1)
+    encoder = delta.Encoder(board)
+    decoder = delta.Decoder()
+    first = encoder.keyframe()
+    with pytest.raises(ValueError):
+        decoder.apply(encoder.delta([0]))
+    decoder.apply(first)
+    encoder.delta([1])
+    with pytest.raises(ValueError):
+        decoder.apply(encoder.delta([2]))
+
+
+def test_truncated_frames():
+    board = Board(6, 6, 4, seed=1)
+    board.expose(0, 0)
+    keyframe = delta.Encoder(board).keyframe()
+    frame = delta.encode_delta(1, [0, 1, 2, 20, 35], board.visible)
+    for cut in range(len(keyframe)):
+        with pytest.raises(ValueError):
+            delta.Decoder().apply(keyframe[:cut])
+    for cut in range(3, len(frame)):
+        decoder = delta.Decoder()
+        decoder.apply(keyframe)
+        try:
+            changed = decoder.apply(frame[:cut])
+        except ValueError:
+            continue
+        # a cut between runs is a shorter valid delta
+        assert changed == [0, 1, 2, 20, 35][: len(changed)]
+    with pytest.raises(ValueError):
+        delta.read_varint(b"\x80\x80", 0)
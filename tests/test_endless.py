@@ -0,0 +1,103 @@
+import random
+
+from pysweeper.endless import EndlessBoard, chunk_mines
+from pysweeper.pysweeper import COVERED, Board
+
+
+def test_spilled_chunks_are_kept_apart_by_seed(tmp_path):
+    with EndlessBoard(seed=1, path=tmp_path) as board:
+        board.expose(0, 0)
+        window = board.window(-8, -8, 16, 16)
+    with EndlessBoard(seed=2, path=tmp_path) as other:
+        assert other.window(-8, -8, 16, 16) == bytes([COVERED]) * 256
+        assert other.nloads == 0
+    with EndlessBoard(seed=1, path=tmp_path) as board:
+        assert board.window(-8, -8, 16, 16) == window
+        assert board.nloads > 0
+
+
+def reference(board, radius):
+    size = board.chunk_size
+    args = board.seed, board.nmines_per_chunk, size
+    mines = []
+    for ci in range(-radius // size, radius // size):
+        for cj in range(-radius // size, radius // size):
+            flags = chunk_mines(*args, ci, cj)
+            mines.extend(
+                (ci * size + r + radius, cj * size + c + radius)
+                for r in range(size)
+                for c in range(size)
+                if flags[r * size + c]
+            )
+    return Board.from_mines(2 * radius, 2 * radius, mines)
+
+
+def test_moves_across_chunks_like_a_board(tmp_path):
+    radius = 60
+    rng = random.Random(4)
+    with EndlessBoard(
+        seed=3, density=0.2, chunk_size=5, max_chunks=9, path=tmp_path
+    ) as board:
+        other = reference(board, radius)
+        exposed = []
+        for _ in range(600):
+            name = rng.choice(["expose", "flag", "flag", "chord", "chord"])
+            i, j = rng.randrange(-20, 20), rng.randrange(-20, 20)
+            if name == "chord" and exposed:
+                i, j = rng.choice(exposed)
+            elif name == "flag" and board.tile(i, j) == COVERED:
+                # flag mines so that chords open something
+                if not other.mines[other.graph.index(i + radius, j + radius)]:
+                    continue
+            result = getattr(board, name)(i, j)
+            expected = getattr(other, name)(i + radius, j + radius)
+            if name != "flag":
+                assert {(x + radius, y + radius) for x, y in result} == set(
+                    expected
+                )
+                assert all(
+                    0 < x < 2 * radius - 1 and 0 < y < 2 * radius - 1
+                    for x, y in expected
+                )
+                exposed.extend(result)
+        assert board.window(-radius, -radius, 2 * radius, 2 * radius) == (
+            other.visible
+        )
+        assert board.nflagged == other.nflagged
+        assert board.nspills > 0
+        assert board.nloads > 0
+        assert len(board.chunks) <= 9
+
+
+def test_floods_stop_at_max_flood():
+    with EndlessBoard(seed=1, density=0.01, max_flood=200) as board:
+        exposed = board.expose(0, 0)
+        assert 0 < len(exposed) <= 200 + 8
+        assert board.nexposed == len(exposed)
+        # chording the edge of the opening carries on
+        edge = next(
+            (i, j)
+            for i, j in exposed
+            if board.tile(i, j) == 0
+            and any(
+                board.tile(i + di, j + dj) == COVERED
+                for di in (-1, 0, 1)
+                for dj in (-1, 0, 1)
+            )
+        )
+        more = board.chord(*edge)
+        assert more - exposed
+        assert board.nexposed == len(exposed | more)
+
+
+def test_floods_wider_than_max_chunks_are_pinned():
+    with EndlessBoard(
+        seed=1, density=0.01, chunk_size=4, max_chunks=9, max_flood=5000
+    ) as board:
+        exposed = board.expose(0, 0)
+        chunks = {(i // 4, j // 4) for i, j in exposed}
+        assert len(chunks) > 9
+        # no chunk was read back, and each was spilled once after the flood
+        assert board.nloads == 0
+        assert board.nspills == len(chunks) - len(board.chunks)
+        assert len(board.chunks) == 9
@@ -0,0 +1,24 @@
+import pytest
+
+from pysweeper.graph import from_neighbours, rectangular
+
+
+@pytest.mark.parametrize(
+    "nrows, ncolumns", [(1, 1), (1, 2), (2, 1), (1, 5), (3, 3), (4, 7), (9, 2)]
+)
+def test_grids_like_built_graphs(nrows, ncolumns):
+    graph = rectangular(nrows, ncolumns)
+    built = from_neighbours(
+        "rectangular",
+        (nrows, ncolumns),
+        nrows,
+        ncolumns,
+        lambda i, j: (
+            (i + x, j + y) for x in (-1, 0, 1) for y in (-1, 0, 1)
+        ),
+    )
+    for v in range(graph.ntiles):
+        assert list(graph.neighbours(v)) == list(built.neighbours(v))
+        assert graph.degree(v) == built.degree(v)
+    assert graph.nbytes == 0
+    assert built.nbytes > 0
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from pysweeper.history import History
+from pysweeper.log import GameLog
+from pysweeper.pysweeper import Board, FirstClick
+
+
+def state(board):
+    return (
+        board.started,
+        bytes(board.mines),
+        bytes(board.counts),
+        bytes(board.exposed),
+        bytes(board.flagged),
+        bytes(board.visible),
+        board.nexposed,
+        board.nflagged,
+        board.ncorrectly_flagged,
+    )
+
+
+def random_move(rng, board):
+    move = rng.choice([board.expose, board.flag, board.flag, board.chord])
+    move(rng.randrange(board.nrows), rng.randrange(board.ncolumns))
+
+
+@pytest.mark.parametrize("first_click", list(FirstClick))
+def test_undo_and_redo_walk_back_and_forth(first_click):
+    rng = random.Random(str(first_click))
+    for _ in range(20):
+        nrows = rng.randint(4, 15)
+        ncolumns = rng.randint(4, 15)
+        # an opening first click needs nine tiles without mines
+        nmines = rng.randint(1, min(20, nrows * ncolumns - 9))
+        board = Board(nrows, ncolumns, nmines, first_click=first_click)
+        history = History(board)
+        states = [state(board)]
+        for _ in range(rng.randint(1, 15)):
+            random_move(rng, board)
+            if state(board) != states[-1]:
+                states.append(state(board))
+
+        for expected in reversed(states[:-1]):
+            history.undo()
+            assert state(board) == expected
+        assert not history.can_undo
+        assert history.undo() == []
+
+        for expected in states[1:]:
+            history.redo()
+            assert state(board) == expected
+        assert not history.can_redo
+
+
+def test_moves_clear_the_redo_stack():
+    board = Board(9, 9, 10, seed=3)
+    history = History(board)
+    board.flag(0, 0)
+    board.flag(1, 1)
+    history.undo()
+    assert history.can_redo
+    board.flag(2, 2)
+    assert not history.can_redo
+    assert board.flagged[board.graph.index(2, 2)]
+    assert not board.flagged[board.graph.index(1, 1)]
+
+
+def test_undo_returns_changed_vertices():
+    board = Board(9, 9, 10, seed=3)
+    history = History(board)
+    board.flag(4, 5)
+    assert history.undo() == [board.graph.index(4, 5)]
+    assert history.redo() == [board.graph.index(4, 5)]
+
+
+def test_budget_forgets_oldest_moves():
+    board = Board(9, 9, 10, seed=3)
+    history = History(board, budget=2)
+    for j in range(4):
+        board.flag(0, j)
+    history.undo()
+    history.undo()
+    assert not history.can_undo
+    assert board.nflagged == 2
+
+
+def test_refused_undo_leaves_history_alone(tmp_path):
+    with GameLog(tmp_path / "games.log") as log:
+        board = Board(9, 9, 10, seed=1)
+        log.attach(board)
+        history = History(board)
+        board.flag(0, 0)
+        with pytest.raises(ValueError):
+            history.undo()
+        assert history.can_undo
+        assert not history.can_redo
+        log.detach()
+        history.undo()
+        assert not board.nflagged
+        history.redo()
+        assert board.nflagged == 1
@@ -0,0 +1,25 @@
+from pysweeper import instrument
+from pysweeper.pysweeper import Board
+from pysweeper.ui import PySweeperUI
+
+
+def test_clicks_count_the_tiles_they_change():
+    board = Board.from_mines(6, 6, [(5, 5), (0, 5)])
+    instrument.enable()
+    try:
+        instrument.reset()
+        ui = PySweeperUI(6, 6, 2, board=board)
+        ui.on_right_click(ui.widgets[5, 5])
+        ui.on_left_click(ui.widgets[0, 0])
+        ui.on_middle_click(ui.widgets[4, 4])
+        ui.on_right_click(ui.widgets[5, 5])
+        stats = instrument.stats()
+    finally:
+        instrument.disable()
+        instrument.reset()
+    left = stats["PySweeperUI.on_left_click"]
+    assert (left.calls, left.cells) == (1, 6 * 6 - 2)
+    middle = stats["PySweeperUI.on_middle_click"]
+    assert (middle.calls, middle.cells) == (1, 0)
+    right = stats["PySweeperUI.on_right_click"]
+    assert (right.calls, right.cells) == (2, 2)
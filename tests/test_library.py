@@ -0,0 +1,65 @@
+import pytest
+
+from pysweeper.library import BoardLibrary, Layout
+from pysweeper.pysweeper import Board
+
+
+def test_layout_round_trip():
+    board = Board(16, 30, 99, seed=7)
+    layout = Layout.from_board(board)
+    assert Layout.from_bytes(layout.to_bytes()) == layout
+    copy = layout.to_board()
+    assert bytes(copy.mines) == bytes(board.mines)
+    assert bytes(copy.counts) == bytes(board.counts)
+    assert copy.nmines == 99
+    assert copy.seed == 7
+
+
+def test_layout_rejects_garbage():
+    data = Layout.from_board(Board(9, 9, 10, seed=1)).to_bytes()
+    with pytest.raises(ValueError):
+        Layout.from_bytes(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        Layout.from_bytes(data[:-1])
+    for size in 0, 4, len(data) // 2:
+        with pytest.raises(ValueError, match="Truncated layout"):
+            Layout.from_bytes(data[:size])
+
+
+def test_library_round_trip(tmp_path):
+    path = tmp_path / "boards.lib"
+    boards = [Board(9, 9, 10, seed=seed) for seed in range(5)]
+    with BoardLibrary.create(path, 9, 9) as library:
+        assert len(library) == 0
+        assert library.extend(boards[:4]) == 3
+        assert library.append(boards[4]) == 4
+        assert bytes(library[-1].mines) == bytes(boards[4].mines)
+
+    with BoardLibrary(path) as library:
+        assert len(library) == 5
+        for board, stored in zip(boards, library):
+            assert bytes(stored.mines) == bytes(board.mines)
+            assert stored.seed == board.seed
+        with pytest.raises(IndexError):
+            library.layout(5)
+        with pytest.raises(ValueError):
+            library.append(Board(8, 9, 10))
+
+
+def test_generate_is_deterministic(tmp_path):
+    layouts = []
+    for name in "ab":
+        with BoardLibrary.create(tmp_path / name, 16, 16) as library:
+            library.generate(10, 40, seed=3)
+            layouts.append([library.layout(k) for k in range(len(library))])
+    assert layouts[0] == layouts[1]
+    assert all(layout.nmines == 40 for layout in layouts[0])
+    # boards are drawn from a pool, their mines must not leak between them
+    assert len({layout.mask for layout in layouts[0]}) == 10
+
+
+def test_not_a_library(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"junk" * 10)
+    with pytest.raises(ValueError):
+        BoardLibrary(path)
@@ -0,0 +1,94 @@
+import random
+import struct
+
+import pytest
+
+from pysweeper.log import GameLog, read_games, replay
+from pysweeper.pysweeper import Board, FirstClick
+
+
+def state(board):
+    return (
+        bytes(board.mines),
+        bytes(board.exposed),
+        bytes(board.flagged),
+        bytes(board.visible),
+        board.nexposed,
+        board.nflagged,
+    )
+
+
+def play(rng, board, n):
+    moves = [board.expose, board.flag, board.chord]
+    for _ in range(n):
+        i = rng.randrange(board.nrows)
+        j = rng.randrange(board.ncolumns)
+        rng.choice(moves)(i, j)
+
+
+def test_replay_matches_played_games(tmp_path):
+    rng = random.Random(0)
+    path = tmp_path / "games.log"
+    played = []
+    with GameLog(path) as log:
+        for first_click in list(FirstClick) * 3:
+            board = Board(
+                rng.randint(5, 20),
+                rng.randint(5, 20),
+                rng.randint(1, 20),
+                first_click=first_click,
+            )
+            log.attach(board)
+            play(rng, board, rng.randint(1, 30))
+            played.append(state(board))
+    assert [state(board) for board in replay(path)] == played
+
+
+def test_appending_to_a_log(tmp_path):
+    path = tmp_path / "games.log"
+    for seed in range(2):
+        with GameLog(path) as log:
+            board = Board(9, 9, 10, seed=seed)
+            log.attach(board)
+            board.expose(4, 4)
+    assert [board.seed for board, _ in read_games(path)] == [0, 1]
+
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    path = tmp_path / "games.log"
+    with GameLog(path) as log:
+        board = Board(9, 9, 10, seed=1)
+        log.attach(board)
+        board.expose(4, 4)
+        board.flag(0, 0)
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    ((_, events),) = read_games(path)
+    assert len(events) == 1
+
+
+def test_logged_boards_refuse_floods(tmp_path):
+    with GameLog(tmp_path / "games.log") as log:
+        board = Board(9, 9, 10, seed=1)
+        log.attach(board)
+        with pytest.raises(ValueError):
+            board.flood([(0, 0)])
+
+
+def test_layout_not_matching_its_header(tmp_path):
+    path = tmp_path / "games.log"
+    with GameLog(path) as log:
+        log.attach(Board(9, 9, 10, seed=1))
+    data = bytearray(path.read_bytes())
+    # the mine count of the game record, after the log header, tag and seed
+    struct.pack_into("<I", data, 6 + 1 + 8, 11)
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        list(read_games(path))
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"junk" * 4)
+    with pytest.raises(ValueError):
+        list(read_games(path))
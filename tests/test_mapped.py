@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from pysweeper.mapped import MappedBoard
+from pysweeper.pysweeper import Board
+
+
+def mine_coordinates(board):
+    coordinate = board.graph.coordinate
+    return sorted(coordinate(v) for v, mine in enumerate(board.mines) if mine)
+
+
+def play(rng, boards, n):
+    nrows, ncolumns = boards[0].nrows, boards[0].ncolumns
+    for _ in range(n):
+        name = rng.choice(["expose", "flag", "flag", "chord"])
+        i, j = rng.randrange(nrows), rng.randrange(ncolumns)
+        for board in boards:
+            getattr(board, name)(i, j)
+
+
+@pytest.mark.parametrize("tile", [3, 4, 64])
+def test_plays_like_a_board(tmp_path, tile):
+    rng = random.Random(tile)
+    for k in range(10):
+        nrows, ncolumns = rng.randint(1, 40), rng.randint(1, 40)
+        nmines = rng.randint(0, nrows * ncolumns // 5)
+        with MappedBoard(
+            tmp_path / f"{k}.board", nrows, ncolumns, nmines, tile=tile
+        ) as mapped:
+            board = Board.from_mines(nrows, ncolumns, mine_coordinates(mapped))
+            play(rng, [mapped, board], 30)
+            assert mapped.observation.tobytes() == bytes(board.visible)
+            if nrows >= 4 and ncolumns >= 6:
+                assert mapped.window(1, 2, 3, 4) == b"".join(
+                    board.visible[i * ncolumns + 2 : i * ncolumns + 6]
+                    for i in range(1, 4)
+                )
+            assert (mapped.nexposed, mapped.nflagged) == (
+                board.nexposed,
+                board.nflagged,
+            )
+
+
+def test_open_continues_the_game(tmp_path):
+    path = tmp_path / "game.board"
+    rng = random.Random(0)
+    with MappedBoard(path, 30, 50, 150, seed=9, tile=8) as board:
+        play(rng, [board], 20)
+        visible = board.observation.tobytes()
+        counters = board.nexposed, board.nflagged, board.ncorrectly_flagged
+        started = board.started
+
+    with MappedBoard.open(path) as board:
+        assert board.observation.tobytes() == visible
+        assert (
+            board.nexposed,
+            board.nflagged,
+            board.ncorrectly_flagged,
+        ) == counters
+        assert (board.seed, board.started, board.nmines) == (9, started, 150)
+        play(rng, [board], 20)
+        visible = board.observation.tobytes()
+
+    with MappedBoard.open(path) as board:
+        assert board.observation.tobytes() == visible
+
+
+def test_open_refuses_other_files(tmp_path):
+    path = tmp_path / "junk"
+    path.write_bytes(b"junk" * 100)
+    with pytest.raises(ValueError):
+        MappedBoard.open(path)
+
+    path = tmp_path / "game.board"
+    MappedBoard(path, 10, 10, 5, seed=1).close()
+    with open(path, "r+b") as f:
+        f.truncate(4096 + 100)
+    with pytest.raises(ValueError):
+        MappedBoard.open(path)
@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from pysweeper.graph import TOPOLOGIES
+from pysweeper.pysweeper import Action, Board, FirstClick
+
+
+def state(board):
+    return (
+        bytes(board.mines),
+        bytes(board.counts),
+        bytes(board.exposed),
+        bytes(board.flagged),
+        bytes(board.visible),
+        board.nexposed,
+        board.nflagged,
+        board.ncorrectly_flagged,
+    )
+
+
+def random_moves(rng, board, n):
+    actions = [Action.EXPOSE, Action.FLAG, Action.CHORD]
+    return [
+        (
+            rng.choice(actions),
+            rng.randrange(board.nrows),
+            rng.randrange(board.ncolumns),
+        )
+        for _ in range(n)
+    ]
+
+
+def play(board, moves):
+    """Make `moves` one at a time, up to the first mine exposed."""
+    methods = {
+        Action.EXPOSE: board.expose,
+        Action.FLAG: board.flag,
+        Action.CHORD: board.chord,
+    }
+    for napplied, (action, i, j) in enumerate(moves, 1):
+        methods[action](i, j)
+        if any(m and e for m, e in zip(board.mines, board.exposed)):
+            return napplied, True
+    return len(moves), False
+
+
+@pytest.mark.parametrize("topology", ["rectangular", "toroidal", "hexagonal"])
+@pytest.mark.parametrize("first_click", list(FirstClick))
+def test_apply_moves_matches_sequential_moves(topology, first_click):
+    rng = random.Random(f"{topology}{first_click}")
+    for _ in range(30):
+        nrows = rng.randint(3, 12)
+        ncolumns = rng.randint(3, 12)
+        nmines = rng.randint(0, nrows * ncolumns // 5)
+        seed = rng.randrange(1 << 32)
+
+        def make():
+            return Board(
+                nrows,
+                ncolumns,
+                nmines,
+                seed=seed,
+                first_click=first_click,
+                graph=TOPOLOGIES[topology](nrows, ncolumns),
+            )
+
+        batched = make()
+        single = make()
+        moves = random_moves(rng, batched, rng.randint(1, 20))
+        before = bytes(batched.exposed)
+        changes = batched.apply_moves(moves)
+        assert (changes.napplied, changes.lost) == play(single, moves)
+        assert state(batched) == state(single)
+        fresh = {
+            v
+            for v, (old, new) in enumerate(zip(before, batched.exposed))
+            if new and not old
+        }
+        assert sorted(changes.exposed) == sorted(fresh)
+
+
+@pytest.mark.parametrize("nrows, ncolumns", [(9, 9), (300, 301)])
+def test_reset_like_a_new_board(nrows, ncolumns):
+    board = Board(nrows, ncolumns, 10, seed=1)
+    board.flag(0, 0)
+    board.expose(nrows - 1, ncolumns - 1)
+    board.flood([(nrows // 2, ncolumns // 2)])
+    board.reset(20, seed=2)
+    assert state(board) == state(Board(nrows, ncolumns, 20, seed=2))
+
+
+def test_chords_over_wrong_flags_do_not_open_from_mines():
+    # the mine has no adjacent mines, but is not an opening
+    board = Board.from_mines(4, 4, [(1, 1)])
+    board.expose(2, 2)
+    board.flag(3, 3)
+    exposed = board.chord(2, 2)
+    assert (1, 1) in exposed
+    assert board.exposed[board.graph.index(1, 1)]
+    for i, j in (0, 0), (0, 1), (1, 0):
+        assert (i, j) not in exposed
+        assert not board.exposed[board.graph.index(i, j)]
+
+
+def test_openings_that_do_not_fit_clear_the_click():
+    for seed in range(20):
+        board = Board(5, 5, 22, seed=seed, first_click=FirstClick.OPENING)
+        board.expose(2, 2)
+        assert not board.mines[board.graph.index(2, 2)]
+        assert board.exposed[board.graph.index(2, 2)]
+        assert board.nmines == bytes(board.mines).count(1) == 22
+    board = Board(3, 3, 9, seed=0, first_click=FirstClick.OPENING)
+    board.expose(1, 1)
+    assert board.nmines == 9
+    assert board.mines[board.graph.index(1, 1)]
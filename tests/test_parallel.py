@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from pysweeper import parallel
+from pysweeper.graph import grid_counts
+from pysweeper.history import History
+from pysweeper.log import GameLog
+from pysweeper.mapped import MappedBoard
+from pysweeper.pysweeper import Board
+from pysweeper.shared import SharedBoard
+
+
+def row_major(board, array):
+    index = board.graph.index
+    return bytes(
+        array[index(i, j)]
+        for i in range(board.nrows)
+        for j in range(board.ncolumns)
+    )
+
+
+def make(kind, tmp_path, nrows, ncolumns, nmines, seed, name="a"):
+    if kind == "shared":
+        return SharedBoard(nrows, ncolumns, nmines, seed=seed)
+    return MappedBoard(
+        tmp_path / f"{name}.board", nrows, ncolumns, nmines, seed=seed, tile=8
+    )
+
+
+@pytest.mark.parametrize("kind", ["shared", "mapped"])
+@pytest.mark.parametrize(
+    "nrows, ncolumns, nmines, band_rows",
+    [(1, 1, 1, 1), (20, 30, 100, 7), (33, 17, 500, 4), (50, 9, 0, 16)],
+)
+def test_lay_mines(tmp_path, kind, nrows, ncolumns, nmines, band_rows):
+    layouts = []
+    for processes in 1, 2:
+        with make(kind, tmp_path, nrows, ncolumns, 0, 5, processes) as board:
+            parallel.lay_mines(board, nmines, processes, band_rows)
+            mines = row_major(board, board.mines)
+            assert board.nmines == mines.count(1) == nmines
+            assert row_major(board, board.counts) == bytes(
+                grid_counts(nrows, ncolumns, mines)
+            )
+            layouts.append(mines)
+    assert layouts[0] == layouts[1]
+
+
+def test_lay_mines_refuses_laid_boards():
+    with SharedBoard(4, 4, 3, seed=1) as board:
+        with pytest.raises(ValueError):
+            parallel.lay_mines(board, 3, 1)
+    with SharedBoard(4, 4, 0, seed=1) as board:
+        with pytest.raises(ValueError):
+            parallel.lay_mines(board, 17, 1)
+
+
+def state(board):
+    return (
+        row_major(board, board.exposed),
+        row_major(board, board.visible),
+        board.nexposed,
+    )
+
+
+@pytest.mark.parametrize("kind", ["shared", "mapped"])
+@pytest.mark.parametrize("block_size", [1, 3, 8, 512])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_flood_like_a_board(tmp_path, kind, block_size, processes):
+    rng = random.Random(block_size)
+    for _ in range(6):
+        nrows, ncolumns = rng.randint(1, 40), rng.randint(1, 40)
+        nmines = rng.randint(0, nrows * ncolumns // rng.choice([4, 30]))
+        seed = rng.randrange(1 << 32)
+        with make(kind, tmp_path, nrows, ncolumns, nmines, seed) as board:
+            with make(
+                kind, tmp_path, nrows, ncolumns, nmines, seed, "b"
+            ) as reference:
+                for _ in range(rng.randint(0, 8)):
+                    i, j = rng.randrange(nrows), rng.randrange(ncolumns)
+                    board.flag(i, j)
+                    reference.flag(i, j)
+                for _ in range(2):
+                    coordinates = [
+                        (rng.randrange(nrows), rng.randrange(ncolumns))
+                        for _ in range(rng.randint(1, 4))
+                    ]
+                    nexposed = reference.nexposed
+                    Board.flood(reference, coordinates)
+                    assert parallel.flood(
+                        board, coordinates, processes, block_size
+                    ) == reference.nexposed - nexposed
+                    assert state(board) == state(reference)
+                i, j = rng.randrange(nrows), rng.randrange(ncolumns)
+                parallel.expose(board, i, j, processes, block_size)
+                Board.expose(reference, i, j)
+                assert state(board) == state(reference)
+
+
+def test_flood_refuses_undoable_and_logged_boards(tmp_path):
+    with SharedBoard(8, 8, 4, seed=1) as board:
+        History(board)
+        with pytest.raises(ValueError):
+            parallel.flood(board, [(0, 0)], 1)
+        with pytest.raises(ValueError):
+            parallel.expose(board, 0, 0, 1)
+    with GameLog(tmp_path / "games.log") as log:
+        with SharedBoard(8, 8, 4, seed=1) as board:
+            log.attach(board)
+            with pytest.raises(ValueError):
+                parallel.flood(board, [(0, 0)], 1)
+            with pytest.raises(ValueError):
+                Board.flood(board, [(0, 0)])
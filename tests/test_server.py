@@ -0,0 +1,299 @@
+import asyncio
+import base64
+
+import pytest
+
+from pysweeper import delta
+from pysweeper.pysweeper import COVERED, FLAGGED
+from pysweeper.server import LIMIT, Client, GameServer
+
+
+NEW = {"rows": 9, "columns": 9, "mines": 10, "seed": 1}
+
+
+def new(server, **fields):
+    request = {"op": "new", "rows": 9, "columns": 9, "mines": 10, **fields}
+    return server.handle(request)
+
+
+def test_play():
+    server = GameServer()
+    game = new(server, seed=1)["game"]
+    reply = server.handle(
+        {"op": "expose", "game": game, "row": 4, "column": 4, "id": 7}
+    )
+    assert reply["id"] == 7
+    assert reply["state"] in ("playing", "won", "lost")
+    assert [4, 4] in [cell[:2] for cell in reply["cells"]]
+    assert server.handle({"op": "close", "game": game}) == {}
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        {"op": "dance"},
+        {"op": "new", "rows": 9, "columns": 9},
+        {"op": "new", "rows": 1e400, "columns": 9, "mines": 1},
+        {"op": "new", "rows": -3, "columns": -3, "mines": 0},
+        {"op": "new", "rows": 0, "columns": 9, "mines": 0},
+        {"op": "new", "rows": 9, "columns": 9, "mines": 82},
+        {"op": "new", "rows": "x", "columns": 9, "mines": 1},
+        {"op": "new", "rows": 9, "columns": 9, "mines": 1, "topology": "?"},
+        {"op": "expose", "game": [0], "row": 0, "column": 0},
+        {"op": "expose", "game": 5, "row": 0, "column": 0},
+        {"op": "expose", "row": 0, "column": 0},
+        {"op": "close", "game": {}},
+        {"op": "watch", "game": 0},
+    ],
+)
+def test_error_replies(request_):
+    server = GameServer()
+    new(server)
+    reply = server.handle(dict(request_, id="x"))
+    assert set(reply) == {"error", "id"}
+    assert reply["id"] == "x"
+
+
+@pytest.mark.parametrize(
+    "moves",
+    [
+        [["expose", 9, 0]],
+        [["expose", 1e400, 0]],
+        [["explode", 0, 0]],
+        [["expose", 0]],
+        "expose",
+    ],
+)
+def test_bad_moves(moves):
+    server = GameServer()
+    game = new(server)["game"]
+    reply = server.handle({"op": "moves", "game": game, "moves": moves})
+    assert "error" in reply
+
+
+def test_lost_games_refuse_moves():
+    server = GameServer()
+    game = new(server, rows=2, columns=2, mines=4)["game"]
+    move = {"game": game, "row": 0, "column": 0}
+    assert server.handle(dict(move, op="expose"))["state"] == "lost"
+    reply = server.handle(dict(move, op="flag"))
+    assert "error" in reply
+
+
+def test_coop_games_survive_bad_moves():
+    async def play():
+        server = GameServer()
+        game = new(server, coop=True, seed=1)["game"]
+        bad = await server.handle(
+            {"op": "moves", "game": game, "moves": [["expose", 1e400, 0]]}
+        )
+        # a dead writer would never reply
+        good = await asyncio.wait_for(
+            server.handle(
+                {"op": "expose", "game": game, "row": 4, "column": 4}
+            ),
+            5,
+        )
+        server.handle({"op": "close", "game": game})
+        return bad, good
+
+    bad, good = asyncio.run(play())
+    assert "error" in bad
+    assert "error" not in good
+
+
+def test_coop_moves_apply_in_arrival_order():
+    async def play():
+        server = GameServer()
+        game = new(server, coop=True, seed=1)["game"]
+        flag = {"op": "flag", "game": game, "row": 0, "column": 0}
+        # two connections toggling the same flag, interleaved
+        replies = [
+            server.handle(dict(flag, id=f"{connection}{n}"))
+            for n in range(3)
+            for connection in "ab"
+        ]
+        replies = await asyncio.gather(*replies)
+        server.handle({"op": "close", "game": game})
+        return replies
+
+    replies = asyncio.run(play())
+    assert [reply["id"] for reply in replies] == [
+        "a0", "b0", "a1", "b1", "a2", "b2"
+    ]
+    codes = [reply["cells"][0][2] for reply in replies]
+    assert codes == [FLAGGED, COVERED] * 3
+    assert [reply["flags"] for reply in replies] == [9, 10] * 3
+
+
+def test_closing_a_coop_game_fails_queued_moves():
+    async def play():
+        server = GameServer()
+        game = new(server, coop=True, seed=1)["game"]
+        move = {"op": "expose", "game": game, "row": 4, "column": 4}
+        abandoned = server.handle(move)
+        queued = server.handle(move)
+        abandoned.cancel()
+        server.handle({"op": "close", "game": game})
+        return await queued
+
+    assert "error" in asyncio.run(play())
+
+
+def test_observations_share_a_snapshot_per_version():
+    async def play():
+        server = GameServer()
+        game = new(server, seed=1)["game"]
+        observe = {"op": "observe", "game": game}
+        snapshot = server.games[game].snapshot()
+        assert server.games[game].snapshot() is snapshot
+        first = await asyncio.gather(
+            server.handle(observe), server.handle(observe)
+        )
+        assert server.games[game].snapshot() is snapshot
+        server.handle({"op": "flag", "game": game, "row": 0, "column": 0})
+        assert server.games[game].snapshot() is not snapshot
+        second = await server.handle(observe)
+        visible = bytes(server.games[game].board.visible)
+        return first, second, visible
+
+    first, second, visible = asyncio.run(play())
+    assert first[0] == first[1]
+    assert first[0]["version"] == 0
+    assert second["version"] == 1
+    decoder = delta.Decoder()
+    decoder.apply(base64.b64decode(second["keyframe"]))
+    assert decoder.sequence == 1
+    assert decoder.visible == visible
+
+
+GAUGES = {
+    "pysweeper_games",
+    "pysweeper_coop_games",
+    "pysweeper_connections",
+    "pysweeper_board_bytes",
+    "pysweeper_board_bytes_max",
+    "pysweeper_graph_bytes",
+    "pysweeper_writer_queue_depth",
+    "pysweeper_writer_queue_depth_max",
+    "pysweeper_pool_bytes",
+    "pysweeper_spectators",
+    "pysweeper_spectator_lag_max",
+}
+
+
+async def scrape(port, target="/metrics", method="GET"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: x\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.decode().partition("\r\n\r\n")
+    return head.split("\r\n")[0], body
+
+
+def test_metrics_scrape():
+    async def play():
+        server = GameServer()
+        games = await server.start("127.0.0.1", 0)
+        metrics = await server.start_metrics("127.0.0.1", 0)
+        port = games.sockets[0].getsockname()[1]
+        metrics_port = metrics.sockets[0].getsockname()[1]
+        async with games, metrics:
+            async with await Client.connect("127.0.0.1", port) as client:
+                game = (await client.request("new", **NEW))["game"]
+                for j in range(5):
+                    await client.request(
+                        "expose", game=game, row=0, column=j
+                    )
+                await client.request("dance")
+                status, body = await scrape(metrics_port)
+            errors = [
+                await scrape(metrics_port, "/other"),
+                await scrape(metrics_port, method="POST"),
+            ]
+        return status, body, errors
+
+    status, body, errors = asyncio.run(play())
+    assert status == "HTTP/1.0 200 OK"
+    assert [status for status, _ in errors] == [
+        "HTTP/1.0 404 Not Found",
+        "HTTP/1.0 405 Method Not Allowed",
+    ]
+    assert body.endswith("\n# EOF\n")
+    lines = body.splitlines()
+    assert lines.count("# EOF") == 1
+
+    types = dict(
+        line.split()[2:4] for line in lines if line.startswith("# TYPE ")
+    )
+    assert {name for name, kind in types.items() if kind == "gauge"} == GAUGES
+    samples = {}
+    for line in lines:
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    assert samples["pysweeper_games"] == 1
+    assert samples["pysweeper_connections"] == 1
+    assert samples['pysweeper_requests_total{op="expose"}'] == 5
+    assert samples['pysweeper_request_errors_total{op="unknown"}'] == 1
+
+    name = "pysweeper_request_duration_seconds"
+    for op in "new", "expose", "unknown":
+        buckets = [
+            (line.split('le="')[1].split('"')[0], samples[line.rsplit(" ")[0]])
+            for line in lines
+            if line.startswith(f'{name}_bucket{{op="{op}",')
+        ]
+        bounds = [float(bound) for bound, _ in buckets]
+        counts = [count for _, count in buckets]
+        assert bounds == sorted(bounds) and bounds[-1] == float("inf")
+        assert counts == sorted(counts)
+        count = samples[f'{name}_count{{op="{op}"}}']
+        assert counts[-1] == count
+        assert count == samples[f'pysweeper_requests_total{{op="{op}"}}']
+        total = samples[f'{name}_sum{{op="{op}"}}']
+        # every request took at most its bucket's bound
+        slowest = next(
+            bound for bound, n in zip(bounds, counts) if n == count
+        )
+        assert 0 < total <= count * slowest
+
+
+def test_clients_over_sockets():
+    async def play():
+        server = GameServer()
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            async with await Client.connect("127.0.0.1", port) as client:
+                game = (await client.request("new", **NEW))["game"]
+                # pipelined requests are answered in order
+                for j in range(9):
+                    client.send("flag", game=game, row=8, column=j, id=j)
+                client.send("dance", id="x")
+                client.send("expose", game=game, row=99, column=0, id="y")
+                client.send("observe", game=game, id="z")
+                replies = [await client.receive() for _ in range(12)]
+                client.writer.write(b"{nope\n[1]\n")
+                garbage = [await client.receive() for _ in range(2)]
+                # the rest of a request too long to buffer is dropped
+                client.writer.write(b"x" * 3 * LIMIT + b"\n")
+                garbage.append(await client.receive())
+                client.send("watch", game=game)
+                watched = await client.receive()
+                _, frame = await client.receive_frame()
+                closed = await client.request("close", game=game)
+        return game, replies, garbage, watched, frame, closed
+
+    game, replies, garbage, watched, frame, closed = asyncio.run(play())
+    assert [reply["id"] for reply in replies] == [*range(9), "x", "y", "z"]
+    assert [reply["flags"] for reply in replies[:9]] == [*range(9, 0, -1)]
+    assert replies[9]["error"] == "Unknown op 'dance'"
+    assert "error" in replies[10]
+    assert replies[11]["version"] == 9
+    assert garbage[0]["error"].startswith("Invalid JSON")
+    assert garbage[1] == {"error": "Requests must be objects"}
+    assert garbage[2] == {"error": "Request too long"}
+    assert watched == {"game": game}
+    assert frame[0] == delta.KEYFRAME
+    assert closed == {}
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+
+from pysweeper.history import History
+from pysweeper.pysweeper import COVERED, FirstClick
+from pysweeper.shared import SharedBoard, SharedBoardView
+
+
+def peek(name):
+    with SharedBoardView(name) as view:
+        return view.snapshot()
+
+
+def test_views_follow_the_board():
+    with SharedBoard(9, 9, 10, seed=3) as board:
+        with SharedBoardView(board.name) as view:
+            board.expose(4, 4)
+            board.flag(0, 0)
+            version, visible = view.snapshot()
+            assert visible == bytes(board.visible)
+            assert view.counters == (10, board.nexposed, board.nflagged)
+            board.reset(12, seed=4)
+            assert view.version == version + 2
+            assert view.snapshot()[1] == bytes([COVERED]) * 81
+            assert view.counters == (12, 0, 0)
+
+
+def test_flags_by_vertex_are_one_version():
+    with SharedBoard(9, 9, 10, seed=3) as board:
+        with SharedBoardView(board.name) as view:
+            version = view.version
+            board.flag_vertex(5)
+            assert view.version == version + 2
+            assert view.snapshot()[1] == bytes(board.visible)
+            assert view.counters == (10, 0, 1)
+
+
+def test_views_follow_undo_and_redo():
+    with SharedBoard(
+        9, 9, 10, seed=3, first_click=FirstClick.OPENING
+    ) as board:
+        with SharedBoardView(board.name) as view:
+            history = History(board)
+            board.expose(4, 4)
+            board.flag_vertex(0)
+            board.flag(8, 8)
+            seen = []
+            while history.can_undo:
+                seen.append(view.snapshot())
+                history.undo()
+            assert view.snapshot() == (seen[-1][0] + 2, bytes([COVERED]) * 81)
+            assert view.counters == (10, 0, 0)
+            while history.can_redo:
+                history.redo()
+                version, visible = seen.pop()
+                assert visible == view.snapshot()[1] == bytes(board.visible)
+                assert view.counters == (10, board.nexposed, board.nflagged)
+            assert view.version % 2 == 0
+
+
+def test_views_in_other_programs_leave_the_block_alone():
+    script = "import sys; from pysweeper.shared import SharedBoardView as V"
+    script += "; V(sys.argv[1]).close()"
+    with SharedBoard(9, 9, 10, seed=3) as board:
+        board.expose(4, 4)
+        for _ in range(2):
+            subprocess.run(
+                [sys.executable, "-c", script, board.name], check=True
+            )
+        assert peek(board.name)[1] == bytes(board.visible)
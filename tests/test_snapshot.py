@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from pysweeper import snapshot
+from pysweeper.graph import TOPOLOGIES, GridGraph, rectangular
+from pysweeper.pysweeper import Board, FirstClick
+
+
+def state(board):
+    return (
+        board.graph.topology,
+        board.graph.shape,
+        board.seed,
+        board.first_click,
+        board.started,
+        bytes(board.mines),
+        bytes(board.counts),
+        bytes(board.exposed),
+        bytes(board.flagged),
+        bytes(board.visible),
+        board.nmines,
+        board.nexposed,
+        board.nflagged,
+        board.ncorrectly_flagged,
+    )
+
+
+def play(rng, board, n):
+    moves = [board.expose, board.flag, board.flag, board.chord]
+    for _ in range(n):
+        i = rng.randrange(board.nrows)
+        j = rng.randrange(board.ncolumns)
+        rng.choice(moves)(i, j)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("topology", ["rectangular", "toroidal", "hexagonal"])
+def test_round_trip(topology, compress):
+    rng = random.Random(topology)
+    for _ in range(20):
+        nrows = rng.randint(2, 20)
+        ncolumns = rng.randint(2, 20)
+        board = Board(
+            nrows,
+            ncolumns,
+            rng.randint(0, nrows * ncolumns // 4),
+            first_click=rng.choice(list(FirstClick)),
+            graph=TOPOLOGIES[topology](nrows, ncolumns),
+        )
+        play(rng, board, rng.randint(0, 20))
+        copy = snapshot.loads(snapshot.dumps(board, compress=compress))
+        assert state(copy) == state(board)
+
+
+def test_resumed_games_continue_alike():
+    board = Board(16, 30, 99, seed=5, first_click=FirstClick.OPENING)
+    board.expose(8, 15)
+    copy = snapshot.loads(snapshot.dumps(board))
+    for seed in range(3):
+        play(random.Random(seed), board, 20)
+        play(random.Random(seed), copy, 20)
+        assert state(copy) == state(board)
+
+
+def test_resuming_grids_builds_no_adjacency_arrays():
+    board = Board(300, 400, 20000, seed=2)
+    board.expose(150, 200)
+    rectangular.cache_clear()
+    copy = snapshot.loads(snapshot.dumps(board, compress=True))
+    assert isinstance(copy.graph, GridGraph)
+    assert copy.graph.nbytes == 0
+    assert state(copy) == state(board)
+
+
+def test_save_and_load(tmp_path):
+    board = Board(9, 9, 10, seed=1)
+    board.expose(4, 4)
+    board.flag(0, 0)
+    path = tmp_path / "game.pswg"
+    snapshot.save(board, path)
+    assert state(snapshot.load(path)) == state(board)
+
+
+def test_invalid_snapshots():
+    data = snapshot.dumps(Board(9, 9, 10, seed=1))
+    with pytest.raises(ValueError):
+        snapshot.loads(data[:10])
+    with pytest.raises(ValueError):
+        snapshot.loads(data[:-1])
+    with pytest.raises(ValueError):
+        snapshot.loads(b"XXXX" + data[4:])